@@ -0,0 +1,114 @@
+"""Partition markers, involved and vehicles by accident_year
+
+The primary keys of involved and vehicles become (id, accident_year) - a partitioned table's keys have to include
+the partition key.
+Involved and vehicles rows without an accident_year fit no partition: they are moved to
+cbs.involved_without_accident_year and cbs.vehicles_without_accident_year, and moved back by the downgrade.
+
+Revision ID: b2d7e4c9a613
+Revises: 9c3a1f0b7e21
+Create Date: 2020-04-19 11:27:03.905127
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d7e4c9a613'
+down_revision = '9c3a1f0b7e21'
+branch_labels = None
+depends_on = None
+
+# referenced tables first
+tables_names = ['markers', 'involved', 'vehicles']
+serial_tables_names = ['involved', 'vehicles']
+
+indexes = {'markers': [('ix_cbs_accident_marker_geom', ['geom'], 'gist'),
+                       ('ix_cbs_markers_created', ['created'], None),
+                       ('ix_cbs_markers_id', ['id'], None),
+                       ('ix_cbs_markers_provider_and_id', ['provider_and_id'], None),
+                       ('ix_cbs_markers_provider_code', ['provider_code'], None)],
+           'involved': [('ix_cbs_involved_accident_id', ['accident_id'], None),
+                        ('ix_cbs_involved_provider_and_id', ['provider_and_id'], None)],
+           'vehicles': [('ix_cbs_vehicles_accident_id', ['accident_id'], None),
+                        ('ix_cbs_vehicles_provider_and_id', ['provider_and_id'], None)]}
+
+primary_keys = {'markers': ['id', 'provider_code', 'accident_year'],
+                'involved': ['id', 'accident_year'],
+                'vehicles': ['id', 'accident_year']}
+
+primary_keys_before = {'markers': ['id', 'provider_code', 'accident_year'],
+                       'involved': ['id'],
+                       'vehicles': ['id']}
+
+markers_foreign_key = ['accident_id', 'provider_code', 'accident_year']
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def _side_table(table_name):
+    return 'cbs.{0}_without_accident_year'.format(table_name)
+
+
+def _set_aside(table_name):
+    """
+    renames the table and frees its index and constraint names for the new table
+    """
+    for index_name, _, _ in indexes[table_name]:
+        op.drop_index(index_name, table_name=table_name, schema='cbs')
+    op.execute('ALTER TABLE cbs.{0} RENAME CONSTRAINT {0}_pkey TO {0}_old_pkey'.format(table_name))
+    op.execute('ALTER TABLE cbs.{0} RENAME TO {0}_old'.format(table_name))
+    if table_name in serial_tables_names:
+        op.execute('ALTER SEQUENCE cbs.{0}_id_seq OWNED BY NONE'.format(table_name))
+
+
+def _create_like(table_name, partition_by):
+    op.execute('CREATE TABLE cbs.{0} (LIKE cbs.{0}_old INCLUDING DEFAULTS){1}'.format(
+        table_name, ' PARTITION BY LIST (accident_year)' if partition_by else ''))
+    if table_name in serial_tables_names:
+        op.execute('ALTER SEQUENCE cbs.{0}_id_seq OWNED BY cbs.{0}.id'.format(table_name))
+    op.create_primary_key('{0}_pkey'.format(table_name), table_name,
+                          primary_keys[table_name] if partition_by else primary_keys_before[table_name],
+                          schema='cbs')
+    if table_name != 'markers':
+        op.create_foreign_key('{0}_accident_id_provider_code_accident_year_fkey'.format(table_name),
+                              table_name, 'markers', markers_foreign_key, ['id', 'provider_code', 'accident_year'],
+                              source_schema='cbs', referent_schema='cbs', ondelete='CASCADE')
+    for index_name, columns, using in indexes[table_name]:
+        op.create_index(index_name, table_name, columns, unique=False, schema='cbs', postgresql_using=using)
+
+
+def upgrade():
+    for table_name in reversed(tables_names):
+        _set_aside(table_name)
+    for table_name in serial_tables_names:
+        op.execute('CREATE TABLE {0} AS SELECT * FROM cbs.{1}_old WHERE accident_year IS NULL'.format(
+            _side_table(table_name), table_name))
+        moved = op.get_bind().execute('DELETE FROM cbs.{0}_old WHERE accident_year IS NULL'.format(
+            table_name)).rowcount
+        logger.info('Moved {0} {1} rows without an accident_year to {2}'.format(
+            moved, table_name, _side_table(table_name)))
+    years = [row[0] for row in op.get_bind().execute('SELECT DISTINCT accident_year FROM cbs.markers_old')]
+    for table_name in tables_names:
+        _create_like(table_name, partition_by=True)
+        for year in years:
+            op.execute('CREATE TABLE cbs.{0}_{1} PARTITION OF cbs.{0} FOR VALUES IN ({1})'.format(table_name, year))
+        op.execute('INSERT INTO cbs.{0} SELECT * FROM cbs.{0}_old'.format(table_name))
+    for table_name in reversed(tables_names):
+        op.execute('DROP TABLE cbs.{0}_old'.format(table_name))
+
+
+def downgrade():
+    for table_name in reversed(tables_names):
+        _set_aside(table_name)
+    for table_name in tables_names:
+        _create_like(table_name, partition_by=False)
+        op.execute('INSERT INTO cbs.{0} SELECT * FROM cbs.{0}_old'.format(table_name))
+        if table_name in serial_tables_names:
+            op.execute('INSERT INTO cbs.{0} SELECT * FROM {1}'.format(table_name, _side_table(table_name)))
+            op.execute('DROP TABLE {0}'.format(_side_table(table_name)))
+    for table_name in reversed(tables_names):
+        op.execute('DROP TABLE cbs.{0}_old CASCADE'.format(table_name))
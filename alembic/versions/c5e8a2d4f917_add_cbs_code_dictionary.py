@@ -0,0 +1,96 @@
+"""Add CBS code dictionary
+
+Revision ID: c5e8a2d4f917
+Revises: b2d7e4c9a613
+Create Date: 2020-05-03 17:42:08.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a2d4f917'
+down_revision = 'b2d7e4c9a613'
+branch_labels = None
+depends_on = None
+
+# (table_id, code table, value column) of the code tables copied into cbs.code_dictionary
+CODE_TABLES = [
+    (0, 'columns_description', 'column_description'),
+    (1, 'police_unit', 'police_unit_hebrew'),
+    (2, 'road_type', 'road_type_hebrew'),
+    (4, 'accident_severity', 'accident_severity_hebrew'),
+    (5, 'accident_type', 'accident_type_hebrew'),
+    (9, 'road_shape', 'road_shape_hebrew'),
+    (10, 'one_lane', 'one_lane_hebrew'),
+    (11, 'multi_lane', 'multi_lane_hebrew'),
+    (12, 'speed_limit', 'speed_limit_hebrew'),
+    (13, 'road_intactness', 'road_intactness_hebrew'),
+    (14, 'road_width', 'road_width_hebrew'),
+    (15, 'road_sign', 'road_sign_hebrew'),
+    (16, 'road_light', 'road_light_hebrew'),
+    (17, 'road_control', 'road_control_hebrew'),
+    (18, 'weather', 'weather_hebrew'),
+    (19, 'road_surface', 'road_surface_hebrew'),
+    (21, 'road_object', 'road_object_hebrew'),
+    (22, 'object_distance', 'object_distance_hebrew'),
+    (23, 'didnt_cross', 'didnt_cross_hebrew'),
+    (24, 'cross_mode', 'cross_mode_hebrew'),
+    (25, 'cross_location', 'cross_location_hebrew'),
+    (26, 'cross_direction', 'cross_direction_hebrew'),
+    (28, 'driving_directions', 'driving_directions_hebrew'),
+    (30, 'vehicle_status', 'vehicle_status_hebrew'),
+    (31, 'involved_type', 'involved_type_hebrew'),
+    (34, 'safety_measures', 'safety_measures_hebrew'),
+    (35, 'injury_severity', 'injury_severity_hebrew'),
+    (37, 'day_type', 'day_type_hebrew'),
+    (38, 'day_night', 'day_night_hebrew'),
+    (39, 'day_in_week', 'day_in_week_hebrew'),
+    (40, 'traffic_light', 'traffic_light_hebrew'),
+    (43, 'vehicle_attribution', 'vehicle_attribution_hebrew'),
+    (45, 'vehicle_type', 'vehicle_type_hebrew'),
+    (50, 'injured_type', 'injured_type_hebrew'),
+    (52, 'injured_position', 'injured_position_hebrew'),
+    (60, 'accident_month', 'accident_month_hebrew'),
+    (66, 'population_type', 'population_type_hebrew'),
+    (67, 'sex', 'sex_hebrew'),
+    (68, 'geo_area', 'geo_area_hebrew'),
+    (77, 'region', 'region_hebrew'),
+    (78, 'municipal_status', 'municipal_status_hebrew'),
+    (79, 'district', 'district_hebrew'),
+    (80, 'natural_area', 'natural_area_hebrew'),
+    (81, 'yishuv_shape', 'yishuv_shape_hebrew'),
+    (92, 'age_group', 'age_group_hebrew'),
+    (93, 'accident_hour_raw', 'accident_hour_raw_hebrew'),
+    (111, 'engine_volume', 'engine_volume_hebrew'),
+    (112, 'total_weight', 'total_weight_hebrew'),
+    (200, 'hospital_time', 'hospital_time_hebrew'),
+    (201, 'medical_type', 'medical_type_hebrew'),
+    (202, 'release_dest', 'release_dest_hebrew'),
+    (203, 'safety_measures_use', 'safety_measures_use_hebrew'),
+    (204, 'late_deceased', 'late_deceased_hebrew'),
+    (205, 'location_accuracy', 'location_accuracy_hebrew'),
+    (229, 'vehicle_damage', 'vehicle_damage_hebrew'),
+]
+
+
+def upgrade():
+    op.create_table('code_dictionary',
+    sa.Column('table_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('provider_code', sa.Integer(), nullable=False),
+    sa.Column('hebrew', sa.Text(), nullable=True),
+    schema='cbs'
+    )
+    # a covering primary key, so the views' joins on the dictionary are index only scans
+    op.execute('ALTER TABLE cbs.code_dictionary ADD CONSTRAINT code_dictionary_pkey '
+               'PRIMARY KEY (table_id, id, year, provider_code) INCLUDE (hebrew)')
+    for table_id, table, value_column in CODE_TABLES:
+        op.execute('INSERT INTO cbs.code_dictionary (table_id, id, year, provider_code, hebrew) '
+                   'SELECT {0}, id, year, provider_code, {1} FROM cbs.{2}'.format(table_id, value_column, table))
+
+
+def downgrade():
+    op.drop_table('code_dictionary', schema='cbs')
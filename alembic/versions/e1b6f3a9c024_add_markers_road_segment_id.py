@@ -0,0 +1,30 @@
+"""Add markers road_segment_id
+
+Revision ID: e1b6f3a9c024
+Revises: c5e8a2d4f917
+Create Date: 2020-05-10 12:16:45.731940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b6f3a9c024'
+down_revision = 'c5e8a2d4f917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # added to the partitioned table, so to all the year partitions. filled by the import,
+    # existing rows by `python main.py process road-segment-ids`
+    op.add_column('markers', sa.Column('road_segment_id', sa.Integer(), nullable=True), schema='cbs')
+    op.create_index('ix_cbs_markers_road_segment_id', 'markers', ['road_segment_id'], unique=False, schema='cbs')
+    op.create_index('ix_cbs_road_segments_segment_id', 'road_segments', ['segment_id'], unique=False, schema='cbs')
+
+
+def downgrade():
+    op.drop_index('ix_cbs_road_segments_segment_id', table_name='road_segments', schema='cbs')
+    op.drop_index('ix_cbs_markers_road_segment_id', table_name='markers', schema='cbs')
+    op.drop_column('markers', 'road_segment_id', schema='cbs')
@@ -1,37 +1,75 @@
-from flask_restplus import Namespace, Resource, fields
+from flask_restplus import Namespace, Resource, fields, inputs
+
+from anyway.apis.markers import query
+from anyway.core.constants import CONST
 
 markers_api = Namespace('markers', description='Markers related operations')
 
 marker = markers_api.model('Marker', {
-    'id': fields.String(required=True, description='The marker identifier'),
-    'name': fields.String(required=True, description='The marker name'),
+    'id': fields.Integer(required=True, description='The marker identifier'),
+    'provider_code': fields.Integer(required=True, description='The provider of the marker'),
+    'accident_year': fields.Integer(required=True),
+    'latitude': fields.Float(),
+    'longitude': fields.Float(),
+    'accident_severity': fields.Integer(),
+    'accident_timestamp': fields.DateTime(dt_format='iso8601'),
+    'title': fields.String(),
+    'address': fields.String(),
+    'accident_type': fields.Integer(),
+    'location_accuracy': fields.Integer(),
+    'road_type': fields.Integer(),
+    'road1': fields.Integer(),
+    'km': fields.Float(),
+    'yishuv_name': fields.String(),
 })
 
-MARKERS = [
-    {'id': 'test', 'name': 'Test name'},
-]
-
 
 @markers_api.route('/')
+@markers_api.response(400, 'Invalid viewport or date range')
 class MarkersList(Resource):
+    parser = markers_api.parser()
+    parser.add_argument('ne_lat', type=float, required=True, location='args')
+    parser.add_argument('ne_lng', type=float, required=True, location='args')
+    parser.add_argument('sw_lat', type=float, required=True, location='args')
+    parser.add_argument('sw_lng', type=float, required=True, location='args')
+    parser.add_argument('zoom', type=int, default=CONST.MINIMAL_ZOOM, location='args',
+                        help='below {0} the markers are returned without their details'.format(CONST.MINIMAL_ZOOM))
+    parser.add_argument('start_date', type=inputs.date_from_iso8601, location='args', help='YYYY-MM-DD, inclusive')
+    parser.add_argument('end_date', type=inputs.date_from_iso8601, location='args', help='YYYY-MM-DD, inclusive')
+    parser.add_argument('severity', type=int, action='append', location='args', help='can be repeated')
+    parser.add_argument('provider_code', type=int, action='append', location='args', help='can be repeated')
 
     @markers_api.doc('list_markers')
-    @markers_api.marshal_list_with(marker)
+    @markers_api.expect(parser)
+    @markers_api.marshal_list_with(marker, skip_none=True)
     def get(self):
-        # List all markers
-        return MARKERS
+        # List the markers of the viewport, at most ENTRIES_PER_PAGE of them
+        args = self.parser.parse_args()
+        try:
+            markers_filter = query.make_filter(args['ne_lat'], args['ne_lng'], args['sw_lat'], args['sw_lng'],
+                                               zoom=args['zoom'], start_date=args['start_date'],
+                                               end_date=args['end_date'], severities=args['severity'],
+                                               provider_codes=args['provider_code'])
+        except ValueError as e:
+            markers_api.abort(400, str(e))
+        return query.get_markers(markers_filter)
 
 
-@markers_api.route('/<id>')
+@markers_api.route('/<int:id>')
 @markers_api.param('id', 'The marker identifier')
 @markers_api.response(404, 'Marker not found')
 class Marker(Resource):
+    parser = markers_api.parser()
+    parser.add_argument('provider_code', type=int, location='args',
+                        help='the provider of the marker, when more than one has this identifier')
 
     @markers_api.doc('get_marker')
-    @markers_api.marshal_with(marker)
+    @markers_api.expect(parser)
+    @markers_api.marshal_with(marker, skip_none=True)
     def get(self, id):
         # Fetch a marker given its identifier
-        for marker in MARKERS:
-            if marker['id'] == id:
-                return marker
-        markers_api.abort(404)
+        args = self.parser.parse_args()
+        found = query.get_marker(id, args['provider_code'])
+        if found is None:
+            markers_api.abort(404)
+        return found
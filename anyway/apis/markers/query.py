@@ -0,0 +1,111 @@
+"""
+the markers of a map viewport, read from cbs.markers with the columns the map draws them with.
+the viewport is matched against the markers geometry with the ix_cbs_accident_marker_geom GiST index, and the
+date range limits the accident_year partitions that are read.
+"""
+import datetime
+from collections import namedtuple
+
+from sqlalchemy import and_, func, select
+
+from anyway.common.models.cbs_models import AccidentMarker
+from anyway.core import config
+from anyway.core.constants import CONST
+
+from anyway import db
+
+# the SRID of the markers geometry
+SRID = 4326
+
+# the columns every marker is drawn with
+THIN_COLUMNS = ('id', 'provider_code', 'accident_year', 'latitude', 'longitude', 'accident_severity',
+                'accident_timestamp')
+
+# and the columns of its details, shown from CONST.MINIMAL_ZOOM
+DETAILED_COLUMNS = THIN_COLUMNS + ('title', 'address', 'accident_type', 'location_accuracy', 'road_type', 'road1',
+                                   'km', 'yishuv_name')
+
+MarkersFilter = namedtuple('MarkersFilter', ['ne_lat', 'ne_lng', 'sw_lat', 'sw_lng', 'zoom', 'start_date',
+                                             'end_date', 'severities', 'provider_codes'])
+
+
+def make_filter(ne_lat, ne_lng, sw_lat, sw_lng, zoom=CONST.MINIMAL_ZOOM, start_date=None, end_date=None,
+              severities=None, provider_codes=None):
+    """
+    :param start_date: the first date of the markers, inclusive, all of them if None
+    :param end_date: the last date of the markers, inclusive, all of them if None
+    :param severities: accident_severity codes, all of them if empty
+    :param provider_codes: all of them if empty
+    :raises ValueError: when the viewport or the date range is empty or out of range
+    """
+    if not (-90 <= sw_lat <= ne_lat <= 90) or not (-180 <= sw_lng <= ne_lng <= 180):
+        raise ValueError('The viewport ({0}, {1}) - ({2}, {3}) is not a valid bounding box'.format(
+            sw_lat, sw_lng, ne_lat, ne_lng))
+    if start_date is not None and end_date is not None and start_date > end_date:
+        raise ValueError('The start date {0} is after the end date {1}'.format(start_date, end_date))
+    return MarkersFilter(ne_lat, ne_lng, sw_lat, sw_lng, zoom, start_date, end_date,
+                         tuple(severities or ()), tuple(provider_codes or ()))
+
+
+def get_limit():
+    """
+    :return: the maximal number of markers a query returns
+    """
+    return int(config.ENTRIES_PER_PAGE)
+
+
+def _day_after(date):
+    return datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(days=1)
+
+
+def markers_query(markers_filter, limit=None):
+    """
+    :param limit: at most this many markers, capped by get_limit() - which is also the default
+    :return: the select of the filter's markers, the most severe and then the latest first - these are the ones
+    that are kept when the viewport has more markers than the limit
+    """
+    table = AccidentMarker.__table__
+    column_names = THIN_COLUMNS if markers_filter.zoom < CONST.MINIMAL_ZOOM else DETAILED_COLUMNS
+    envelope = func.ST_MakeEnvelope(markers_filter.sw_lng, markers_filter.sw_lat,
+                                    markers_filter.ne_lng, markers_filter.ne_lat, SRID)
+    # && is the bounding boxes intersection the GiST index answers, and a point's bounding box is the point
+    conditions = [table.c.geom.intersects(envelope)]
+    # the partition key, so only the range's partitions are read
+    if markers_filter.start_date is not None:
+        conditions.append(table.c.accident_year >= markers_filter.start_date.year)
+        conditions.append(table.c.accident_timestamp >= markers_filter.start_date)
+    if markers_filter.end_date is not None:
+        conditions.append(table.c.accident_year <= markers_filter.end_date.year)
+        conditions.append(table.c.accident_timestamp < _day_after(markers_filter.end_date))
+    if markers_filter.severities:
+        conditions.append(table.c.accident_severity.in_(markers_filter.severities))
+    if markers_filter.provider_codes:
+        conditions.append(table.c.provider_code.in_(markers_filter.provider_codes))
+    limit = get_limit() if limit is None else min(limit, get_limit())
+    return select([table.c[name] for name in column_names]) \
+        .where(and_(*conditions)) \
+        .order_by(table.c.accident_severity, table.c.accident_timestamp.desc()) \
+        .limit(limit)
+
+
+def get_markers(markers_filter, limit=None):
+    """
+    :return: the filter's markers as dicts of the projected columns
+    """
+    return [dict(row) for row in db.session.execute(markers_query(markers_filter, limit))]
+
+
+def get_marker(marker_id, provider_code=None):
+    """
+    :return: the marker's detailed columns, None if there isn't such a marker
+    """
+    table = AccidentMarker.__table__
+    conditions = [table.c.id == marker_id]
+    if provider_code is not None:
+        conditions.append(table.c.provider_code == provider_code)
+    query = select([table.c[name] for name in DETAILED_COLUMNS]) \
+        .where(and_(*conditions)) \
+        .order_by(table.c.accident_year.desc(), table.c.provider_code) \
+        .limit(1)
+    row = db.session.execute(query).first()
+    return dict(row) if row is not None else None
@@ -4,6 +4,7 @@ from anyway import db
 from anyway.core.utils import Utils
 from anyway.core.constants import CONST
 from anyway.common.models.cbs_models import AccidentMarker
+from anyway.parsers import cbs_partitions
 
 from flask_restplus import Namespace, Resource, fields
 from openpyxl import load_workbook
@@ -76,6 +77,9 @@ class RSA(Resource):
     def parse(self, filename):
         if os.path.exists(filename):
             for batch in Utils.batch_iterator(self._iter_rows(filename), batch_size=50):
+                # cbs.markers is partitioned by accident_year, the CBS import creates only the years it loads
+                for year in set(row['accident_year'] for row in batch):
+                    cbs_partitions.create_year_partitions(year)
                 db.session.bulk_insert_mappings(AccidentMarker, batch)
                 db.session.commit()
 
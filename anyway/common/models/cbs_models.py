@@ -51,7 +51,8 @@ class MarkerMixin(Point):
 
 class AccidentMarker(MarkerMixin, CBSBase):
     __tablename__ = "markers"
-    __table_args__ = (Index('ix_cbs_accident_marker_geom', 'geom', postgresql_using='gist'),)
+    __table_args__ = (Index('ix_cbs_accident_marker_geom', 'geom', postgresql_using='gist'),
+                      {'postgresql_partition_by': 'LIST (accident_year)'})
 
     id = Column(BigInteger(), primary_key=True, index=True)
     provider_and_id = Column(BigInteger(), index=True)
@@ -94,6 +95,7 @@ class AccidentMarker(MarkerMixin, CBSBase):
     km = Column(Float())
     km_raw = Column(Text())
     km_accurate = Column(Boolean())
+    road_segment_id = Column(Integer(), index=True)
     yishuv_symbol = Column(Integer())
     yishuv_name = Column(Text())
     geo_area = Column(Integer())
@@ -135,7 +137,7 @@ class AccidentMarker(MarkerMixin, CBSBase):
 
 class Involved(CBSBase):
     __tablename__ = "involved"
-    id = Column(BigInteger(), primary_key=True)
+    id = Column(BigInteger(), primary_key=True, autoincrement=True)
     provider_and_id = Column(BigInteger(), index=True)
     provider_code = Column(Integer())
     file_type_police = Column(Integer())
@@ -164,13 +166,13 @@ class Involved(CBSBase):
     late_deceased = Column(Integer())
     car_id = Column(Integer())
     involve_id = Column(Integer())
-    accident_year = Column(Integer())
+    accident_year = Column(Integer(), primary_key=True)
     accident_month = Column(Integer())
     __table_args__ = (ForeignKeyConstraint([accident_id, provider_code, accident_year],
                                            [AccidentMarker.id, AccidentMarker.provider_code,
                                             AccidentMarker.accident_year],
                                            ondelete="CASCADE"),
-                      {})
+                      {'postgresql_partition_by': 'LIST (accident_year)'})
 
 
 class City(CBSBase):
@@ -205,7 +207,7 @@ class RegisteredVehicle(CBSBase):
 
 class Vehicle(CBSBase):
     __tablename__ = "vehicles"
-    id = Column(BigInteger(), primary_key=True)
+    id = Column(BigInteger(), primary_key=True, autoincrement=True)
     provider_and_id = Column(BigInteger(), index=True)
     provider_code = Column(Integer())
     file_type_police = Column(Integer())
@@ -219,14 +221,14 @@ class Vehicle(CBSBase):
     seats = Column(Integer())
     total_weight = Column(Integer())
     car_id = Column(Integer())
-    accident_year = Column(Integer())
+    accident_year = Column(Integer(), primary_key=True)
     accident_month = Column(Integer())
     vehicle_damage = Column(Integer())
     __table_args__ = (ForeignKeyConstraint([accident_id, provider_code, accident_year],
                                            [AccidentMarker.id, AccidentMarker.provider_code,
                                             AccidentMarker.accident_year],
                                            ondelete="CASCADE"),
-                      {})
+                      {'postgresql_partition_by': 'LIST (accident_year)'})
 
 
 class ColumnsDescription(CBSBase):
@@ -677,7 +679,7 @@ class VehicleDamage(CBSBase):
 class RoadSegments(CBSBase):
     __tablename__ = "road_segments"
     id = Column(Integer(), primary_key=True)
-    segment_id = Column(Integer())
+    segment_id = Column(Integer(), index=True)
     road = Column(Integer())
     segment = Column(Integer())
     from_km = Column(Float())
@@ -700,3 +702,30 @@ class TrafficVolume(CBSBase):
     volume = Column(Integer())
     status = Column(Integer())
     duplicate_count = Column(Integer())
+
+
+class CodeDictionary(CBSBase):
+    """
+    the entries of all the code tables in one table, a code table by its table_id - the lowest CBS dictionary
+    number (MS_TAVLA) it is filled from. the primary key index includes hebrew (added by its migration),
+    so the views' joins are index only scans.
+    """
+    __tablename__ = "code_dictionary"
+    table_id = Column(Integer(), primary_key=True)
+    id = Column(Integer(), primary_key=True)
+    year = Column(Integer(), primary_key=True)
+    provider_code = Column(Integer(), primary_key=True)
+    hebrew = Column(Text(), nullable=True)
+
+
+class ImportManifest(CBSBase):
+    __tablename__ = "import_manifest"
+    provider_code = Column(Integer(), primary_key=True)
+    year = Column(Integer(), primary_key=True)
+    directory = Column(Text(), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    file_hashes = Column(Text(), nullable=False)
+    markers_count = Column(Integer())
+    involved_count = Column(Integer())
+    vehicles_count = Column(Integer())
+    imported_at = Column(DateTime, default=datetime.datetime.now)
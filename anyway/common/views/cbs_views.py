@@ -5,58 +5,58 @@ class Views(object):
                                     cbs.provider_code.provider_code_hebrew,
                                     cbs.markers.file_type_police,
                                     cbs.markers.accident_type,
-                                    cbs.accident_type.accident_type_hebrew,
+                                    accident_type.hebrew AS accident_type_hebrew,
                                     cbs.markers.accident_severity,
-                                    cbs.accident_severity.accident_severity_hebrew,
+                                    accident_severity.hebrew AS accident_severity_hebrew,
                                     cbs.markers.accident_timestamp,
                                     cbs.markers.location_accuracy,
-                                    cbs.location_accuracy.location_accuracy_hebrew,
+                                    location_accuracy.hebrew AS location_accuracy_hebrew,
                                     cbs.markers.road_type,
-                                    cbs.road_type.road_type_hebrew,
+                                    road_type.hebrew AS road_type_hebrew,
                                     cbs.markers.road_shape,
-                                    cbs.road_shape.road_shape_hebrew,
+                                    road_shape.hebrew AS road_shape_hebrew,
                                     cbs.markers.day_type,
-                                    cbs.day_type.day_type_hebrew,
+                                    day_type.hebrew AS day_type_hebrew,
                                     cbs.markers.police_unit,
-                                    cbs.police_unit.police_unit_hebrew,
+                                    police_unit.hebrew AS police_unit_hebrew,
                                     cbs.markers.one_lane,
-                                    cbs.one_lane.one_lane_hebrew,
+                                    one_lane.hebrew AS one_lane_hebrew,
                                     cbs.markers.multi_lane,
-                                    cbs.multi_lane.multi_lane_hebrew,
+                                    multi_lane.hebrew AS multi_lane_hebrew,
                                     cbs.markers.speed_limit,
-                                    cbs.speed_limit.speed_limit_hebrew,
+                                    speed_limit.hebrew AS speed_limit_hebrew,
                                     cbs.markers.road_intactness,
-                                    cbs.road_intactness.road_intactness_hebrew,
+                                    road_intactness.hebrew AS road_intactness_hebrew,
                                     cbs.markers.road_width,
-                                    cbs.road_width.road_width_hebrew,
+                                    road_width.hebrew AS road_width_hebrew,
                                     cbs.markers.road_sign,
-                                    cbs.road_sign.road_sign_hebrew,
+                                    road_sign.hebrew AS road_sign_hebrew,
                                     cbs.markers.road_light,
-                                    cbs.road_light.road_light_hebrew,
+                                    road_light.hebrew AS road_light_hebrew,
                                     cbs.markers.road_control,
-                                    cbs.road_control.road_control_hebrew,
+                                    road_control.hebrew AS road_control_hebrew,
                                     cbs.markers.weather,
-                                    cbs.weather.weather_hebrew,
+                                    weather.hebrew AS weather_hebrew,
                                     cbs.markers.road_surface,
-                                    cbs.road_surface.road_surface_hebrew,
+                                    road_surface.hebrew AS road_surface_hebrew,
                                     cbs.markers.road_object,
-                                    cbs.road_object.road_object_hebrew,
+                                    road_object.hebrew AS road_object_hebrew,
                                     cbs.markers.object_distance,
-                                    cbs.object_distance.object_distance_hebrew,
+                                    object_distance.hebrew AS object_distance_hebrew,
                                     cbs.markers.didnt_cross,
-                                    cbs.didnt_cross.didnt_cross_hebrew,
+                                    didnt_cross.hebrew AS didnt_cross_hebrew,
                                     cbs.markers.cross_mode,
-                                    cbs.cross_mode.cross_mode_hebrew,
+                                    cross_mode.hebrew AS cross_mode_hebrew,
                                     cbs.markers.cross_location,
-                                    cbs.cross_location.cross_location_hebrew,
+                                    cross_location.hebrew AS cross_location_hebrew,
                                     cbs.markers.cross_direction,
-                                    cbs.cross_direction.cross_direction_hebrew,
+                                    cross_direction.hebrew AS cross_direction_hebrew,
                                     cbs.markers.road1,
                                     cbs.markers.road2,
                                     cbs.markers.km,
                                     cbs.markers.km_raw,
                                     cbs.markers.km_accurate,
-                                    cbs.road_segments.segment_id as road_segment_id,
+                                    cbs.markers.road_segment_id,
                                     cbs.road_segments.segment as road_segment_number,
                                     cbs.road_segments.from_name || ' - ' || cbs.road_segments.to_name as road_segment_name,
                                     cbs.road_segments.from_km as road_segment_from_km,
@@ -64,23 +64,23 @@ class Views(object):
                                     cbs.markers.yishuv_symbol,
                                     cbs.markers.yishuv_name,
                                     cbs.markers.geo_area,
-                                    cbs.geo_area.geo_area_hebrew,
+                                    geo_area.hebrew AS geo_area_hebrew,
                                     cbs.markers.day_night,
-                                    cbs.day_night.day_night_hebrew,
+                                    day_night.hebrew AS day_night_hebrew,
                                     cbs.markers.day_in_week,
-                                    cbs.day_in_week.day_in_week_hebrew,
+                                    day_in_week.hebrew AS day_in_week_hebrew,
                                     cbs.markers.traffic_light,
-                                    cbs.traffic_light.traffic_light_hebrew,
+                                    traffic_light.hebrew AS traffic_light_hebrew,
                                     cbs.markers.region,
-                                    cbs.region.region_hebrew,
+                                    region.hebrew AS region_hebrew,
                                     cbs.markers.district,
-                                    cbs.district.district_hebrew,
+                                    district.hebrew AS district_hebrew,
                                     cbs.markers.natural_area,
-                                    cbs.natural_area.natural_area_hebrew,
+                                    natural_area.hebrew AS natural_area_hebrew,
                                     cbs.markers.municipal_status,
-                                    cbs.municipal_status.municipal_status_hebrew,
+                                    municipal_status.hebrew AS municipal_status_hebrew,
                                     cbs.markers.yishuv_shape,
-                                    cbs.yishuv_shape.yishuv_shape_hebrew,
+                                    yishuv_shape.hebrew AS yishuv_shape_hebrew,
                                     cbs.markers.street1,
                                     cbs.markers.street1_hebrew,
                                     cbs.markers.street2,
@@ -93,7 +93,7 @@ class Views(object):
                                     cbs.markers.accident_month,
                                     cbs.markers.accident_day,
                                     cbs.markers.accident_hour_raw,
-                                    cbs.accident_hour_raw.accident_hour_raw_hebrew,
+                                    accident_hour_raw.hebrew AS accident_hour_raw_hebrew,
                                     cbs.markers.accident_hour,
                                     cbs.markers.accident_minute,
                                     cbs.markers.geom,
@@ -102,40 +102,40 @@ class Views(object):
                                     cbs.markers.x,
                                     cbs.markers.y
                                    FROM cbs.markers
-                                     LEFT JOIN cbs.road_segments on (cbs.markers.road1 = cbs.road_segments.road) and (cbs.markers.km / 10 between cbs.road_segments.from_km and cbs.road_segments.to_km)
-                                     LEFT JOIN cbs.accident_type ON cbs.markers.accident_type = cbs.accident_type.id AND cbs.markers.accident_year = cbs.accident_type.year AND cbs.markers.provider_code = cbs.accident_type.provider_code
-                                     LEFT JOIN cbs.accident_severity ON cbs.markers.accident_severity = cbs.accident_severity.id AND cbs.markers.accident_year = cbs.accident_severity.year AND cbs.markers.provider_code = cbs.accident_severity.provider_code
-                                     LEFT JOIN cbs.location_accuracy ON cbs.markers.location_accuracy = cbs.location_accuracy.id AND cbs.markers.accident_year = cbs.location_accuracy.year AND cbs.markers.provider_code = cbs.location_accuracy.provider_code
-                                     LEFT JOIN cbs.road_type ON cbs.markers.road_type = cbs.road_type.id AND cbs.markers.accident_year = cbs.road_type.year AND cbs.markers.provider_code = cbs.road_type.provider_code
-                                     LEFT JOIN cbs.road_shape ON cbs.markers.road_shape = cbs.road_shape.id AND cbs.markers.accident_year = cbs.road_shape.year AND cbs.markers.provider_code = cbs.road_shape.provider_code
-                                     LEFT JOIN cbs.day_type ON cbs.markers.day_type = cbs.day_type.id AND cbs.markers.accident_year = cbs.day_type.year AND cbs.markers.provider_code = cbs.day_type.provider_code
-                                     LEFT JOIN cbs.police_unit ON cbs.markers.police_unit = cbs.police_unit.id AND cbs.markers.accident_year = cbs.police_unit.year AND cbs.markers.provider_code = cbs.police_unit.provider_code
-                                     LEFT JOIN cbs.one_lane ON cbs.markers.one_lane = cbs.one_lane.id  AND cbs.markers.accident_year = cbs.one_lane.year AND cbs.markers.provider_code = cbs.one_lane.provider_code
-                                     LEFT JOIN cbs.multi_lane ON cbs.markers.multi_lane = cbs.multi_lane.id AND cbs.markers.accident_year = cbs.multi_lane.year AND cbs.markers.provider_code = cbs.multi_lane.provider_code
-                                     LEFT JOIN cbs.speed_limit ON cbs.markers.speed_limit = cbs.speed_limit.id AND cbs.markers.accident_year = cbs.speed_limit.year AND cbs.markers.provider_code = cbs.speed_limit.provider_code
-                                     LEFT JOIN cbs.road_intactness ON cbs.markers.road_intactness = cbs.road_intactness.id AND cbs.markers.accident_year = cbs.road_intactness.year AND cbs.markers.provider_code = cbs.road_intactness.provider_code
-                                     LEFT JOIN cbs.road_width ON cbs.markers.road_width = cbs.road_width.id AND cbs.markers.accident_year = cbs.road_width.year AND cbs.markers.provider_code = cbs.road_width.provider_code
-                                     LEFT JOIN cbs.road_sign ON cbs.markers.road_sign = cbs.road_sign.id AND cbs.markers.accident_year = cbs.road_sign.year AND cbs.markers.provider_code = cbs.road_sign.provider_code
-                                     LEFT JOIN cbs.road_light ON cbs.markers.road_light = cbs.road_light.id AND cbs.markers.accident_year = cbs.road_light.year AND cbs.markers.provider_code = cbs.road_light.provider_code
-                                     LEFT JOIN cbs.road_control ON cbs.markers.road_control = cbs.road_control.id AND cbs.markers.accident_year = cbs.road_control.year AND cbs.markers.provider_code = cbs.road_control.provider_code
-                                     LEFT JOIN cbs.weather ON cbs.markers.weather = cbs.weather.id AND cbs.markers.accident_year = cbs.weather.year AND cbs.markers.provider_code = cbs.weather.provider_code
-                                     LEFT JOIN cbs.road_surface ON cbs.markers.road_surface = cbs.road_surface.id AND cbs.markers.accident_year = cbs.road_surface.year AND cbs.markers.provider_code = cbs.road_surface.provider_code
-                                     LEFT JOIN cbs.road_object ON cbs.markers.road_object = cbs.road_object.id AND cbs.markers.accident_year = cbs.road_object.year AND cbs.markers.provider_code = cbs.road_object.provider_code
-                                     LEFT JOIN cbs.object_distance ON cbs.markers.object_distance = cbs.object_distance.id AND cbs.markers.accident_year = cbs.object_distance.year AND cbs.markers.provider_code = cbs.object_distance.provider_code
-                                     LEFT JOIN cbs.didnt_cross ON cbs.markers.didnt_cross = cbs.didnt_cross.id AND cbs.markers.accident_year = cbs.didnt_cross.year AND cbs.markers.provider_code = cbs.didnt_cross.provider_code
-                                     LEFT JOIN cbs.cross_mode ON cbs.markers.cross_mode = cbs.cross_mode.id AND cbs.markers.accident_year = cbs.cross_mode.year AND cbs.markers.provider_code = cbs.cross_mode.provider_code
-                                     LEFT JOIN cbs.cross_location ON cbs.markers.cross_location = cbs.cross_location.id AND cbs.markers.accident_year = cbs.cross_location.year AND cbs.markers.provider_code = cbs.cross_location.provider_code
-                                     LEFT JOIN cbs.cross_direction ON cbs.markers.cross_direction = cbs.cross_direction.id AND cbs.markers.accident_year = cbs.cross_direction.year AND cbs.markers.provider_code = cbs.cross_direction.provider_code
-                                     LEFT JOIN cbs.geo_area ON cbs.markers.geo_area = cbs.geo_area.id AND cbs.markers.accident_year = cbs.geo_area.year AND cbs.markers.provider_code = cbs.geo_area.provider_code
-                                     LEFT JOIN cbs.day_night ON cbs.markers.day_night = cbs.day_night.id AND cbs.markers.accident_year = cbs.day_night.year AND cbs.markers.provider_code = cbs.day_night.provider_code
-                                     LEFT JOIN cbs.day_in_week ON cbs.markers.day_in_week = cbs.day_in_week.id AND cbs.markers.accident_year = cbs.day_in_week.year AND cbs.markers.provider_code = cbs.day_in_week.provider_code
-                                     LEFT JOIN cbs.traffic_light ON cbs.markers.traffic_light = traffic_light.id AND cbs.markers.accident_year = traffic_light.year AND cbs.markers.provider_code = traffic_light.provider_code
-                                     LEFT JOIN cbs.region ON cbs.markers.region = cbs.region.id AND cbs.markers.accident_year = cbs.region.year AND cbs.markers.provider_code = cbs.region.provider_code
-                                     LEFT JOIN cbs.district ON cbs.markers.district = cbs.district.id AND cbs.markers.accident_year = cbs.district.year AND cbs.markers.provider_code = cbs.district.provider_code
-                                     LEFT JOIN cbs.natural_area ON cbs.markers.natural_area = cbs.natural_area.id AND cbs.markers.accident_year = cbs.natural_area.year AND cbs.markers.provider_code = cbs.natural_area.provider_code
-                                     LEFT JOIN cbs.municipal_status ON cbs.markers.municipal_status = cbs.municipal_status.id AND cbs.markers.accident_year = cbs.municipal_status.year AND cbs.markers.provider_code = cbs.municipal_status.provider_code
-                                     LEFT JOIN cbs.yishuv_shape ON cbs.markers.yishuv_shape = cbs.yishuv_shape.id AND cbs.markers.accident_year = cbs.yishuv_shape.year AND cbs.markers.provider_code = cbs.yishuv_shape.provider_code
-                                     LEFT JOIN cbs.accident_hour_raw ON cbs.markers.accident_hour_raw = cbs.accident_hour_raw.id AND cbs.markers.accident_year = cbs.accident_hour_raw.year AND cbs.markers.provider_code = cbs.accident_hour_raw.provider_code
+                                     LEFT JOIN cbs.road_segments ON cbs.markers.road_segment_id = cbs.road_segments.segment_id
+                                     LEFT JOIN cbs.code_dictionary AS accident_type ON accident_type.table_id = 5 AND cbs.markers.accident_type = accident_type.id AND cbs.markers.accident_year = accident_type.year AND cbs.markers.provider_code = accident_type.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS accident_severity ON accident_severity.table_id = 4 AND cbs.markers.accident_severity = accident_severity.id AND cbs.markers.accident_year = accident_severity.year AND cbs.markers.provider_code = accident_severity.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS location_accuracy ON location_accuracy.table_id = 205 AND cbs.markers.location_accuracy = location_accuracy.id AND cbs.markers.accident_year = location_accuracy.year AND cbs.markers.provider_code = location_accuracy.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_type ON road_type.table_id = 2 AND cbs.markers.road_type = road_type.id AND cbs.markers.accident_year = road_type.year AND cbs.markers.provider_code = road_type.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_shape ON road_shape.table_id = 9 AND cbs.markers.road_shape = road_shape.id AND cbs.markers.accident_year = road_shape.year AND cbs.markers.provider_code = road_shape.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS day_type ON day_type.table_id = 37 AND cbs.markers.day_type = day_type.id AND cbs.markers.accident_year = day_type.year AND cbs.markers.provider_code = day_type.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS police_unit ON police_unit.table_id = 1 AND cbs.markers.police_unit = police_unit.id AND cbs.markers.accident_year = police_unit.year AND cbs.markers.provider_code = police_unit.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS one_lane ON one_lane.table_id = 10 AND cbs.markers.one_lane = one_lane.id AND cbs.markers.accident_year = one_lane.year AND cbs.markers.provider_code = one_lane.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS multi_lane ON multi_lane.table_id = 11 AND cbs.markers.multi_lane = multi_lane.id AND cbs.markers.accident_year = multi_lane.year AND cbs.markers.provider_code = multi_lane.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS speed_limit ON speed_limit.table_id = 12 AND cbs.markers.speed_limit = speed_limit.id AND cbs.markers.accident_year = speed_limit.year AND cbs.markers.provider_code = speed_limit.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_intactness ON road_intactness.table_id = 13 AND cbs.markers.road_intactness = road_intactness.id AND cbs.markers.accident_year = road_intactness.year AND cbs.markers.provider_code = road_intactness.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_width ON road_width.table_id = 14 AND cbs.markers.road_width = road_width.id AND cbs.markers.accident_year = road_width.year AND cbs.markers.provider_code = road_width.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_sign ON road_sign.table_id = 15 AND cbs.markers.road_sign = road_sign.id AND cbs.markers.accident_year = road_sign.year AND cbs.markers.provider_code = road_sign.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_light ON road_light.table_id = 16 AND cbs.markers.road_light = road_light.id AND cbs.markers.accident_year = road_light.year AND cbs.markers.provider_code = road_light.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_control ON road_control.table_id = 17 AND cbs.markers.road_control = road_control.id AND cbs.markers.accident_year = road_control.year AND cbs.markers.provider_code = road_control.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS weather ON weather.table_id = 18 AND cbs.markers.weather = weather.id AND cbs.markers.accident_year = weather.year AND cbs.markers.provider_code = weather.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_surface ON road_surface.table_id = 19 AND cbs.markers.road_surface = road_surface.id AND cbs.markers.accident_year = road_surface.year AND cbs.markers.provider_code = road_surface.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS road_object ON road_object.table_id = 21 AND cbs.markers.road_object = road_object.id AND cbs.markers.accident_year = road_object.year AND cbs.markers.provider_code = road_object.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS object_distance ON object_distance.table_id = 22 AND cbs.markers.object_distance = object_distance.id AND cbs.markers.accident_year = object_distance.year AND cbs.markers.provider_code = object_distance.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS didnt_cross ON didnt_cross.table_id = 23 AND cbs.markers.didnt_cross = didnt_cross.id AND cbs.markers.accident_year = didnt_cross.year AND cbs.markers.provider_code = didnt_cross.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS cross_mode ON cross_mode.table_id = 24 AND cbs.markers.cross_mode = cross_mode.id AND cbs.markers.accident_year = cross_mode.year AND cbs.markers.provider_code = cross_mode.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS cross_location ON cross_location.table_id = 25 AND cbs.markers.cross_location = cross_location.id AND cbs.markers.accident_year = cross_location.year AND cbs.markers.provider_code = cross_location.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS cross_direction ON cross_direction.table_id = 26 AND cbs.markers.cross_direction = cross_direction.id AND cbs.markers.accident_year = cross_direction.year AND cbs.markers.provider_code = cross_direction.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS geo_area ON geo_area.table_id = 68 AND cbs.markers.geo_area = geo_area.id AND cbs.markers.accident_year = geo_area.year AND cbs.markers.provider_code = geo_area.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS day_night ON day_night.table_id = 38 AND cbs.markers.day_night = day_night.id AND cbs.markers.accident_year = day_night.year AND cbs.markers.provider_code = day_night.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS day_in_week ON day_in_week.table_id = 39 AND cbs.markers.day_in_week = day_in_week.id AND cbs.markers.accident_year = day_in_week.year AND cbs.markers.provider_code = day_in_week.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS traffic_light ON traffic_light.table_id = 40 AND cbs.markers.traffic_light = traffic_light.id AND cbs.markers.accident_year = traffic_light.year AND cbs.markers.provider_code = traffic_light.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS region ON region.table_id = 77 AND cbs.markers.region = region.id AND cbs.markers.accident_year = region.year AND cbs.markers.provider_code = region.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS district ON district.table_id = 79 AND cbs.markers.district = district.id AND cbs.markers.accident_year = district.year AND cbs.markers.provider_code = district.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS natural_area ON natural_area.table_id = 80 AND cbs.markers.natural_area = natural_area.id AND cbs.markers.accident_year = natural_area.year AND cbs.markers.provider_code = natural_area.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS municipal_status ON municipal_status.table_id = 78 AND cbs.markers.municipal_status = municipal_status.id AND cbs.markers.accident_year = municipal_status.year AND cbs.markers.provider_code = municipal_status.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS yishuv_shape ON yishuv_shape.table_id = 81 AND cbs.markers.yishuv_shape = yishuv_shape.id AND cbs.markers.accident_year = yishuv_shape.year AND cbs.markers.provider_code = yishuv_shape.provider_code
+                                     LEFT JOIN cbs.code_dictionary AS accident_hour_raw ON accident_hour_raw.table_id = 93 AND cbs.markers.accident_hour_raw = accident_hour_raw.id AND cbs.markers.accident_year = accident_hour_raw.year AND cbs.markers.provider_code = accident_hour_raw.provider_code
                                      LEFT JOIN cbs.provider_code ON cbs.markers.provider_code = cbs.provider_code.id;"""
 
     INVOLVED_HEBREW_VIEW = """SELECT
@@ -144,70 +144,70 @@ class Views(object):
     cbs.involved.provider_code,
     cbs.involved.file_type_police,
     cbs.involved.involved_type,
-    cbs.involved_type.involved_type_hebrew,
+    involved_type.hebrew AS involved_type_hebrew,
     cbs.involved.license_acquiring_date,
     cbs.involved.age_group,
-    cbs.age_group.age_group_hebrew,
+    age_group.hebrew AS age_group_hebrew,
     cbs.involved.sex,
-    cbs.sex.sex_hebrew,
+    sex.hebrew AS sex_hebrew,
     cbs.involved.vehicle_type,
-    cbs.vehicle_type.vehicle_type_hebrew,
+    vehicle_type.hebrew AS vehicle_type_hebrew,
     cbs.involved.safety_measures,
-    cbs.safety_measures.safety_measures_hebrew,
+    safety_measures.hebrew AS safety_measures_hebrew,
     cbs.involved.involve_yishuv_symbol,
     cbs.involved.involve_yishuv_name,
     cbs.involved.injury_severity,
-    cbs.injury_severity.injury_severity_hebrew,
+    injury_severity.hebrew AS injury_severity_hebrew,
     cbs.involved.injured_type,
-    cbs.injured_type.injured_type_hebrew,
+    injured_type.hebrew AS injured_type_hebrew,
     cbs.involved.injured_position,
-    cbs.injured_position.injured_position_hebrew,
+    injured_position.hebrew AS injured_position_hebrew,
     cbs.involved.population_type,
-    cbs.population_type.population_type_hebrew,
+    population_type.hebrew AS population_type_hebrew,
     cbs.involved.home_region,
-    cbs.region.region_hebrew as home_region_hebrew,
+    region.hebrew as home_region_hebrew,
     cbs.involved.home_district,
-    cbs.district.district_hebrew AS home_district_hebrew,
+    district.hebrew AS home_district_hebrew,
     cbs.involved.home_natural_area,
-    cbs.natural_area.natural_area_hebrew AS home_natural_area_hebrew,
+    natural_area.hebrew AS home_natural_area_hebrew,
     cbs.involved.home_municipal_status,
-    cbs.municipal_status.municipal_status_hebrew as home_municipal_status_hebrew,
+    municipal_status.hebrew as home_municipal_status_hebrew,
     cbs.involved.home_yishuv_shape,
-    cbs.yishuv_shape.yishuv_shape_hebrew AS home_yishuv_shape_hebrew,
+    yishuv_shape.hebrew AS home_yishuv_shape_hebrew,
     cbs.involved.hospital_time,
-    cbs.hospital_time.hospital_time_hebrew,
+    hospital_time.hebrew AS hospital_time_hebrew,
     cbs.involved.medical_type,
-    cbs.medical_type.medical_type_hebrew,
+    medical_type.hebrew AS medical_type_hebrew,
     cbs.involved.release_dest,
-    cbs.release_dest.release_dest_hebrew,
+    release_dest.hebrew AS release_dest_hebrew,
     cbs.involved.safety_measures_use,
-    cbs.safety_measures_use.safety_measures_use_hebrew,
+    safety_measures_use.hebrew AS safety_measures_use_hebrew,
     cbs.involved.late_deceased,
-    cbs.late_deceased.late_deceased_hebrew,
+    late_deceased.hebrew AS late_deceased_hebrew,
     cbs.involved.car_id,
     cbs.involved.involve_id,
     cbs.involved.accident_year,
     cbs.involved.accident_month
    FROM cbs.involved
-     LEFT JOIN cbs.involved_type ON cbs.involved.involved_type = cbs.involved_type.id AND cbs.involved.accident_year = cbs.involved_type.year AND cbs.involved.provider_code = cbs.involved_type.provider_code
-     LEFT JOIN cbs.age_group ON cbs.involved.age_group = cbs.age_group.id  AND cbs.involved.accident_year = cbs.age_group.year AND cbs.involved.provider_code = cbs.age_group.provider_code
-     LEFT JOIN cbs.sex ON cbs.involved.sex = cbs.sex.id AND cbs.involved.accident_year = cbs.sex.year AND cbs.involved.provider_code = cbs.sex.provider_code
-     LEFT JOIN cbs.vehicle_type ON cbs.involved.vehicle_type = cbs.vehicle_type.id AND cbs.involved.accident_year = cbs.vehicle_type.year AND cbs.involved.provider_code = cbs.vehicle_type.provider_code
-     LEFT JOIN cbs.safety_measures ON cbs.involved.safety_measures = cbs.safety_measures.id AND cbs.involved.accident_year = cbs.safety_measures.year AND cbs.involved.provider_code = cbs.safety_measures.provider_code
-     LEFT JOIN cbs.injury_severity ON cbs.involved.injury_severity = cbs.injury_severity.id AND cbs.involved.accident_year = cbs.injury_severity.year AND cbs.involved.provider_code = cbs.injury_severity.provider_code
-     LEFT JOIN cbs.injured_type ON cbs.involved.injured_type = cbs.injured_type.id AND cbs.involved.accident_year = cbs.injured_type.year AND cbs.involved.provider_code = cbs.injured_type.provider_code
-     LEFT JOIN cbs.injured_position ON cbs.involved.injured_position = cbs.injured_position.id AND cbs.involved.accident_year = cbs.injured_position.year AND cbs.involved.provider_code = cbs.injured_position.provider_code
-     LEFT JOIN cbs.population_type ON cbs.involved.population_type = cbs.population_type.id AND cbs.involved.accident_year = cbs.population_type.year AND cbs.involved.provider_code = cbs.population_type.provider_code
-     LEFT JOIN cbs.region ON cbs.involved.home_region = cbs.region.id AND cbs.involved.accident_year = cbs.region.year AND cbs.involved.provider_code = cbs.region.provider_code
-     LEFT JOIN cbs.district ON cbs.involved.home_district = cbs.district.id AND cbs.involved.accident_year = cbs.district.year AND cbs.involved.provider_code = cbs.district.provider_code
-     LEFT JOIN cbs.natural_area ON cbs.involved.home_natural_area = cbs.natural_area.id AND cbs.involved.accident_year = cbs.natural_area.year AND cbs.involved.provider_code = cbs.natural_area.provider_code
-     LEFT JOIN cbs.municipal_status ON cbs.involved.home_municipal_status = cbs.municipal_status.id AND cbs.involved.accident_year = cbs.municipal_status.year AND cbs.involved.provider_code = cbs.municipal_status.provider_code
-     LEFT JOIN cbs.yishuv_shape ON cbs.involved.home_yishuv_shape = cbs.yishuv_shape.id AND cbs.involved.accident_year = cbs.yishuv_shape.year AND cbs.involved.provider_code = cbs.yishuv_shape.provider_code
-     LEFT JOIN cbs.hospital_time ON cbs.involved.hospital_time = cbs.hospital_time.id AND cbs.involved.accident_year = cbs.hospital_time.year AND cbs.involved.provider_code = cbs.hospital_time.provider_code
-     LEFT JOIN cbs.medical_type ON cbs.involved.medical_type = cbs.medical_type.id AND cbs.involved.accident_year = cbs.medical_type.year AND cbs.involved.provider_code = cbs.medical_type.provider_code
-     LEFT JOIN cbs.release_dest ON cbs.involved.release_dest = cbs.release_dest.id AND cbs.involved.accident_year = cbs.release_dest.year AND cbs.involved.provider_code = cbs.release_dest.provider_code
-     LEFT JOIN cbs.safety_measures_use ON cbs.involved.safety_measures_use = cbs.safety_measures_use.id AND cbs.involved.accident_year = cbs.safety_measures_use.year AND cbs.involved.provider_code = cbs.safety_measures_use.provider_code
-     LEFT JOIN cbs.late_deceased ON cbs.involved.late_deceased = cbs.late_deceased.id AND cbs.involved.accident_year = cbs.late_deceased.year AND cbs.involved.provider_code = cbs.late_deceased.provider_code;"""
+     LEFT JOIN cbs.code_dictionary AS involved_type ON involved_type.table_id = 31 AND cbs.involved.involved_type = involved_type.id AND cbs.involved.accident_year = involved_type.year AND cbs.involved.provider_code = involved_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS age_group ON age_group.table_id = 92 AND cbs.involved.age_group = age_group.id AND cbs.involved.accident_year = age_group.year AND cbs.involved.provider_code = age_group.provider_code
+     LEFT JOIN cbs.code_dictionary AS sex ON sex.table_id = 67 AND cbs.involved.sex = sex.id AND cbs.involved.accident_year = sex.year AND cbs.involved.provider_code = sex.provider_code
+     LEFT JOIN cbs.code_dictionary AS vehicle_type ON vehicle_type.table_id = 45 AND cbs.involved.vehicle_type = vehicle_type.id AND cbs.involved.accident_year = vehicle_type.year AND cbs.involved.provider_code = vehicle_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS safety_measures ON safety_measures.table_id = 34 AND cbs.involved.safety_measures = safety_measures.id AND cbs.involved.accident_year = safety_measures.year AND cbs.involved.provider_code = safety_measures.provider_code
+     LEFT JOIN cbs.code_dictionary AS injury_severity ON injury_severity.table_id = 35 AND cbs.involved.injury_severity = injury_severity.id AND cbs.involved.accident_year = injury_severity.year AND cbs.involved.provider_code = injury_severity.provider_code
+     LEFT JOIN cbs.code_dictionary AS injured_type ON injured_type.table_id = 50 AND cbs.involved.injured_type = injured_type.id AND cbs.involved.accident_year = injured_type.year AND cbs.involved.provider_code = injured_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS injured_position ON injured_position.table_id = 52 AND cbs.involved.injured_position = injured_position.id AND cbs.involved.accident_year = injured_position.year AND cbs.involved.provider_code = injured_position.provider_code
+     LEFT JOIN cbs.code_dictionary AS population_type ON population_type.table_id = 66 AND cbs.involved.population_type = population_type.id AND cbs.involved.accident_year = population_type.year AND cbs.involved.provider_code = population_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS region ON region.table_id = 77 AND cbs.involved.home_region = region.id AND cbs.involved.accident_year = region.year AND cbs.involved.provider_code = region.provider_code
+     LEFT JOIN cbs.code_dictionary AS district ON district.table_id = 79 AND cbs.involved.home_district = district.id AND cbs.involved.accident_year = district.year AND cbs.involved.provider_code = district.provider_code
+     LEFT JOIN cbs.code_dictionary AS natural_area ON natural_area.table_id = 80 AND cbs.involved.home_natural_area = natural_area.id AND cbs.involved.accident_year = natural_area.year AND cbs.involved.provider_code = natural_area.provider_code
+     LEFT JOIN cbs.code_dictionary AS municipal_status ON municipal_status.table_id = 78 AND cbs.involved.home_municipal_status = municipal_status.id AND cbs.involved.accident_year = municipal_status.year AND cbs.involved.provider_code = municipal_status.provider_code
+     LEFT JOIN cbs.code_dictionary AS yishuv_shape ON yishuv_shape.table_id = 81 AND cbs.involved.home_yishuv_shape = yishuv_shape.id AND cbs.involved.accident_year = yishuv_shape.year AND cbs.involved.provider_code = yishuv_shape.provider_code
+     LEFT JOIN cbs.code_dictionary AS hospital_time ON hospital_time.table_id = 200 AND cbs.involved.hospital_time = hospital_time.id AND cbs.involved.accident_year = hospital_time.year AND cbs.involved.provider_code = hospital_time.provider_code
+     LEFT JOIN cbs.code_dictionary AS medical_type ON medical_type.table_id = 201 AND cbs.involved.medical_type = medical_type.id AND cbs.involved.accident_year = medical_type.year AND cbs.involved.provider_code = medical_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS release_dest ON release_dest.table_id = 202 AND cbs.involved.release_dest = release_dest.id AND cbs.involved.accident_year = release_dest.year AND cbs.involved.provider_code = release_dest.provider_code
+     LEFT JOIN cbs.code_dictionary AS safety_measures_use ON safety_measures_use.table_id = 203 AND cbs.involved.safety_measures_use = safety_measures_use.id AND cbs.involved.accident_year = safety_measures_use.year AND cbs.involved.provider_code = safety_measures_use.provider_code
+     LEFT JOIN cbs.code_dictionary AS late_deceased ON late_deceased.table_id = 204 AND cbs.involved.late_deceased = late_deceased.id AND cbs.involved.accident_year = late_deceased.year AND cbs.involved.provider_code = late_deceased.provider_code;"""
 
     VEHICLES_HEBREW_VIEW = """ SELECT
     cbs.vehicles.id,
@@ -215,31 +215,32 @@ class Views(object):
     cbs.vehicles.provider_and_id,
     cbs.vehicles.provider_code,
     cbs.vehicles.engine_volume,
-    cbs.engine_volume.engine_volume_hebrew,
+    engine_volume.hebrew AS engine_volume_hebrew,
     cbs.vehicles.manufacturing_year,
     cbs.vehicles.driving_directions,
-    cbs.driving_directions.driving_directions_hebrew,
+    driving_directions.hebrew AS driving_directions_hebrew,
     cbs.vehicles.vehicle_status,
-    cbs.vehicle_status.vehicle_status_hebrew,
+    vehicle_status.hebrew AS vehicle_status_hebrew,
     cbs.vehicles.vehicle_attribution,
-    cbs.vehicle_attribution.vehicle_attribution_hebrew,
+    vehicle_attribution.hebrew AS vehicle_attribution_hebrew,
     cbs.vehicles.seats,
     cbs.vehicles.total_weight,
-    cbs.total_weight.total_weight_hebrew,
+    total_weight.hebrew AS total_weight_hebrew,
     cbs.vehicles.vehicle_type,
-    cbs.vehicle_type.vehicle_type_hebrew,
+    vehicle_type.hebrew AS vehicle_type_hebrew,
     cbs.vehicles.vehicle_damage,
-    cbs.vehicle_damage.vehicle_damage_hebrew,
+    vehicle_damage.hebrew AS vehicle_damage_hebrew,
+    cbs.vehicles.car_id,
     cbs.vehicles.accident_year,
     cbs.vehicles.accident_month
    FROM cbs.vehicles
-     LEFT JOIN cbs.engine_volume ON cbs.vehicles.engine_volume = cbs.engine_volume.id AND cbs.vehicles.accident_year = cbs.engine_volume.year AND cbs.vehicles.provider_code = cbs.engine_volume.provider_code
-     LEFT JOIN cbs.driving_directions ON cbs.vehicles.driving_directions = cbs.driving_directions.id AND cbs.vehicles.accident_year = cbs.driving_directions.year AND cbs.vehicles.provider_code = cbs.driving_directions.provider_code
-     LEFT JOIN cbs.vehicle_status ON cbs.vehicles.vehicle_status = cbs.vehicle_status.id AND cbs.vehicles.accident_year = cbs.vehicle_status.year AND cbs.vehicles.provider_code = cbs.vehicle_status.provider_code
-     LEFT JOIN cbs.vehicle_attribution ON cbs.vehicles.vehicle_attribution = cbs.vehicle_attribution.id AND cbs.vehicles.accident_year = cbs.vehicle_attribution.year AND cbs.vehicles.provider_code = cbs.vehicle_attribution.provider_code
-     LEFT JOIN cbs.total_weight ON cbs.vehicles.total_weight = cbs.total_weight.id AND cbs.vehicles.accident_year = cbs.total_weight.year AND cbs.vehicles.provider_code = cbs.total_weight.provider_code
-     LEFT JOIN cbs.vehicle_type ON cbs.vehicles.vehicle_type = cbs.vehicle_type.id AND cbs.vehicles.accident_year = cbs.vehicle_type.year AND cbs.vehicles.provider_code = cbs.vehicle_type.provider_code
-     LEFT JOIN cbs.vehicle_damage ON cbs.vehicles.vehicle_damage = cbs.vehicle_damage.id AND cbs.vehicles.accident_year = cbs.vehicle_damage.year AND cbs.vehicles.provider_code = cbs.vehicle_damage.provider_code;"""
+     LEFT JOIN cbs.code_dictionary AS engine_volume ON engine_volume.table_id = 111 AND cbs.vehicles.engine_volume = engine_volume.id AND cbs.vehicles.accident_year = engine_volume.year AND cbs.vehicles.provider_code = engine_volume.provider_code
+     LEFT JOIN cbs.code_dictionary AS driving_directions ON driving_directions.table_id = 28 AND cbs.vehicles.driving_directions = driving_directions.id AND cbs.vehicles.accident_year = driving_directions.year AND cbs.vehicles.provider_code = driving_directions.provider_code
+     LEFT JOIN cbs.code_dictionary AS vehicle_status ON vehicle_status.table_id = 30 AND cbs.vehicles.vehicle_status = vehicle_status.id AND cbs.vehicles.accident_year = vehicle_status.year AND cbs.vehicles.provider_code = vehicle_status.provider_code
+     LEFT JOIN cbs.code_dictionary AS vehicle_attribution ON vehicle_attribution.table_id = 43 AND cbs.vehicles.vehicle_attribution = vehicle_attribution.id AND cbs.vehicles.accident_year = vehicle_attribution.year AND cbs.vehicles.provider_code = vehicle_attribution.provider_code
+     LEFT JOIN cbs.code_dictionary AS total_weight ON total_weight.table_id = 112 AND cbs.vehicles.total_weight = total_weight.id AND cbs.vehicles.accident_year = total_weight.year AND cbs.vehicles.provider_code = total_weight.provider_code
+     LEFT JOIN cbs.code_dictionary AS vehicle_type ON vehicle_type.table_id = 45 AND cbs.vehicles.vehicle_type = vehicle_type.id AND cbs.vehicles.accident_year = vehicle_type.year AND cbs.vehicles.provider_code = vehicle_type.provider_code
+     LEFT JOIN cbs.code_dictionary AS vehicle_damage ON vehicle_damage.table_id = 229 AND cbs.vehicles.vehicle_damage = vehicle_damage.id AND cbs.vehicles.accident_year = vehicle_damage.year AND cbs.vehicles.provider_code = vehicle_damage.provider_code;"""
 
     INVOLVED_MARKERS_VEHICLES_HEBREW_VIEW = """SELECT
     cbs.involved_hebrew.accident_id,
@@ -0,0 +1,184 @@
+import functools
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import event
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+_round_trips = [0]
+_current_directory = [None]
+_instrumented_engines = set()
+
+
+def count_round_trip(count=1):
+    """
+    counts database round trips that don't go through SQLAlchemy's cursor execution, like COPY
+    """
+    _round_trips[0] += count
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    count_round_trip()
+
+
+def instrument_engine(engine):
+    """
+    counts every statement the engine sends, executemany included as one round trip
+    """
+    if id(engine) not in _instrumented_engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        _instrumented_engines.add(id(engine))
+
+
+def peak_rss_mb():
+    """
+    :return: the peak resident memory of the process so far, in MB, or None if it can't be measured
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on mac
+    return round(peak / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0), 1)
+
+
+class ImportReport(object):
+    """
+    the stages records of an import - wall time, rows, rows/sec, database round trips and peak RSS
+    of every stage run, per directory
+    """
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.records = []
+
+    def add(self, record):
+        self.records.append(record)
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def pop_records(self):
+        """
+        :return: the records so far, which are removed from the report
+        """
+        records, self.records = self.records, []
+        return records
+
+    def totals(self):
+        """
+        :return: {stage: totals of all the stage runs}, in the stages first run order
+        """
+        totals = OrderedDict()
+        for record in self.records:
+            total = totals.setdefault(record['stage'], OrderedDict([('runs', 0),
+                                                                    ('rows', 0),
+                                                                    ('seconds', 0.0),
+                                                                    ('rows_per_second', None),
+                                                                    ('round_trips', 0),
+                                                                    ('peak_rss_mb', None),
+                                                                    ('failed', 0)]))
+            total['runs'] += 1
+            total['rows'] += record['rows'] or 0
+            total['seconds'] = round(total['seconds'] + record['seconds'], 3)
+            total['round_trips'] += record['round_trips']
+            total['failed'] += int(record['failed'])
+            if record['peak_rss_mb'] is not None:
+                total['peak_rss_mb'] = max(total['peak_rss_mb'] or 0, record['peak_rss_mb'])
+        for total in totals.values():
+            if total['rows'] and total['seconds']:
+                total['rows_per_second'] = round(total['rows'] / total['seconds'], 1)
+        return totals
+
+    def to_dict(self):
+        return OrderedDict([('started', self.started.isoformat()),
+                            ('finished', datetime.now().isoformat()),
+                            ('totals', self.totals()),
+                            ('stages', self.records)])
+
+    def write_json(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logging.info('Wrote the import report to {0}'.format(file_path))
+
+    def summary_table(self):
+        columns = ('stage', 'runs', 'rows', 'seconds', 'rows_per_second', 'round_trips', 'peak_rss_mb', 'failed')
+        rows = [[stage] + [u'' if total[column] is None else str(total[column]) for column in columns[1:]]
+                for stage, total in self.totals().items()]
+        widths = [max(len(column), *[len(row[i]) for row in rows]) if rows else len(column)
+                  for i, column in enumerate(columns)]
+        lines = [columns, [u'-' * width for width in widths]] + rows
+        return u'\n'.join(u'  '.join(value.ljust(width) for value, width in zip(line, widths)).rstrip()
+                          for line in lines)
+
+
+# the report of the import running in this process
+report = ImportReport()
+
+
+def start(engine):
+    """
+    starts a new report and counts the engine's round trips
+    """
+    global report
+    report = ImportReport()
+    instrument_engine(engine)
+    return report
+
+
+@contextmanager
+def measure(stage, directory=None):
+    """
+    records a stage run in the report. the yielded record's rows can be set by the caller.
+    :param directory: the directory the stage is run for, the nested stages are recorded for it too
+    """
+    record = OrderedDict([('stage', stage),
+                          ('directory', directory or _current_directory[0]),
+                          ('rows', None),
+                          ('failed', False)])
+    previous_directory = _current_directory[0]
+    if directory is not None:
+        _current_directory[0] = directory
+    round_trips = _round_trips[0]
+    started = time.time()
+    try:
+        yield record
+    except Exception:
+        record['failed'] = True
+        raise
+    finally:
+        _current_directory[0] = previous_directory
+        record['seconds'] = round(time.time() - started, 3)
+        record['rows_per_second'] = round(record['rows'] / record['seconds'], 1) \
+            if record['rows'] and record['seconds'] else None
+        record['round_trips'] = _round_trips[0] - round_trips
+        record['peak_rss_mb'] = peak_rss_mb()
+        report.add(record)
+
+
+def timed_stage(stage, rows=False):
+    """
+    decorator recording every run of the function as a stage of the report
+    :param rows: the function returns the number of rows it processed
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage) as record:
+                result = func(*args, **kwargs)
+                if rows:
+                    record['rows'] = result
+            return result
+
+        return wrapper
+
+    return decorator
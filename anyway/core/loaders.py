@@ -0,0 +1,148 @@
+import csv
+import io
+import logging
+
+import pandas as pd
+from sqlalchemy import Integer, MetaData
+
+from anyway.core import instrumentation
+from anyway.core.utils import Utils
+
+COPY_NULL = '\\N'
+
+
+class OrmLoader(object):
+    """
+    loads rows with SQLAlchemy's bulk_insert_mappings, a parameterized INSERT per chunk
+    """
+    name = 'orm'
+    default_chunk_size = 5000
+
+    def __init__(self, db, chunk_size=None, schema=None):
+        """
+        :param schema: loads into the same tables in another schema, instead of the model's schema
+        """
+        self.db = db
+        self.chunk_size = chunk_size or self.default_chunk_size
+        self.schema = schema
+        self._tables = {}
+
+    def _insert(self, model, chunk):
+        if self.schema is None:
+            self.db.session.bulk_insert_mappings(model, chunk)
+            return
+        if model not in self._tables:
+            self._tables[model] = model.__table__.tometadata(MetaData(), schema=self.schema)
+        # inline - ids are left to the tables' column defaults, which use the sequences of the model's schema
+        self.db.session.execute(self._tables[model].insert(inline=True), chunk)
+
+    def load(self, model, rows):
+        """
+        :param model: the mapped class of the table
+        :param rows: a DataFrame or an iterable of dictionaries keyed by column name
+        :return: the number of loaded rows
+        """
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.astype(object).where(rows.notna(), None).to_dict('records')
+        count = 0
+        for chunk in Utils.batch_iterator(rows, self.chunk_size):
+            if chunk:
+                self._insert(model, chunk)
+                count += len(chunk)
+        return count
+
+
+class CopyLoader(object):
+    """
+    streams rows into PostgreSQL with COPY ... FROM STDIN in CSV format, a chunk at a time.
+    rows are written in the session's transaction, so committing is left to the caller.
+    """
+    name = 'copy'
+    default_chunk_size = 50000
+
+    def __init__(self, db, chunk_size=None, schema=None):
+        """
+        :param schema: loads into the same tables in another schema, instead of the model's schema
+        """
+        self.db = db
+        self.chunk_size = chunk_size or self.default_chunk_size
+        self.schema = schema
+
+    def _copy_statement(self, model, columns):
+        preparer = self.db.engine.dialect.identifier_preparer
+        table = model.__table__
+        return "COPY {0}.{1} ({2}) FROM STDIN WITH (FORMAT csv, NULL '{3}')".format(
+            preparer.quote(self.schema or table.schema),
+            preparer.quote(table.name),
+            ", ".join(preparer.quote(table.columns[column].name) for column in columns),
+            COPY_NULL)
+
+    def _copy(self, model, columns, buffer):
+        buffer.seek(0)
+        cursor = self.db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(self._copy_statement(model, columns), buffer)
+            instrumentation.count_round_trip()
+        finally:
+            cursor.close()
+
+    def load(self, model, rows):
+        """
+        :param model: the mapped class of the table
+        :param rows: a DataFrame or an iterable of dictionaries keyed by column name
+        :return: the number of loaded rows
+        """
+        if isinstance(rows, pd.DataFrame):
+            return self._load_frame(model, rows)
+        count = 0
+        for chunk in Utils.batch_iterator(rows, self.chunk_size):
+            if not chunk:
+                continue
+            columns = list(chunk[0].keys())
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerows([COPY_NULL if value is None else value for value in (row[column] for column in columns)]
+                             for row in chunk)
+            self._copy(model, columns, buffer)
+            count += len(chunk)
+        logging.debug('Copied {0} rows into {1}'.format(count, model.__table__.name))
+        return count
+
+    @staticmethod
+    def _integer_columns(model, frame):
+        """
+        :return: the frame with the float columns of integer table columns - integers with missing values - as
+        nullable integers, which are written without the '.0' PostgreSQL rejects for an integer
+        """
+        table = model.__table__
+        columns = [column for column in frame.columns
+                   if isinstance(table.columns[column].type, Integer) and pd.api.types.is_float_dtype(frame[column])]
+        if not columns:
+            return frame
+        return frame.astype({column: 'Int64' for column in columns})
+
+    def _load_frame(self, model, frame):
+        frame = self._integer_columns(model, frame)
+        columns = list(frame.columns)
+        for start in range(0, len(frame), self.chunk_size):
+            buffer = io.StringIO()
+            frame.iloc[start:start + self.chunk_size].to_csv(buffer, header=False, index=False, na_rep=COPY_NULL)
+            self._copy(model, columns, buffer)
+        logging.debug('Copied {0} rows into {1}'.format(len(frame), model.__table__.name))
+        return len(frame)
+
+
+LOADERS = {OrmLoader.name: OrmLoader,
+           CopyLoader.name: CopyLoader}
+
+
+def get_loader(name, db, chunk_size=None, schema=None):
+    """
+    :param name: one of LOADERS
+    :param schema: loads into the same tables in another schema, instead of the models schema
+    """
+    try:
+        loader_class = LOADERS[name]
+    except KeyError:
+        raise ValueError("Unknown loader: '{0}'".format(name))
+    return loader_class(db, chunk_size=chunk_size, schema=schema)
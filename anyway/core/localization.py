@@ -8,7 +8,7 @@ class Localization():
     _cities = {}
 
     def __init__(self):
-        _tables = {
+        self._tables = {
             "SUG_DEREH": {
                 1: "עירוני בצומת",
                 2: "עירוני לא בצומת",
@@ -194,7 +194,7 @@ class Localization():
                 9: "לא עוגן",
             }
         }
-        _fields = {
+        self._fields = {
             "pk_teuna_fikt": "מזהה",
             "SUG_DEREH": "סוג דרך",
             "SHEM_ZOMET": "שם צומת",
@@ -238,7 +238,13 @@ class Localization():
             "VEHICLE_TYPE": "סוג רכב",
             "VIOLATION_TYPE": "סוג עבירה"
         }
-        _cities = pd.read_csv("data/cities.csv", encoding="utf-8", index_col=field_names.sign)
+        cities = pd.read_csv("data/cities.csv", encoding="utf-8") \
+            .dropna(subset=[field_names.sign, field_names.name]) \
+            .drop_duplicates(subset=[field_names.sign])
+        # symbol -> name, floats as keys since the symbols of the CBS files are read as floats
+        self._cities = dict(zip(cities[field_names.sign].astype(float).tolist(), cities[field_names.name].tolist()))
+        self._cities_index = pd.Series(cities[field_names.name].values,
+                                       index=cities[field_names.sign].astype(float).values)
 
     def get_field(self,field, value=None):
         if value:
@@ -252,7 +258,14 @@ class Localization():
 
     def get_city_name(self,symbol_id):
         try:
-            city = self._cities.loc[symbol_id, field_names.name]
-            return city
-        except Exception as _:
+            return self._cities.get(symbol_id, None)
+        except TypeError as _:
             return None
+
+    def get_city_names(self, symbol_ids):
+        """
+        get_city_name over a whole column
+        :return: a list of the cities names, None where the symbol isn't found
+        """
+        names = pd.to_numeric(pd.Series(symbol_ids), errors='coerce').astype(float).map(self._cities_index)
+        return names.astype(object).where(names.notna(), None).tolist()
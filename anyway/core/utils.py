@@ -1,5 +1,6 @@
 from pyproj import Transformer
 import logging
+import numpy as np
 from dateutil.relativedelta import relativedelta
 from datetime import datetime
 
@@ -72,3 +73,19 @@ class Utils():
             longitude, latitude = self.transformer.transform(x, y)
             return longitude, latitude
 
+        def convert_many(self, xs, ys):
+            """
+            converts arrays of ITM coordinates to WGS84 in a single transformation
+            :type xs: numpy.ndarray
+            :type ys: numpy.ndarray
+            :rtype: tuple
+            :return: (longitudes,latitudes) arrays, NaN where x or y is missing
+            """
+            xs = np.asarray(xs, dtype=float)
+            ys = np.asarray(ys, dtype=float)
+            longitudes = np.full(xs.shape, np.nan)
+            latitudes = np.full(ys.shape, np.nan)
+            valid = ~(np.isnan(xs) | np.isnan(ys))
+            if valid.any():
+                longitudes[valid], latitudes[valid] = self.transformer.transform(xs[valid], ys[valid])
+            return longitudes, latitudes
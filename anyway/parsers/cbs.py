@@ -13,11 +13,14 @@ from datetime import datetime
 from functools import partial
 
 import math
+import multiprocessing
+import numpy as np
 import pandas as pd
 import six
 from flask_sqlalchemy import SQLAlchemy
 from six import iteritems
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
 
 from anyway.core import field_names
 from anyway.core.localization import Localization
@@ -80,15 +83,20 @@ from anyway.common.models.cbs_models import (AccidentMarker,
                       LateDeceased,
                       LocationAccuracy,
                       ProviderCode,
-                      VehicleDamage)
+                      VehicleDamage,
+                      CodeDictionary,
+                      RoadSegments)
 from anyway.core.utils import Utils
+from anyway.core import instrumentation
+from anyway.core.loaders import OrmLoader, get_loader
+from anyway.parsers.cbs_dictionaries import StreetsDictionary, JunctionsIndex, RoadSegmentsIndex
+from anyway.parsers import cbs_cache, cbs_catalog, cbs_manifest, cbs_partitions, cbs_schema, materialized_views
+from anyway.parsers.cbs_catalog import ACCIDENT_TYPE_REGEX, get_file_type_and_year
 
 failed_dirs = OrderedDict()
 localization = Localization()
 
 CONTENT_ENCODING = 'cp1255'
-ACCIDENT_TYPE_REGEX = re.compile(r"accidents_type_(?P<type>\d)")
-
 ACCIDENTS = 'accidents'
 CITIES = 'cities'
 STREETS = 'streets'
@@ -109,6 +117,16 @@ cbs_files = {
     VEHICLES: "VehData.csv"
 }
 
+# the columns read from every file and their dtypes, see cbs_schema
+cbs_files_schemas = {
+    ACCIDENTS: cbs_schema.ACCIDENTS_SCHEMA,
+    NON_URBAN_INTERSECTION: cbs_schema.NON_URBAN_INTERSECTION_SCHEMA,
+    STREETS: cbs_schema.STREETS_SCHEMA,
+    DICTIONARY: cbs_schema.DICTIONARY_SCHEMA,
+    INVOLVED: cbs_schema.INVOLVED_SCHEMA,
+    VEHICLES: cbs_schema.VEHICLES_SCHEMA,
+}
+
 DICTCOLUMN1 = "MS_TAVLA"
 DICTCOLUMN2 = "KOD"
 DICTCOLUMN3 = "TEUR"
@@ -171,6 +189,11 @@ CLASSES_DICT = {0: ColumnsDescription,
                 245: VehicleType,
                 }
 
+# the table_id of every code table in cbs.code_dictionary - the lowest CBS dictionary number it is filled from
+CODE_DICTIONARY_TABLE_IDS = {}
+for _table_id, _model in sorted(CLASSES_DICT.items()):
+    CODE_DICTIONARY_TABLE_IDS.setdefault(_model, _table_id)
+
 TABLES_DICT = {0: 'columns_description',
                1: 'police_unit',
                2: 'road_type',
@@ -235,18 +258,17 @@ coordinates_converter = Utils.ItmToWGS84()
 
 json_dumps = partial(json.dumps, encoding=models.db_encoding) if six.PY2 else json.dumps
 
+# the SRID of the markers geometry
+GEOM_SRID = 4326
+
 
 def get_street(yishuv_symbol, street_sign, streets):
     """
     extracts the street name using the settlement id and street id
+    :type streets: StreetsDictionary
     """
-    if yishuv_symbol not in streets:
-        # Changed to return blank string instead of None for correct presentation (Omer)
-        return u""
-    street_name = [x[field_names.street_name] for x in streets[yishuv_symbol] if
-                   x[field_names.street_sign] == street_sign]
-    # there should be only one street name, or none if it wasn't found.
-    return street_name[0] if len(street_name) == 1 else u""
+    # Changed to return blank string instead of None for correct presentation (Omer)
+    return streets.get(yishuv_symbol, street_sign)
 
 
 def get_address(accident, streets):
@@ -301,42 +323,10 @@ def get_junction(accident, roads):
     extracts the junction from an accident
     omerxx: added "km" parameter to the calculation to only show the right junction,
     every non-urban accident shows nearest junction with distance and direction
+    :type roads: JunctionsIndex
     :return: returns the junction or None if it wasn't found
     """
-    if accident.get(field_names.km) is not None and accident.get(field_names.non_urban_intersection) is None:
-        min_dist = 100000
-        key = (), ()
-        junc_km = 0
-        for option in roads:
-            if accident.get(field_names.road1) == option[0] and abs(accident["KM"] - option[2]) < min_dist:
-                min_dist = abs(accident.get(field_names.km) - option[2])
-                key = accident.get(field_names.road1), option[1], option[2]
-                junc_km = option[2]
-        junction = roads.get(key, None)
-        if junction:
-            if accident.get(field_names.km) - junc_km > 0:
-                direction = u"צפונית" if accident.get(field_names.road1) % 2 == 0 else u"מזרחית"
-            else:
-                direction = u"דרומית" if accident.get(field_names.road1) % 2 == 0 else u"מערבית"
-            if abs(float(accident["KM"] - junc_km) / 10) >= 1:
-                string = str(abs(float(accident["KM"]) - junc_km) / 10) + u" ק״מ " + direction + u" ל" + \
-                         junction
-            elif 0 < abs(float(accident["KM"] - junc_km) / 10) < 1:
-                string = str(int((abs(
-                    float(accident.get(field_names.km)) - junc_km) / 10) * 1000)) + u" מטרים " + direction + u" ל" + \
-                         junction
-            else:
-                string = junction
-            return string
-        else:
-            return u""
-
-    elif accident.get(field_names.non_urban_intersection) is not None:
-        key = accident.get(field_names.road1), accident.get(field_names.road2), accident.get(field_names.km)
-        junction = roads.get(key, None)
-        return junction if junction else u""
-    else:
-        return u""
+    return roads.get_junction(accident)
 
 
 def parse_date(accident):
@@ -398,6 +388,17 @@ def get_data_value(value):
     """
     return None if value is None or math.isnan(value) else int(value)
 
+def get_geom(longitude, latitude):
+    """
+    :returns: the EWKT of the marker's point, which is written with the marker - both the ORM (ST_GeomFromEWKT)
+    and COPY accept it - OR None if the accident has no coordinates
+    """
+    if longitude is None or latitude is None:
+        return None
+    # repr keeps every digit of the coordinates, the point is the same as one built from the stored columns
+    return "SRID={0};POINT({1!r} {2!r})".format(GEOM_SRID, float(longitude), float(latitude))
+
+
 def get_km_data(accident):
     """
     :returns: km as a flot, km_accurate as boolean, km_raw
@@ -411,7 +412,10 @@ def get_km_data(accident):
         km = float(km.strip('-'))
     return km, km_accurate, km_raw
 
-def create_marker(accident, streets, roads, non_urban_intersection):
+def create_marker(accident, streets, roads, non_urban_intersection, road_segments=None):
+    """
+    :param road_segments: the RoadSegmentsIndex the marker's road_segment_id is found in, None leaves it empty
+    """
     if field_names.x not in accident or field_names.y not in accident:
         raise ValueError("Missing x and y coordinates")
     if accident.get(field_names.x) and not math.isnan(accident.get(field_names.x)) \
@@ -422,6 +426,7 @@ def create_marker(accident, streets, roads, non_urban_intersection):
         lng, lat = None, None  # Must insert everything to avoid foreign key failure
     main_street, secondary_street = get_streets(accident, streets)
     km, km_accurate, km_raw = get_km_data(accident)
+    road1 = get_data_value(accident.get(field_names.road1))
     accident_datetime = parse_date(accident)
 
     marker = {
@@ -462,11 +467,12 @@ def create_marker(accident, streets, roads, non_urban_intersection):
         "cross_mode": get_data_value(accident.get(field_names.cross_mode)),
         "cross_location": get_data_value(accident.get(field_names.cross_location)),
         "cross_direction": get_data_value(accident.get(field_names.cross_direction)),
-        "road1": get_data_value(accident.get(field_names.road1)),
+        "road1": road1,
         "road2": get_data_value(accident.get(field_names.road2)),
         "km": km,
         "km_raw": km_raw,
         "km_accurate": km_accurate,
+        "road_segment_id": road_segments.get(road1, km) if road_segments is not None else None,
         "yishuv_symbol": get_data_value(accident.get(field_names.yishuv_symbol)),
         "yishuv_name": localization.get_city_name(symbol_id=accident.get(field_names.yishuv_symbol)),
         "geo_area": get_data_value(accident.get(field_names.geo_area)),
@@ -501,99 +507,455 @@ def create_marker(accident, streets, roads, non_urban_intersection):
         "y": accident.get(field_names.y),
         "vehicle_type_rsa": None,
         "violation_type_rsa": None,
-        "geom": None
+        "geom": get_geom(lng, lat)
     }
     return marker
 
 
-def import_accidents(accidents, streets, roads, non_urban_intersection, **kwargs):
+def _map_unique(accidents, fields, func):
+    """
+    applies func once per distinct combination of the given fields and broadcasts the results
+    back to every accident, so per-row lookups cost as much as the number of distinct keys
+    :return: a list with func's result for every accident, in the accidents order
+    """
+    present = [field for field in fields if field in accidents]
+    if not present:
+        return [func({})] * len(accidents)
+    keys = accidents[present].drop_duplicates()
+    results = [func(dict(zip(present, row))) for row in keys.itertuples(index=False, name=None)]
+    keys = keys.assign(_result=pd.Series(results, index=keys.index, dtype=object))
+    mapped = accidents[present].merge(keys, how='left', on=present)
+    return mapped['_result'].tolist()
+
+
+def get_data_values(accidents, field):
+    """
+    column-wise get_data_value
+    :returns: a list of ints, with None where the value does not exist
+    """
+    values = np.full(len(accidents), None, dtype=object)
+    if field in accidents:
+        column = accidents[field]
+        mask = column.notna().values
+        values[mask] = column[mask].astype('int64').tolist()
+    return values.tolist()
+
+
+def get_raw_values(accidents, field):
+    """
+    column-wise accident.get for numeric values that are stored as is.
+    iterrows upcasts the all-numeric CBS rows to float, so the values are kept as floats.
+    """
+    if field not in accidents:
+        return [None] * len(accidents)
+    return accidents[field].astype(float).tolist()
+
+
+def get_km_data_columns(accidents):
+    """
+    column-wise get_km_data
+    :returns: lists of km, km_accurate and km_raw
+    """
+    km_raw = get_raw_values(accidents, field_names.km)
+    if field_names.km not in accidents:
+        return km_raw, km_raw, km_raw
+    km_values = accidents[field_names.km].astype(float).values
+    mask = ~np.isnan(km_values)
+    km = np.full(len(accidents), None, dtype=object)
+    km_accurate = np.full(len(accidents), None, dtype=object)
+    # a '-' prefix marks an inaccurate km
+    km[mask] = np.abs(km_values[mask]).tolist()
+    km_accurate[mask] = (~np.signbit(km_values[mask])).tolist()
+    return km.tolist(), km_accurate.tolist(), km_raw
+
+
+def parse_dates(accidents):
+    """
+    column-wise parse_date
+    :returns: a list of the accidents datetimes
+    """
+    minutes = accidents[field_names.accident_hour].astype(float) * 15 - 15
+    dates = pd.to_datetime(pd.DataFrame({'year': accidents[field_names.accident_year].astype(float),
+                                         'month': accidents[field_names.accident_month].astype(float),
+                                         'day': accidents[field_names.accident_day].astype(float),
+                                         'hour': minutes // 60,
+                                         'minute': minutes % 60}))
+    return [None if pd.isnull(date) else date.to_pydatetime() for date in dates]
+
+
+def get_streets_column(accidents, street_field, streets):
+    """
+    column-wise get_street of the street in street_field
+    :type streets: StreetsDictionary
+    """
+    if field_names.yishuv_symbol not in accidents or street_field not in accidents:
+        return [u""] * len(accidents)
+    return streets.get_many(accidents[field_names.yishuv_symbol], accidents[street_field])
+
+
+def get_addresses(accidents, main_streets, settlements):
+    """
+    column-wise get_address, using the already extracted main streets and settlement names
+    """
+    length = len(accidents)
+    street = pd.Series(main_streets, dtype=object)
+    settlement = pd.Series(settlements, dtype=object)
+    house_number = pd.Series(np.full(length, None, dtype=object), dtype=object)
+    if field_names.house_number in accidents:
+        house_numbers = accidents[field_names.house_number]
+        valid = house_numbers.notna().values
+        house_number[valid] = house_numbers[valid].astype('int64').values
+        # the house_number field is invalid if it's empty or if it contains 9999
+        house_number[house_number.isin([0, 9999]).values] = None
+    has_house_number = house_number.notna().values
+    has_settlement = (settlement.notna() & (settlement != u"")).values
+    has_street = (street.notna() & (street != u"")).values
+    house_number = house_number.astype(str)
+    addresses = np.select([~has_street,
+                           ~has_house_number & ~has_settlement,
+                           ~has_house_number & has_settlement,
+                           has_house_number & ~has_settlement],
+                          [u"",
+                           street.values,
+                           (street + u", " + settlement).values,
+                           (street + u" " + house_number).values],
+                          default=(street + u" " + house_number + u", " + settlement).values)
+    return addresses.tolist()
+
+
+def _is_true(accidents, field):
+    """
+    column-wise bool(accident.get(field)) - a missing field is False and NaN is True
+    """
+    if field not in accidents:
+        return np.zeros(len(accidents), dtype=bool)
+    column = accidents[field]
+    return (column.isna() | (column != 0)).values
+
+
+def _json_items(key, values, mask):
+    """
+    the JSON text of the {key: value} item, where mask is set, and an empty string elsewhere.
+    every distinct value is serialized once.
+    """
+    items = np.full(len(mask), u"", dtype=object)
+    if mask.any():
+        selected = pd.Series(values, dtype=object)[mask]
+        dumped_key = json_dumps(key)
+        dumped = {value: u"{0}: {1}".format(dumped_key, json_dumps(value)) for value in pd.unique(selected)}
+        items[mask] = selected.map(dumped).values
+    return items
+
+
+def _is_set(values):
+    """
+    column-wise truthiness of the extracted text values - None and empty strings are False
+    """
+    values = pd.Series(values, dtype=object)
+    return (values.notna() & (values != u"")).values
+
+
+def dump_extra_data_columns(accidents, main_streets, secondary_streets, junctions):
+    """
+    column-wise json_dumps(load_extra_data(...)), using the already extracted streets and junctions.
+    the descriptions are assembled from per field JSON items, so they are identical to json_dumps of the
+    per accident dictionaries - same keys order, separators and escaping.
+    :return: a list of the description JSON of every accident
+    """
+    urban = _is_true(accidents, field_names.urban_intersection)
+    non_urban = _is_true(accidents, field_names.non_urban_intersection)
+
+    columns = [_json_items(field_names.street1, main_streets, urban & _is_set(main_streets)),
+               _json_items(field_names.street2, secondary_streets, urban & _is_set(secondary_streets)),
+               _json_items(field_names.junction_name, junctions, non_urban & _is_set(junctions))]
+
+    # localize static accident values
+    for field in localization.get_supported_tables():
+        if field not in accidents:
+            continue
+        column = accidents[field].astype(float)
+        supported = {value: bool(localization.get_field(field, value)) for value in column.dropna().unique()}
+        mask = (column.notna() & (column != 0) & column.map(supported).fillna(False).astype(bool)).values
+        columns.append(_json_items(field, column.tolist(), mask))
+
+    descriptions = np.full(len(accidents), u"", dtype=object)
+    for items in columns:
+        separators = np.where((descriptions != u"") & (items != u""), u", ", u"")
+        descriptions = descriptions + separators + items
+    return (u"{" + descriptions + u"}").tolist()
+
+
+def create_markers_columns(accidents, streets, roads, non_urban_intersection, road_segments=None):
+    """
+    column-wise create_marker - derives every marker field for all the accidents at once
+    :return: an OrderedDict of marker field name to the list of its values, ordered as in create_marker
+    """
+    if field_names.x not in accidents or field_names.y not in accidents:
+        raise ValueError("Missing x and y coordinates")
+    length = len(accidents)
+    accidents = accidents.reset_index(drop=True)
+
+    x = accidents[field_names.x].astype(float)
+    y = accidents[field_names.y].astype(float)
+    has_coordinates = (x.notna() & (x != 0) & y.notna() & (y != 0)).values
+    longitudes = np.full(length, None, dtype=object)
+    latitudes = np.full(length, None, dtype=object)
+    converted_longitudes, converted_latitudes = coordinates_converter.convert_many(x[has_coordinates].values,
+                                                                                   y[has_coordinates].values)
+    longitudes[has_coordinates] = converted_longitudes.tolist()
+    latitudes[has_coordinates] = converted_latitudes.tolist()
+
+    street1_hebrew = get_streets_column(accidents, field_names.street1, streets)
+    street2_hebrew = get_streets_column(accidents, field_names.street2, streets)
+    settlements = localization.get_city_names(accidents[field_names.yishuv_symbol]) \
+        if field_names.yishuv_symbol in accidents else [None] * length
+    junctions = roads.get_junctions(accidents)
+    non_urban_intersection_hebrew = _map_unique(accidents, (field_names.non_urban_intersection,),
+                                                lambda accident: get_non_urban_intersection_by_junction_number(
+                                                    accident, non_urban_intersection))
+    addresses = get_addresses(accidents, street1_hebrew, settlements)
+    descriptions = dump_extra_data_columns(accidents, addresses, street2_hebrew, junctions)
+    km, km_accurate, km_raw = get_km_data_columns(accidents)
+    road1 = get_data_values(accidents, field_names.road1)
+    road_segment_ids = road_segments.get_many(road1, km) if road_segments is not None else [None] * length
+    accident_datetimes = parse_dates(accidents)
+    ids = accidents[field_names.id].astype('int64')
+    provider_codes = accidents[field_names.file_type].astype('int64')
+
+    return OrderedDict([
+        ("id", ids.tolist()),
+        ("provider_and_id", (provider_codes.astype(str) + ids.astype(str)).astype('int64').tolist()),
+        ("provider_code", provider_codes.tolist()),
+        ("file_type_police", get_data_values(accidents, field_names.file_type_police)),
+        ("title", ["Accident"] * length),
+        ("description", descriptions),
+        ("address", addresses),
+        ("latitude", latitudes.tolist()),
+        ("longitude", longitudes.tolist()),
+        ("accident_type", get_data_values(accidents, field_names.accident_type)),
+        ("accident_severity", get_data_values(accidents, field_names.accident_severity)),
+        ("created", accident_datetimes),
+        ("accident_timestamp", accident_datetimes),
+        ("location_accuracy", get_data_values(accidents, field_names.location_accuracy)),
+        ("road_type", get_data_values(accidents, field_names.road_type)),
+        ("road_shape", get_data_values(accidents, field_names.road_shape)),
+        ("day_type", get_data_values(accidents, field_names.day_type)),
+        ("police_unit", get_data_values(accidents, field_names.police_unit)),
+        ("mainStreet", addresses),
+        ("secondaryStreet", street2_hebrew),
+        ("junction", junctions),
+        ("one_lane", get_data_values(accidents, field_names.one_lane)),
+        ("multi_lane", get_data_values(accidents, field_names.multi_lane)),
+        ("speed_limit", get_data_values(accidents, field_names.speed_limit)),
+        ("road_intactness", get_data_values(accidents, field_names.road_intactness)),
+        ("road_width", get_data_values(accidents, field_names.road_width)),
+        ("road_sign", get_data_values(accidents, field_names.road_sign)),
+        ("road_light", get_data_values(accidents, field_names.road_light)),
+        ("road_control", get_data_values(accidents, field_names.road_control)),
+        ("weather", get_data_values(accidents, field_names.weather)),
+        ("road_surface", get_data_values(accidents, field_names.road_surface)),
+        ("road_object", get_data_values(accidents, field_names.road_object)),
+        ("object_distance", get_data_values(accidents, field_names.object_distance)),
+        ("didnt_cross", get_data_values(accidents, field_names.didnt_cross)),
+        ("cross_mode", get_data_values(accidents, field_names.cross_mode)),
+        ("cross_location", get_data_values(accidents, field_names.cross_location)),
+        ("cross_direction", get_data_values(accidents, field_names.cross_direction)),
+        ("road1", road1),
+        ("road2", get_data_values(accidents, field_names.road2)),
+        ("km", km),
+        ("km_raw", km_raw),
+        ("km_accurate", km_accurate),
+        ("road_segment_id", road_segment_ids),
+        ("yishuv_symbol", get_data_values(accidents, field_names.yishuv_symbol)),
+        ("yishuv_name", settlements),
+        ("geo_area", get_data_values(accidents, field_names.geo_area)),
+        ("day_night", get_data_values(accidents, field_names.day_night)),
+        ("day_in_week", get_data_values(accidents, field_names.day_in_week)),
+        ("traffic_light", get_data_values(accidents, field_names.traffic_light)),
+        ("region", get_data_values(accidents, field_names.region)),
+        ("district", get_data_values(accidents, field_names.district)),
+        ("natural_area", get_data_values(accidents, field_names.natural_area)),
+        ("municipal_status", get_data_values(accidents, field_names.municipal_status)),
+        ("yishuv_shape", get_data_values(accidents, field_names.yishuv_shape)),
+        ("street1", get_data_values(accidents, field_names.street1)),
+        ("street1_hebrew", street1_hebrew),
+        ("street2", get_data_values(accidents, field_names.street2)),
+        ("street2_hebrew", street2_hebrew),
+        ("house_number", get_data_values(accidents, field_names.house_number)),
+        ("urban_intersection", get_data_values(accidents, field_names.urban_intersection)),
+        ("non_urban_intersection", get_data_values(accidents, field_names.non_urban_intersection)),
+        ("non_urban_intersection_hebrew", non_urban_intersection_hebrew),
+        ("accident_year", get_data_values(accidents, field_names.accident_year)),
+        ("accident_month", get_data_values(accidents, field_names.accident_month)),
+        ("accident_day", get_data_values(accidents, field_names.accident_day)),
+        ("accident_hour_raw", get_data_values(accidents, field_names.accident_hour)),
+        ("accident_hour", [None if date is None else date.hour for date in accident_datetimes]),
+        ("accident_minute", [None if date is None else date.minute for date in accident_datetimes]),
+        ("x", get_raw_values(accidents, field_names.x)),
+        ("y", get_raw_values(accidents, field_names.y)),
+        ("vehicle_type_rsa", [None] * length),
+        ("violation_type_rsa", [None] * length),
+        ("geom", [get_geom(longitude, latitude) for longitude, latitude in zip(longitudes, latitudes)]),
+    ])
+
+
+def create_markers(accidents, streets, roads, non_urban_intersection, batch_size=5000, road_segments=None):
+    """
+    builds the markers of all the accidents column-wise and yields them in batches of marker dictionaries,
+    each identical to the one create_marker returns for that accident
+    """
+    if accidents.empty:
+        return
+    markers = create_markers_columns(accidents, streets, roads, non_urban_intersection, road_segments)
+    fields = list(markers.keys())
+    for start in range(0, len(accidents), batch_size):
+        values = [markers[field][start:start + batch_size] for field in fields]
+        yield [dict(zip(fields, marker)) for marker in zip(*values)]
+
+
+@instrumentation.timed_stage('import_accidents', rows=True)
+def import_accidents(accidents, streets, roads, non_urban_intersection, batch_size=5000, loader=None,
+                     road_segments=None, **kwargs):
     logging.info('Importing markers')
-    accidents_result = []
-    for _, accident in accidents.iterrows():
-        marker = create_marker(accident, streets, roads, non_urban_intersection)
-        accidents_result.append(marker)
-    db.session.bulk_insert_mappings(AccidentMarker, accidents_result)
-    db.session.commit()
+    loader = loader or OrmLoader(db, batch_size)
+    markers_count = 0
+    for accidents_chunk in iter_frames(accidents):
+        for markers in create_markers(accidents_chunk, streets, roads, non_urban_intersection, batch_size,
+                                      road_segments):
+            markers_count += loader.load(AccidentMarker, markers)
     logging.info('Finished Importing markers')
-    logging.info('Inserted ' + str(len(accidents_result)) + ' new accident markers')
-    fill_db_geo_data()
-    return len(accidents_result)
+    logging.info('Inserted ' + str(markers_count) + ' new accident markers')
+    return markers_count
+
+
+def create_involved(involve):
+    return {
+        "accident_id": int(involve.get(field_names.id)),
+        "provider_and_id": int(
+            str(int(involve.get(field_names.file_type))) + str(int(involve.get(field_names.id)))),
+        "provider_code": int(involve.get(field_names.file_type)),
+        "file_type_police": get_data_value(involve.get(field_names.file_type_police)),
+        "involved_type": int(involve.get(field_names.involved_type)),
+        "license_acquiring_date": int(involve.get(field_names.license_acquiring_date)),
+        "age_group": int(involve.get(field_names.age_group)),
+        "sex": get_data_value(involve.get(field_names.sex)),
+        "vehicle_type": get_data_value(involve.get(field_names.vehicle_type_involved)),
+        "safety_measures": get_data_value(involve.get(field_names.safety_measures)),
+        "involve_yishuv_symbol": get_data_value(involve.get(field_names.involve_yishuv_symbol)),
+        "involve_yishuv_name": localization.get_city_name(symbol_id=involve.get(field_names.involve_yishuv_symbol)),
+        "injury_severity": get_data_value(involve.get(field_names.injury_severity)),
+        "injured_type": get_data_value(involve.get(field_names.injured_type)),
+        "injured_position": get_data_value(involve.get(field_names.injured_position)),
+        "population_type": get_data_value(involve.get(field_names.population_type)),
+        "home_region": get_data_value(involve.get(field_names.home_region)),
+        "home_district": get_data_value(involve.get(field_names.home_district)),
+        "home_natural_area": get_data_value(involve.get(field_names.home_natural_area)),
+        "home_municipal_status": get_data_value(involve.get(field_names.home_municipal_status)),
+        "home_yishuv_shape": get_data_value(involve.get(field_names.home_yishuv_shape)),
+        "hospital_time": get_data_value(involve.get(field_names.hospital_time)),
+        "medical_type": get_data_value(involve.get(field_names.medical_type)),
+        "release_dest": get_data_value(involve.get(field_names.release_dest)),
+        "safety_measures_use": get_data_value(involve.get(field_names.safety_measures_use)),
+        "late_deceased": get_data_value(involve.get(field_names.late_deceased)),
+        "car_id": get_data_value(involve.get(field_names.car_id)),
+        "involve_id": get_data_value(involve.get(field_names.involve_id)),
+        "accident_year": get_data_value(involve.get(field_names.accident_year)),
+        "accident_month": get_data_value(involve.get(field_names.accident_month)),
+    }
 
 
-def import_involved(involved, **kwargs):
+@instrumentation.timed_stage('import_involved', rows=True)
+def import_involved(involved, loader=None, **kwargs):
     logging.info('Importing involved')
-    involved_result = []
-    for _, involve in involved.iterrows():
-        if not involve.get(field_names.id) or pd.isnull(involve.get(field_names.id)):  # skip lines with no accident id
-            continue
-        involved_result.append({
-            "accident_id": int(involve.get(field_names.id)),
-            "provider_and_id": int(
-                str(int(involve.get(field_names.file_type))) + str(int(involve.get(field_names.id)))),
-            "provider_code": int(involve.get(field_names.file_type)),
-            "file_type_police": get_data_value(involve.get(field_names.file_type_police)),
-            "involved_type": int(involve.get(field_names.involved_type)),
-            "license_acquiring_date": int(involve.get(field_names.license_acquiring_date)),
-            "age_group": int(involve.get(field_names.age_group)),
-            "sex": get_data_value(involve.get(field_names.sex)),
-            "vehicle_type": get_data_value(involve.get(field_names.vehicle_type_involved)),
-            "safety_measures": get_data_value(involve.get(field_names.safety_measures)),
-            "involve_yishuv_symbol": get_data_value(involve.get(field_names.involve_yishuv_symbol)),
-            "involve_yishuv_name": localization.get_city_name(symbol_id=involve.get(field_names.involve_yishuv_symbol)),
-            "injury_severity": get_data_value(involve.get(field_names.injury_severity)),
-            "injured_type": get_data_value(involve.get(field_names.injured_type)),
-            "injured_position": get_data_value(involve.get(field_names.injured_position)),
-            "population_type": get_data_value(involve.get(field_names.population_type)),
-            "home_region": get_data_value(involve.get(field_names.home_region)),
-            "home_district": get_data_value(involve.get(field_names.home_district)),
-            "home_natural_area": get_data_value(involve.get(field_names.home_natural_area)),
-            "home_municipal_status": get_data_value(involve.get(field_names.home_municipal_status)),
-            "home_yishuv_shape": get_data_value(involve.get(field_names.home_yishuv_shape)),
-            "hospital_time": get_data_value(involve.get(field_names.hospital_time)),
-            "medical_type": get_data_value(involve.get(field_names.medical_type)),
-            "release_dest": get_data_value(involve.get(field_names.release_dest)),
-            "safety_measures_use": get_data_value(involve.get(field_names.safety_measures_use)),
-            "late_deceased": get_data_value(involve.get(field_names.late_deceased)),
-            "car_id": get_data_value(involve.get(field_names.car_id)),
-            "involve_id": get_data_value(involve.get(field_names.involve_id)),
-            "accident_year": get_data_value(involve.get(field_names.accident_year)),
-            "accident_month": get_data_value(involve.get(field_names.accident_month)),
-        })
-    db.session.bulk_insert_mappings(Involved, involved_result)
-    db.session.commit()
+    loader = loader or OrmLoader(db)
+    involved_count = 0
+    for involved_chunk in iter_frames(involved):
+        involved_result = [create_involved(involve) for _, involve in involved_chunk.iterrows()
+                           # skip lines with no accident id
+                           if involve.get(field_names.id) and not pd.isnull(involve.get(field_names.id))]
+        involved_count += loader.load(Involved, involved_result)
     logging.info('Finished Importing involved')
-    return len(involved_result)
+    return involved_count
+
+
+def create_vehicle(vehicle):
+    return {
+        "accident_id": int(vehicle.get(field_names.id)),
+        "provider_and_id": int(
+            str(int(vehicle.get(field_names.file_type))) + str(int(vehicle.get(field_names.id)))),
+        "provider_code": int(vehicle.get(field_names.file_type)),
+        "file_type_police": get_data_value(vehicle.get(field_names.file_type_police)),
+        "engine_volume": int(vehicle.get(field_names.engine_volume)),
+        "manufacturing_year": get_data_value(vehicle.get(field_names.manufacturing_year)),
+        "driving_directions": get_data_value(vehicle.get(field_names.driving_directions)),
+        "vehicle_status": get_data_value(vehicle.get(field_names.vehicle_status)),
+        "vehicle_attribution": get_data_value(vehicle.get(field_names.vehicle_attribution)),
+        "vehicle_type": get_data_value(vehicle.get(field_names.vehicle_type_vehicles)),
+        "seats": get_data_value(vehicle.get(field_names.seats)),
+        "total_weight": get_data_value(vehicle.get(field_names.total_weight)),
+        "car_id": get_data_value(vehicle.get(field_names.car_id)),
+        "accident_year": get_data_value(vehicle.get(field_names.accident_year)),
+        "accident_month": get_data_value(vehicle.get(field_names.accident_month)),
+        "vehicle_damage": get_data_value(vehicle.get(field_names.vehicle_damage)),
+    }
 
 
-def import_vehicles(vehicles, **kwargs):
+@instrumentation.timed_stage('import_vehicles', rows=True)
+def import_vehicles(vehicles, loader=None, **kwargs):
     logging.info('Importing vehicles')
-    vehicles_result = []
-    for _, vehicle in vehicles.iterrows():
-        vehicles_result.append({
-            "accident_id": int(vehicle.get(field_names.id)),
-            "provider_and_id": int(
-                str(int(vehicle.get(field_names.file_type))) + str(int(vehicle.get(field_names.id)))),
-            "provider_code": int(vehicle.get(field_names.file_type)),
-            "file_type_police": get_data_value(vehicle.get(field_names.file_type_police)),
-            "engine_volume": int(vehicle.get(field_names.engine_volume)),
-            "manufacturing_year": get_data_value(vehicle.get(field_names.manufacturing_year)),
-            "driving_directions": get_data_value(vehicle.get(field_names.driving_directions)),
-            "vehicle_status": get_data_value(vehicle.get(field_names.vehicle_status)),
-            "vehicle_attribution": get_data_value(vehicle.get(field_names.vehicle_attribution)),
-            "vehicle_type": get_data_value(vehicle.get(field_names.vehicle_type_vehicles)),
-            "seats": get_data_value(vehicle.get(field_names.seats)),
-            "total_weight": get_data_value(vehicle.get(field_names.total_weight)),
-            "car_id": get_data_value(vehicle.get(field_names.car_id)),
-            "accident_year": get_data_value(vehicle.get(field_names.accident_year)),
-            "accident_month": get_data_value(vehicle.get(field_names.accident_month)),
-            "vehicle_damage": get_data_value(vehicle.get(field_names.vehicle_damage)),
-        })
+    loader = loader or OrmLoader(db)
+    vehicles_count = 0
+    for vehicles_chunk in iter_frames(vehicles):
+        vehicles_result = [create_vehicle(vehicle) for _, vehicle in vehicles_chunk.iterrows()]
+        vehicles_count += loader.load(Vehicle, vehicles_result)
     logging.info('Finished Importing vehicles')
-    db.session.bulk_insert_mappings(Vehicle, vehicles_result)
-    return len(vehicles_result)
+    return vehicles_count
+
 
+def load_road_segments_index():
+    """
+    :return: the RoadSegmentsIndex of cbs.road_segments
+    """
+    return RoadSegmentsIndex(db.session.query(RoadSegments.segment_id, RoadSegments.road,
+                                              RoadSegments.from_km, RoadSegments.to_km).all())
 
-def get_files(directory):
+
+class CsvChunks(object):
+    """
+    a CBS data file that is read lazily in chunks of chunksize rows, every time it is iterated,
+    so the whole file is never held in memory
+    """
+
+    def __init__(self, file_path, chunksize, file_hash=None, schema=None):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.file_hash = file_hash
+        self.schema = schema
+
+    def __iter__(self):
+        return cbs_cache.iter_csv_chunks(self.file_path, self.chunksize, self.file_hash, self.schema)
+
+
+def iter_frames(data):
+    """
+    :param data: a DataFrame, or CsvChunks in streaming mode
+    :return: an iterator over the DataFrames of data, widened from their compact dtypes to the ones
+    the transformations expect, one frame at a time
+    """
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    return (cbs_schema.widen(frame) for frame in frames)
+
+
+@instrumentation.timed_stage('get_files')
+def get_files(directory, chunksize=None, file_hashes=None):
+    """
+    the files are read from their cbs_cache copies when they have one, with only the columns of their cbs_schema.
+    AccData, InvData and VehData keep its compact dtypes - iter_frames widens them for the transformations
+    :param chunksize: streaming mode - if given, AccData, InvData and VehData are returned as CsvChunks
+    of that many rows instead of being read up front
+    :param file_hashes: {file name: sha256} of the directory's files, if they are known already
+    """
+    file_hashes = file_hashes or {}
     output_files_dict = {}
     for name, filename in iteritems(cbs_files):
         if name not in (STREETS, NON_URBAN_INTERSECTION, ACCIDENTS, INVOLVED, VEHICLES, DICTIONARY):
@@ -606,61 +968,68 @@ def get_files(directory):
         if amount > 1:
             raise ValueError("Ambiguous: '%s'" % filename)
         file_path = os.path.join(directory, files[0])
+        file_hash = file_hashes.get(files[0])
+        schema = cbs_files_schemas[name]
         if name == DICTIONARY:
-            output_files_dict[name] = read_dictionary(file_path)
+            output_files_dict[name] = read_dictionary(file_path, file_hash)
+        elif name in (ACCIDENTS, INVOLVED, VEHICLES) and chunksize:
+            output_files_dict[name] = CsvChunks(file_path, chunksize, file_hash, schema)
         elif name in (ACCIDENTS, INVOLVED, VEHICLES):
-            df = pd.read_csv(file_path, encoding=CONTENT_ENCODING)
-            df.columns = [column.upper() for column in df.columns]
-            output_files_dict[name] = df
+            output_files_dict[name] = cbs_cache.read_csv(file_path, file_hash, schema)
         else:
-            df = pd.read_csv(file_path, encoding=CONTENT_ENCODING)
-            df.columns = [column.upper() for column in df.columns]
+            df = cbs_cache.read_csv(file_path, file_hash, schema)
             if name == STREETS:
-                streets_map = {}
-                groups = df.groupby(field_names.settlement)
-                for key, settlement in groups:
-                    streets_map[key] = [{field_names.street_sign: x[field_names.street_sign],
-                                         field_names.street_name: x[field_names.street_name]} for _, x in
-                                        settlement.iterrows()]
-
-                output_files_dict[name] = streets_map
+                output_files_dict[name] = StreetsDictionary(df)
             elif name == NON_URBAN_INTERSECTION:
-                roads = {(x[field_names.road1], x[field_names.road2], x[field_names.km]): x[field_names.junction_name]
-                         for _, x in df.iterrows()}
-                non_urban_intersection = {x[field_names.junction]: x[field_names.junction_name] for _, x in
-                                          df.iterrows()}
-                output_files_dict[ROADS] = roads
+                non_urban_intersection = dict(zip(df[field_names.junction].tolist(),
+                                                  df[field_names.junction_name].tolist()))
+                output_files_dict[ROADS] = JunctionsIndex(df)
                 output_files_dict[NON_URBAN_INTERSECTION] = non_urban_intersection
     return output_files_dict
 
 
-def import_to_datastore(directory, provider_code, year, batch_size):
+def import_to_datastore(directory, provider_code, year, batch_size, loader=None, chunksize=None):
     """
-    goes through all the files in a given directory, parses and commits them
+    goes through all the files in a given directory, parses them and commits them in a single transaction,
+    together with the directory's import manifest entry - the checkpoint a resumed import continues from.
+    a directory that fails leaves no rows behind.
+    :param loader: the loader that writes the rows, bulk inserts through the ORM by default
+    :param chunksize: streaming mode - reads, transforms and writes the data files chunksize rows at a time
     """
     try:
-        assert batch_size > 0
+        with instrumentation.measure('import_to_datastore', directory) as record:
+            assert batch_size > 0
+
+            file_hashes = cbs_manifest.hash_directory(directory)
+            files_from_cbs = get_files(directory, chunksize, file_hashes)
+            if len(files_from_cbs) == 0:
+                return 0
+            logging.info("Importing '{}'".format(directory))
+            started = datetime.now()
+
+            # import dictionary - idempotent upserts, committed on their own so that the directories imported
+            # in parallel don't wait on each other's code table rows
+            fill_dictionary_tables(files_from_cbs[DICTIONARY], provider_code, year)
+
+            new_items = 0
+            accidents_count = import_accidents(batch_size=batch_size, loader=loader,
+                                               road_segments=load_road_segments_index(), **files_from_cbs)
+            new_items += accidents_count
+            involved_count = import_involved(loader=loader, **files_from_cbs)
+            new_items += involved_count
+            vehicles_count = import_vehicles(loader=loader, **files_from_cbs)
+            new_items += vehicles_count
+            cbs_manifest.record_import(directory, provider_code, year, file_hashes,
+                                       accidents_count, involved_count, vehicles_count)
+            db.session.commit()
 
-        files_from_cbs = get_files(directory)
-        if len(files_from_cbs) == 0:
-            return 0
-        logging.info("Importing '{}'".format(directory))
-        started = datetime.now()
-
-        # import dictionary
-        fill_dictionary_tables(files_from_cbs[DICTIONARY], provider_code, year)
-
-        new_items = 0
-        accidents_count = import_accidents(**files_from_cbs)
-        new_items += accidents_count
-        involved_count = import_involved(**files_from_cbs)
-        new_items += involved_count
-        vehicles_count = import_vehicles(**files_from_cbs)
-        new_items += vehicles_count
-
-        logging.info("\t{0} items in {1}".format(new_items, Utils.time_delta(started)))
-        return new_items
-    except ValueError as e:
+            logging.info("\t{0} items in {1}".format(new_items, Utils.time_delta(started)))
+            record['rows'] = new_items
+            return new_items
+    except Exception as e:
+        db.session.rollback()
+        if not isinstance(e, ValueError):
+            raise
         failed_dirs[directory] = str(e)
         if "Not found" in str(e):
             return 0
@@ -703,90 +1072,45 @@ def delete_invalid_entries(batch_size):
             db.session.commit()
 
 
-def delete_cbs_entries(start_date, batch_size):
+@instrumentation.timed_stage('delete_cbs_entries', rows=True)
+def delete_cbs_entries(start_date):
     """
-    deletes all CBS markers (provider_code=1 or provider_code=3) in the database created in year and with provider code provider_code
-    first deletes from tables Involved and Vehicle, then from table AccidentMarker
-    first deletes from tables InvolvedNoLocation and VehicleNoLocation, then from table AccidentsNoLocation
+    deletes all CBS markers (provider_code=1 or provider_code=3) in the database created from start_date on,
+    first deletes their rows from tables Involved and Vehicle, then from table AccidentMarker,
+    each in a single set-based delete
     """
 
-    marker_ids_to_delete = db.session.query(AccidentMarker.id) \
+    markers_to_delete = db.session.query(AccidentMarker.id, AccidentMarker.provider_code,
+                                         AccidentMarker.accident_year) \
         .filter(AccidentMarker.created >= datetime.strptime(start_date, '%Y-%m-%d')) \
         .filter(or_((AccidentMarker.provider_code == CONST.CBS_ACCIDENT_TYPE_1_CODE), \
-                    (AccidentMarker.provider_code == CONST.CBS_ACCIDENT_TYPE_3_CODE))).all()
-
-    marker_ids_to_delete = [acc_id[0] for acc_id in marker_ids_to_delete]
-
-    logging.info('There are ' + str(len(marker_ids_to_delete)) + ' accident ids to delete starting ' + str(start_date))
-
-    for ids_chunk in Utils.chunks(marker_ids_to_delete, batch_size):
+                    (AccidentMarker.provider_code == CONST.CBS_ACCIDENT_TYPE_3_CODE)))
 
-        logging.info('Deleting a chunk of ' + str(len(ids_chunk)))
-
-        q = db.session.query(Involved).filter(Involved.accident_id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from Involved')
-            q.delete(synchronize_session=False)
-            db.session.commit()
-
-        q = db.session.query(Vehicle).filter(Vehicle.accident_id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from Vehicle')
-            q.delete(synchronize_session=False)
-            db.session.commit()
-
-        q = db.session.query(AccidentMarker).filter(AccidentMarker.id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from AccidentMarker')
-            q.delete(synchronize_session=False)
-            db.session.commit()
-
-
-def delete_cbs_entries_from_email(provider_code, year, batch_size):
-    """
-    deletes all CBS markers (provider_code=1 or provider_code=3) in the database created in year and with provider code provider_code
-    first deletes from tables Involved and Vehicle, then from table AccidentMarker
-    first deletes from tables InvolvedNoLocation and VehicleNoLocation, then from table AccidentsNoLocation
-    """
-
-    marker_ids_to_delete = db.session.query(AccidentMarker.provider_and_id) \
-        .filter(and_(AccidentMarker.accident_year == year), AccidentMarker.provider_code == provider_code).all()
-
-    marker_ids_to_delete = [acc_id[0] for acc_id in marker_ids_to_delete]
-
-    logging.info('There are ' + str(len(marker_ids_to_delete)) + ' accident ids to delete for year ' + str(year))
-
-    for ids_chunk in Utils.chunks(marker_ids_to_delete, batch_size):
-
-        logging.info('Deleting a chunk of ' + str(len(ids_chunk)))
-
-        q = db.session.query(Involved).filter(Involved.provider_and_id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from Involved')
-            q.delete(synchronize_session=False)
-            db.session.commit()
-
-        q = db.session.query(Vehicle).filter(Vehicle.provider_and_id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from Vehicle')
-            q.delete(synchronize_session=False)
-            db.session.commit()
-
-        q = db.session.query(AccidentMarker).filter(AccidentMarker.provider_and_id.in_(ids_chunk))
-        if q.all():
-            logging.info('deleting entries from AccidentMarker')
-            q.delete(synchronize_session=False)
-            db.session.commit()
+    logging.info('Deleting accidents starting ' + str(start_date))
+    total = 0
+    for table in (Involved, Vehicle):
+        deleted = db.session.query(table) \
+            .filter(tuple_(table.accident_id, table.provider_code, table.accident_year).in_(markers_to_delete)) \
+            .delete(synchronize_session=False)
+        logging.info('deleted ' + str(deleted) + ' entries from ' + table.__name__)
+        total += deleted
+    deleted = db.session.query(AccidentMarker) \
+        .filter(tuple_(AccidentMarker.id, AccidentMarker.provider_code, AccidentMarker.accident_year)
+                .in_(markers_to_delete)) \
+        .delete(synchronize_session=False)
+    logging.info('deleted ' + str(deleted) + ' entries from AccidentMarker')
+    db.session.commit()
+    return total + deleted
 
 
-def fill_db_geo_data():
+@instrumentation.timed_stage('delete_cbs_entries_from_email', rows=True)
+def delete_cbs_entries_from_email(provider_code, year):
     """
-    Fills empty geometry object according to coordinates in database
-    SRID = 4326
+    deletes all CBS markers in the database of year and with provider code provider_code,
+    with their involved and vehicles. the deletes are pruned to the year's partitions.
     """
-    db.session.execute('UPDATE cbs.markers SET geom = ST_SetSRID(ST_MakePoint(longitude,latitude),4326)\
-                           WHERE geom IS NULL;')
-    db.session.commit()
+    logging.info('Deleting accidents of provider_code ' + str(provider_code) + ' for year ' + str(year))
+    return cbs_partitions.delete_provider_year(provider_code, year)
 
 
 def get_provider_code(directory_name=None):
@@ -802,36 +1126,75 @@ def get_provider_code(directory_name=None):
             return int(ans)
 
 
-def read_dictionary(dictionary_file):
+def read_dictionary(dictionary_file, file_hash=None):
     cbs_dictionary = defaultdict(dict)
-    dictionary = pd.read_csv(dictionary_file, encoding=CONTENT_ENCODING)
+    dictionary = cbs_cache.read_csv(dictionary_file, file_hash, cbs_schema.DICTIONARY_SCHEMA)
     for _, dic in dictionary.iterrows():
         cbs_dictionary[int(dic[DICTCOLUMN1])][int(dic[DICTCOLUMN2])] = dic[DICTCOLUMN3]
     return cbs_dictionary
 
 
+def _dictionary_value_column(table):
+    """
+    the description column of a code table, the one besides id, year and provider_code
+    """
+    return [column for column in table.columns if column.name not in ('id', 'year', 'provider_code')][0]
+
+
+def _upsert_dictionary_entries(table, value_column, keys, entries):
+    """
+    a multi-row upsert of code table entries
+    :param keys: {column: value} of the key columns besides id
+    :param entries: {id: value}
+    :return: False if the table already holds the entries as they are, and nothing was written
+    """
+    existing = dict(db.session.query(table.c.id, value_column)
+                    .filter(*[table.c[column] == value for column, value in keys.items()]).all())
+    if all(inner_k in existing and existing[inner_k] == inner_v for inner_k, inner_v in entries.items()):
+        return False
+    sql_upsert = insert(table).values([dict(keys, id=inner_k, **{value_column.name: inner_v})
+                                       for inner_k, inner_v in entries.items()])
+    sql_upsert = sql_upsert.on_conflict_do_update(index_elements=[table.c.id] + [table.c[column] for column in keys],
+                                                  set_={value_column.name: sql_upsert.excluded[value_column.name]})
+    db.session.execute(sql_upsert)
+    return True
+
+
+@instrumentation.timed_stage('fill_dictionary_tables', rows=True)
 def fill_dictionary_tables(cbs_dictionary, provider_code, year):
+    """
+    writes the code tables of a directory, and their entries in cbs.code_dictionary, in a single transaction,
+    a multi-row upsert per table. tables that already hold this year and provider_code entries as they are,
+    are skipped.
+    :return: the number of written entries
+    """
     if year < 2008:
-        return
+        return 0
+    written = 0
+    code_dictionary = CodeDictionary.__table__
     for k, v in cbs_dictionary.items():
         if k == 97:
             continue
         try:
-            curr_table = TABLES_DICT[k]
+            model = CLASSES_DICT[k]
         except Exception as _:
             logging.info('A key ' + str(k) + ' was added to dictionary - update models, tables and classes')
             continue
-        for inner_k, inner_v in v.items():
-            sql_delete = 'DELETE FROM ' + 'cbs.' + curr_table + ' WHERE provider_code=' + str(
-                provider_code) + ' AND year=' + str(year) + ' AND id=' + str(inner_k)
-            db.session.execute(sql_delete)
-            db.session.commit()
-            sql_insert = 'INSERT INTO ' + 'cbs.' + curr_table + ' VALUES (' + str(inner_k) + ',' + str(year) + ',' + str(
-                provider_code) + ',' + "'" + inner_v.replace("'", '') + "'" + ')' + ' ON CONFLICT DO NOTHING'
-            db.session.execute(sql_insert)
-            db.session.commit()
-        logging.info('Inserted/Updated dictionary values into table ' + curr_table)
+        table = model.__table__
+        entries = {inner_k: None if pd.isnull(inner_v) else inner_v for inner_k, inner_v in v.items()}
+        if _upsert_dictionary_entries(table, _dictionary_value_column(table),
+                                      {'year': year, 'provider_code': provider_code}, entries):
+            written += len(entries)
+            logging.info('Inserted/Updated dictionary values into table ' + table.name)
+        else:
+            logging.debug('Dictionary values of table ' + table.name + ' are unchanged')
+        _upsert_dictionary_entries(code_dictionary, code_dictionary.c.hebrew,
+                                   {'table_id': CODE_DICTIONARY_TABLE_IDS[model],
+                                    'year': year,
+                                    'provider_code': provider_code}, entries)
+    db.session.commit()
     create_provider_code_table()
+    return written
 
 
 def truncate_dictionary_tables(dictionary_file):
@@ -842,83 +1205,291 @@ def truncate_dictionary_tables(dictionary_file):
         curr_table = TABLES_DICT[k]
         sql_truncate = 'TRUNCATE TABLE ' + curr_table
         db.session.execute(sql_truncate)
+        table_id = CODE_DICTIONARY_TABLE_IDS[CLASSES_DICT[k]]
+        db.session.query(CodeDictionary).filter(CodeDictionary.table_id == table_id).delete(synchronize_session=False)
         db.session.commit()
         logging.info('Truncated table ' + curr_table)
 
 
 def create_provider_code_table():
-    provider_code_table = 'provider_code'
-    provider_code_class = ProviderCode
-    table_entries = db.session.query(provider_code_class)
-    table_entries.delete()
+    """
+    upserts the provider codes instead of deleting and re-inserting them, so that the directories imported
+    in parallel (which all call this through fill_dictionary_tables) don't collide on the primary key
+    """
     provider_code_dict = {1: u'הלשכה המרכזית לסטטיסטיקה - סוג תיק 1', 2: u'איחוד הצלה',
                           3: u'הלשכה המרכזית לסטטיסטיקה - סוג תיק 3', 4: u'שומרי הדרך'}
-    for k, v in provider_code_dict.items():
-        sql_insert = 'INSERT INTO ' + 'cbs.' + provider_code_table + ' VALUES (' + str(k) + ',' + "'" + v + "'" + ')'
-        db.session.execute(sql_insert)
-        db.session.commit()
+    sql_upsert = insert(ProviderCode.__table__).values([{'id': k, 'provider_code_hebrew': v}
+                                                        for k, v in provider_code_dict.items()])
+    sql_upsert = sql_upsert.on_conflict_do_update(
+        index_elements=[ProviderCode.id],
+        set_={'provider_code_hebrew': sql_upsert.excluded.provider_code_hebrew})
+    db.session.execute(sql_upsert)
+    db.session.commit()
 
 
 def update_dictionary_tables(dir_name):
-    dir_list = glob.glob("{0}/*/*".format(dir_name))
-
-    for directory in sorted(dir_list, reverse=True):
-        directory_name = os.path.basename(os.path.normpath(directory))
-        year = directory_name[1:5] if directory_name[0] == 'H' else directory_name[0:4]
-        if int(year) < 2008:
+    for entry in reversed(get_catalog(dir_name)):
+        if entry.year is None or entry.year < 2008:
             continue
-        parent_directory = os.path.basename(os.path.dirname(os.path.join(os.pardir, directory)))
-        provider_code = get_provider_code(parent_directory)
-        logging.info("Importing Directory " + directory)
-        files_from_cbs = dict(get_files(directory))
-        if len(files_from_cbs) == 0:
-            return 0
-        logging.info("Filling dictionary for directory '{}'".format(directory))
-        fill_dictionary_tables(files_from_cbs[DICTIONARY], provider_code, int(year))
+        if DICTIONARY not in entry.files:
+            logging.warning("No dictionary file in directory '{}'".format(entry.directory))
+            continue
+        provider_code = entry.provider_code or get_provider_code()
+        logging.info("Filling dictionary for directory '{}'".format(entry.directory))
+        fill_dictionary_tables(read_dictionary(entry.files[DICTIONARY]), provider_code, entry.year)
 
 
-def get_file_type_and_year(file_path):
-    df = pd.read_csv(file_path, encoding=CONTENT_ENCODING)
-    provider_code = df.iloc[0][field_names.file_type.lower()]
-    year = df.iloc[0][field_names.accident_year]
-    return int(provider_code), int(year)
+def get_catalog(dir_name):
+    """
+    :return: the cbs_catalog entries of every provider/year directory of the CBS data directory
+    """
+    return cbs_catalog.scan(dir_name, cbs_files, ACCIDENTS)
+
+
+def get_directories_to_import(dir_name, load_start_year):
+    """
+    :return: (directory, provider_code, year) of every directory from load_start_year on, in import order
+    """
+    directories = []
+    for entry in get_catalog(dir_name):
+        if entry.year is None:
+            logging.warning("Skipping directory '{0}', its year is unknown".format(entry.directory))
+        elif entry.year >= int(load_start_year):
+            provider_code = entry.provider_code or get_provider_code()
+            directories.append((entry.directory, provider_code, entry.year))
+        else:
+            logging.info('Importing only starting year {0}. Directory {1} has year {2}'.format(
+                load_start_year, os.path.basename(entry.directory), entry.year))
+    return directories
+
+
+def group_directories_by_year(directories):
+    """
+    :param directories: (directory, provider_code, year) tuples
+    :return: {year: [(directory, provider_code)]}, in import order
+    """
+    years = OrderedDict()
+    for directory, provider_code, year in directories:
+        years.setdefault(year, []).append((directory, provider_code))
+    return years
+
+
+def import_year(year, directories, batch_size, loader, chunk_size=None, stream_chunk_size=None, swap=False,
+                attach=True, resume=False):
+    """
+    imports all the directories of a single year
+    :param directories: (directory, provider_code) of the year's directories
+    :param loader: the loader name
+    :param swap: loads the year into stand-alone tables in its staging schema, which get their indexes
+    and pass the sanity checks there. otherwise the rows are loaded into the year's partitions
+    as they are.
+    :param attach: swaps the loaded tables in for the year's partitions right away, otherwise that's left
+    to the caller
+    :param resume: with swap, keeps loading into the staging schema an interrupted run left, if there's one
+    :return: the number of imported items
+    """
+    if swap:
+        if resume and year in cbs_partitions.get_load_years():
+            logging.info("Resuming the load of year {0}".format(year))
+        else:
+            cbs_partitions.create_load_tables(year)
+        year_loader = get_loader(loader, db, chunk_size, schema=cbs_partitions.load_schema(year))
+    else:
+        cbs_partitions.create_year_partitions(year)
+        year_loader = get_loader(loader, db, chunk_size)
+    total = 0
+    try:
+        for directory, provider_code in directories:
+            logging.info("Importing Directory " + directory)
+            total += import_to_datastore(directory, provider_code, year, batch_size, year_loader,
+                                         stream_chunk_size)
+        if swap:
+            cbs_partitions.stage_year(year)
+            if attach:
+                cbs_partitions.attach_load_tables([year])
+    except Exception:
+        # the directories loaded so far are committed with their manifest entries, and are kept for --resume
+        db.session.rollback()
+        raise
+    return total
+
+
+def get_years_to_resume(directories, swap):
+    """
+    the directories an interrupted import didn't finish, by year. every finished directory is committed
+    with its manifest entry, into the year's partitions or, with swap, into its staging schema until the year
+    is attached - a year that isn't attached and has no staging schema anymore is imported all over again.
+    :param directories: (directory, provider_code, year) tuples
+    :return: {year: [(directory, provider_code)]} of the years that still have to be imported or attached
+    """
+    unfinished = group_directories_by_year(cbs_manifest.get_unfinished_directories(directories))
+    load_years = set(cbs_partitions.get_load_years()) if swap else set()
+    years = OrderedDict()
+    for year, year_directories in iteritems(group_directories_by_year(directories)):
+        if year in load_years:
+            years[year] = unfinished.get(year, [])
+        elif year in unfinished:
+            years[year] = year_directories if swap else unfinished[year]
+        else:
+            logging.info("Year {0} was already imported".format(year))
+    return years
+
+
+def import_year_in_worker(args):
+    """
+    imports a single year in a pool worker, over the worker's own database connection.
+    the worker's failed_dirs isn't seen by the parent process, so failures are returned instead of raised.
+    :param args: (year, directories, batch_size, loader name, chunk_size, stream_chunk_size, swap, attach, resume)
+    :return: (year, number of imported items, {directory: failure reason}, whether the year was imported,
+    the worker's instrumentation records of the year)
+    """
+    year, directories, batch_size, loader, chunk_size, stream_chunk_size, swap, attach, resume = args
+    imported = False
+    try:
+        items = import_year(year, directories, batch_size, loader, chunk_size, stream_chunk_size, swap, attach,
+                            resume)
+        imported = True
+    except Exception as e:
+        logging.exception("Failed importing year {0}".format(year))
+        db.session.rollback()
+        items = 0
+        for directory, _ in directories:
+            failed_dirs.setdefault(directory, str(e))
+    finally:
+        db.session.remove()
+    return year, items, {directory: failed_dirs[directory] for directory, _ in directories
+                         if directory in failed_dirs}, imported, instrumentation.report.pop_records()
+
+
+def _init_worker():
+    # a forked worker starts with a copy of the parent's report, its own records start empty
+    instrumentation.report.pop_records()
+
+
+def import_years_in_pool(years, workers, batch_size, loader, chunk_size, stream_chunk_size, swap, attach=True,
+                         resume=False):
+    """
+    parses, transforms and writes the years in a pool of worker processes, each with its own
+    database connection. every year has its own partitions (and staging schema), so the workers don't contend
+    on rows or tables.
+    :param years: {year: [(directory, provider_code)]}
+    :return: (the total number of imported items, the years that were imported)
+    """
+    # the engine's pooled connections must not be shared with the forked workers
+    db.session.remove()
+    db.engine.dispose()
+    total = 0
+    imported_years = []
+    pool = multiprocessing.Pool(processes=workers, initializer=_init_worker)
+    try:
+        tasks = [(year, directories, batch_size, loader, chunk_size, stream_chunk_size, swap, attach, resume)
+                 for year, directories in iteritems(years)]
+        for year, items, failures, imported, records in pool.imap_unordered(import_year_in_worker, tasks):
+            total += items
+            failed_dirs.update(failures)
+            instrumentation.report.extend(records)
+            if imported:
+                imported_years.append(year)
+        pool.close()
+    except Exception:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return total, imported_years
 
 
 def main(delete_all=True,
          delete_start_date='01-01-2008',
-         load_start_year=2008):
+         load_start_year=2008,
+         loader='orm',
+         chunk_size=None,
+         stream_chunk_size=None,
+         workers=1,
+         incremental=False,
+         staging=False,
+         resume=False,
+         report_path=None):
+    """
+    :param delete_all: reload everything - every imported year is loaded aside and swapped in for its
+    partitions, and the partitions of the years that aren't imported are dropped
+    :param loader: how rows are written to the database - 'orm' (bulk inserts) or 'copy' (PostgreSQL COPY)
+    :param chunk_size: rows per insert/COPY chunk, the loader's default if None
+    :param stream_chunk_size: streaming mode - the data files are read and imported that many rows at a time,
+    so memory use doesn't depend on the files size
+    :param workers: number of processes importing years in parallel, 1 imports them one by one
+    :param incremental: reload only the directories whose content changed since their last import,
+    by the import manifest, instead of deleting and reloading everything. delete_all and delete_start_date
+    are ignored.
+    :param staging: with delete_all, every year is loaded and checked in its staging schema and all of them
+    are swapped in together, in a single transaction, once they are all ready. if any year fails, nothing is
+    swapped and the current data stays as is.
+    :param resume: continues an interrupted delete_all or delete_start_date import with the same options,
+    without deleting anything first: the directories it finished, which are committed with their import manifest
+    entries, are skipped and the rest are imported
+    :param report_path: writes the instrumentation report of the import there, as JSON
+    the materialized views that were created are refreshed at the end, for the imported and dropped years only
+    """
 
     logging.info('in main')
     batch_size = 5000
     dir_name = 'data/cbs'
-    dir_list = glob.glob("{0}/*/*".format(dir_name))
+    report = instrumentation.start(db.engine)
 
-    # wipe all the AccidentMarker and Vehicle and Involved data first
-    if delete_all:
-        Utils.truncate_tables(db, (Vehicle, Involved, AccidentMarker))
-    elif delete_start_date is not None:
-        delete_cbs_entries(delete_start_date, batch_size)
     started = datetime.now()
-    total = 0
-    logging.info(str(dir_list))
-    for directory in sorted(dir_list, reverse=False):
-        logging.info(directory)
-        directory_name = os.path.basename(os.path.normpath(directory))
-        year = directory_name[1:5] if directory_name[0] == 'H' else directory_name[0:4]
-        if int(year) >= int(load_start_year):
-            parent_directory = os.path.basename(os.path.dirname(os.path.join(os.pardir, directory)))
-            provider_code = get_provider_code(parent_directory)
-            logging.info("Importing Directory " + directory)
-            total += import_to_datastore(directory, provider_code, int(year), batch_size)
+    directories = get_directories_to_import(dir_name, load_start_year)
+    swap = False
+    drop_years = []
+    if incremental:
+        if cbs_partitions.get_load_years():
+            raise ValueError("An interrupted full import left years that weren't swapped in, "
+                             "finish it with --resume before importing incrementally")
+        directories = cbs_manifest.get_changed_directories(directories)
+        for directory, provider_code, year in directories:
+            cbs_manifest.delete_directory_entries(provider_code, year)
+    else:
+        if delete_all:
+            # the imported years replace their partitions when loaded, the rest are dropped
+            swap = True
+            imported_years = set(year for _, _, year in directories)
+            drop_years = [year for year in cbs_partitions.get_partition_years() if year not in imported_years]
+            if not staging:
+                for year in drop_years:
+                    cbs_partitions.drop_year_partitions(year)
+        elif delete_start_date is not None and not resume:
+            delete_cbs_entries(delete_start_date)
+        if not resume:
+            cbs_manifest.clear_manifest()
+    if resume and not incremental:
+        years = get_years_to_resume(directories, swap)
+    else:
+        years = group_directories_by_year(directories)
+    logging.info(str([directory for year_directories in years.values() for directory, _ in year_directories]))
+    attach = not (swap and staging)
+    if workers > 1:
+        total, imported_years = import_years_in_pool(years, workers, batch_size, loader, chunk_size,
+                                                     stream_chunk_size, swap, attach, resume)
+    else:
+        total = 0
+        imported_years = []
+        for year, year_directories in iteritems(years):
+            total += import_year(year, year_directories, batch_size, loader, chunk_size, stream_chunk_size,
+                                 swap, attach, resume)
+            imported_years.append(year)
+    if not attach:
+        if set(imported_years) == set(years):
+            cbs_partitions.attach_load_tables(sorted(imported_years), drop_years)
         else:
-            logging.info('Importing only starting year {0}. Directory {1} has year {2}'.format(load_start_year,
-                                                                                               directory_name,
-                                                                                               year))
-        fill_db_geo_data()
-
-        failed = ["\t'{0}' ({1})".format(directory, fail_reason) for directory, fail_reason in
-                  iteritems(failed_dirs)]
-        logging.info("Finished processing all directories{0}{1}".format(", except:\n" if failed else "",
-                                                                        "\n".join(failed)))
-        logging.info("Total: {0} items in {1}".format(total, Utils.time_delta(started)))
-
+            logging.error("Not all the years were staged, the current data was left as is. "
+                          "Run again with --resume to continue from the directories that weren't imported")
+
+    materialized_views.refresh(list(years) + drop_years)
+
+    failed = ["\t'{0}' ({1})".format(directory, fail_reason) for directory, fail_reason in
+              iteritems(failed_dirs)]
+    logging.info("Finished processing all directories{0}{1}".format(", except:\n" if failed else "",
+                                                                    "\n".join(failed)))
+    logging.info("Total: {0} items in {1}".format(total, Utils.time_delta(started)))
+    logging.info("Import stages:\n" + report.summary_table())
+    if report_path:
+        report.write_json(report_path)
@@ -0,0 +1,236 @@
+"""
+benchmarks of the CBS importer stages, on a directory of CBS files - a synthetic one from cbs_synthetic
+when the real files aren't at hand - and of the queries that read the imported data. every benchmark is recorded in the instrumentation report,
+so runs can be compared by their rows/sec.
+"""
+import datetime
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from anyway.apis.markers import query as markers_query
+from anyway.common.models.cbs_models import CodeDictionary
+from anyway.common.views.cbs_views import Views
+from anyway.core import field_names, instrumentation
+from anyway.core.constants import CONST
+from anyway.core.loaders import get_loader
+from anyway.parsers import cbs, cbs_manifest, cbs_partitions, cbs_schema
+
+from anyway import db
+
+
+def benchmark_get_files(directory):
+    with instrumentation.measure('benchmark_get_files', directory) as record:
+        files = cbs.get_files(directory)
+        record['rows'] = sum(len(files[name]) for name in (cbs.ACCIDENTS, cbs.INVOLVED, cbs.VEHICLES))
+    return files
+
+
+def benchmark_create_marker(accidents, streets, roads, non_urban_intersection):
+    with instrumentation.measure('benchmark_create_marker') as record:
+        for _, accident in accidents.iterrows():
+            cbs.create_marker(accident, streets, roads, non_urban_intersection)
+        record['rows'] = len(accidents)
+
+
+def benchmark_create_markers(accidents, streets, roads, non_urban_intersection):
+    with instrumentation.measure('benchmark_create_markers') as record:
+        record['rows'] = sum(len(markers) for markers in cbs.create_markers(accidents, streets, roads,
+                                                                            non_urban_intersection))
+
+
+def benchmark_get_junction(accidents, roads):
+    with instrumentation.measure('benchmark_get_junction') as record:
+        for _, accident in accidents.iterrows():
+            cbs.get_junction(accident, roads)
+        record['rows'] = len(accidents)
+
+
+def benchmark_get_street(accidents, streets):
+    keys = list(zip(accidents[field_names.yishuv_symbol].tolist(), accidents[field_names.street1].tolist()))
+    with instrumentation.measure('benchmark_get_street') as record:
+        for yishuv_symbol, street_sign in keys:
+            cbs.get_street(yishuv_symbol, street_sign, streets)
+        record['rows'] = len(keys)
+
+
+HEBREW_VIEWS = (('markers_hebrew', Views.MARKERS_HEBREW_VIEW),
+                ('involved_hebrew', Views.INVOLVED_HEBREW_VIEW),
+                ('vehicles_hebrew', Views.VEHICLES_HEBREW_VIEW))
+
+
+def benchmark_hebrew_views(year, repeat=3):
+    """
+    reads a year of rows from the queries of the Hebrew views, without creating them, repeat times each -
+    run against the same database before and after the views change to compare them
+    """
+    for name, view in HEBREW_VIEWS:
+        query = 'SELECT * FROM ({0}) AS {1} WHERE accident_year = :year'.format(view.strip().rstrip(';'), name)
+        for _ in range(repeat):
+            with instrumentation.measure('benchmark_' + name) as record:
+                record['rows'] = len(db.session.execute(query, {'year': year}).fetchall())
+    db.session.rollback()
+
+
+# the size of a city-sized map viewport, in degrees - about 5 km by 4.5 km
+VIEWPORT_WIDTH = 0.05
+VIEWPORT_HEIGHT = 0.04
+
+
+def city_viewports(year, count, seed=0):
+    """
+    :param seed: the seed of the random markers, between -1 and 1
+    :return: count city-sized viewports, (ne_lat, ne_lng, sw_lat, sw_lng), centered on random markers of the year
+    """
+    db.session.execute('SELECT setseed(:seed)', {'seed': seed})
+    rows = db.session.execute('SELECT latitude, longitude FROM cbs.markers '
+                              'WHERE accident_year = :year AND geom IS NOT NULL ORDER BY random() LIMIT :count',
+                              {'year': year, 'count': count}).fetchall()
+    db.session.rollback()
+    return [(latitude + VIEWPORT_HEIGHT / 2, longitude + VIEWPORT_WIDTH / 2,
+             latitude - VIEWPORT_HEIGHT / 2, longitude - VIEWPORT_WIDTH / 2) for latitude, longitude in rows]
+
+
+def benchmark_markers(viewports, year, zoom):
+    """
+    reads the markers of every viewport in the year with the /markers API query, one after the other
+    """
+    for viewport in viewports:
+        markers_filter = markers_query.make_filter(*viewport, zoom=zoom, start_date=datetime.date(year, 1, 1),
+                                                   end_date=datetime.date(year, 12, 31))
+        with instrumentation.measure('benchmark_markers') as record:
+            record['rows'] = len(markers_query.get_markers(markers_filter))
+        db.session.rollback()
+
+
+def benchmark_markers_api(url, viewports, year, zoom, concurrency):
+    """
+    requests the markers of every viewport in the year from a running /markers API, concurrency requests at a time
+    """
+    import requests
+
+    def get(viewport):
+        params = dict(zip(('ne_lat', 'ne_lng', 'sw_lat', 'sw_lng'), viewport),
+                      zoom=zoom, start_date='{0}-01-01'.format(year), end_date='{0}-12-31'.format(year))
+        with instrumentation.measure('benchmark_markers_api') as record:
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            record['rows'] = len(response.json())
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(get, viewports))
+
+
+def percentile(values, percent):
+    """
+    :return: the nearest-rank percentile of the values
+    """
+    values = sorted(values)
+    return values[max(int(math.ceil(percent / 100.0 * len(values))) - 1, 0)]
+
+
+def _delete_dictionary_entries(provider_code, year):
+    for model in list(cbs.CLASSES_DICT.values()) + [CodeDictionary]:
+        db.session.query(model).filter(model.year == year, model.provider_code == provider_code) \
+            .delete(synchronize_session=False)
+    db.session.commit()
+
+
+def benchmark_import_to_datastore(directory, provider_code, year, batch_size, loader='orm', chunk_size=None,
+                                  stream_chunk_size=None):
+    """
+    imports the directory into empty partitions of its year, then drops them and the year's dictionary
+    and manifest entries, leaving the database as it was
+    :raises ValueError: when the year already has data in the database
+    """
+    if year in cbs_partitions.get_partition_years():
+        raise ValueError("Year {0} already has markers in the database, "
+                         "benchmark the import with a year that doesn't".format(year))
+    cbs_partitions.create_year_partitions(year)
+    try:
+        return cbs.import_to_datastore(directory, provider_code, year, batch_size,
+                                       get_loader(loader, db, chunk_size), stream_chunk_size)
+    finally:
+        db.session.rollback()
+        cbs_partitions.drop_year_partitions(year)
+        cbs_manifest.forget_import(provider_code, year)
+        _delete_dictionary_entries(provider_code, year)
+
+
+def main(directory, sample=None, import_data=True, loader='orm', chunk_size=None, stream_chunk_size=None,
+         report_path=None):
+    """
+    :param sample: the per-row benchmarks (create_marker, get_junction and get_street) run on that many
+    accidents, on all of them if None
+    :param import_data: also benchmark the whole import_to_datastore against the database
+    :param report_path: writes the benchmarks report there, as JSON
+    """
+    report = instrumentation.start(db.engine)
+    files = benchmark_get_files(directory)
+    accidents = cbs_schema.widen(files[cbs.ACCIDENTS])
+    sampled = accidents if sample is None else accidents.head(sample)
+    benchmark_create_marker(sampled, files[cbs.STREETS], files[cbs.ROADS], files[cbs.NON_URBAN_INTERSECTION])
+    benchmark_create_markers(accidents, files[cbs.STREETS], files[cbs.ROADS], files[cbs.NON_URBAN_INTERSECTION])
+    benchmark_get_junction(sampled, files[cbs.ROADS])
+    benchmark_get_street(sampled, files[cbs.STREETS])
+    if import_data:
+        provider_code = int(accidents[field_names.file_type].iloc[0])
+        year = int(accidents[field_names.accident_year].iloc[0])
+        benchmark_import_to_datastore(directory, provider_code, year, 5000, loader, chunk_size, stream_chunk_size)
+    logging.info("Benchmarks:\n" + report.summary_table())
+    if report_path:
+        report.write_json(report_path)
+
+
+def views_main(year=None, repeat=3, report_path=None):
+    """
+    :param year: the year read from the views, the latest one in the database if None
+    :param report_path: writes the benchmarks report there, as JSON
+    """
+    report = instrumentation.start(db.engine)
+    if year is None:
+        years = cbs_partitions.get_partition_years()
+        if not years:
+            raise ValueError("There are no markers in the database to read from the views")
+        year = years[-1]
+    benchmark_hebrew_views(year, repeat)
+    logging.info("Benchmarks:\n" + report.summary_table())
+    if report_path:
+        report.write_json(report_path)
+
+
+def markers_main(year=None, viewports=200, zoom=None, url=None, concurrency=1, p95_budget_ms=100, seed=0.5,
+                 report_path=None):
+    """
+    the load test of the /markers query - the markers of city-sized viewports in a year, read from the database or
+    requested from a running API
+    :param year: the year of the markers, the latest one in the database if None
+    :param zoom: the map zoom of the requests, CONST.MINIMAL_ZOOM if None
+    :param url: the /markers API url, the query is run against the database directly if None
+    :param p95_budget_ms: the 95th percentile latency the load test passes under
+    :param seed: the seed of the viewports, the same seed gives the same viewports of a year
+    :param report_path: writes the benchmarks report there, as JSON
+    :return: whether the 95th percentile latency is under p95_budget_ms
+    """
+    report = instrumentation.start(db.engine)
+    if year is None:
+        years = cbs_partitions.get_partition_years()
+        if not years:
+            raise ValueError("There are no markers in the database to read")
+        year = years[-1]
+    sampled = city_viewports(year, viewports, seed)
+    if not sampled:
+        raise ValueError("Year {0} has no markers with a location to center viewports on".format(year))
+    zoom = CONST.MINIMAL_ZOOM if zoom is None else zoom
+    if url is None:
+        benchmark_markers(sampled, year, zoom)
+    else:
+        benchmark_markers_api(url, sampled, year, zoom, concurrency)
+    milliseconds = [record['seconds'] * 1000 for record in report.records if record['stage'].startswith('benchmark')]
+    p95 = percentile(milliseconds, 95)
+    logging.info("Benchmarks:\n" + report.summary_table())
+    logging.info('{0} viewports of year {1}: p50 {2:.0f} ms, p95 {3:.0f} ms, max {4:.0f} ms (budget {5} ms)'.format(
+        len(milliseconds), year, percentile(milliseconds, 50), p95, max(milliseconds), p95_budget_ms))
+    if report_path:
+        report.write_json(report_path)
+    return p95 < p95_budget_ms
@@ -0,0 +1,126 @@
+"""
+a local cache of the parsed CBS CSV files, as Parquet files keyed by the sha256 of the source file.
+a CSV is decoded from cp1255 and parsed once, every later read of the same content loads the typed columns
+from the Parquet copy. the cache is off when pyarrow isn't installed.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+from anyway.parsers import cbs_manifest, cbs_schema
+from anyway.parsers.cbs_dictionaries import CONTENT_ENCODING
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # the cache is optional
+    pyarrow = None
+
+CACHE_DIR = 'data/cbs_cache'
+# bumped when the way the CSV files are parsed changes, so that older cached copies aren't read
+CACHE_VERSION = 2
+ROW_GROUP_SIZE = 50000
+
+
+def is_enabled():
+    return pyarrow is not None
+
+
+def _schema_key(schema):
+    if schema is None:
+        return 'all'
+    return hashlib.sha1(json.dumps(list(schema.items())).encode('utf-8')).hexdigest()[:8]
+
+
+def cache_path(file_hash, schema=None):
+    """
+    the copy of a file read with a schema holds only the schema's columns, so it's keyed by the schema too
+    """
+    return os.path.join(CACHE_DIR, '{0}.{1}.v{2}.parquet'.format(file_hash, _schema_key(schema), CACHE_VERSION))
+
+
+def parse_csv(file_path, schema=None, **kwargs):
+    """
+    parses a CBS CSV file, with upper case column names
+    :param schema: {upper case column: dtype} of cbs_schema - only its columns are read, with its dtypes.
+    chunks (when chunksize is given) are read without the dtypes, cast them with cbs_schema.cast
+    """
+    if schema is not None:
+        header = pd.read_csv(file_path, encoding=CONTENT_ENCODING, nrows=0).columns
+        kwargs['usecols'], dtype = cbs_schema.read_options(header, schema)
+        if 'chunksize' not in kwargs:
+            try:
+                data = pd.read_csv(file_path, encoding=CONTENT_ENCODING, dtype=dtype, **kwargs)
+                data.columns = [column.upper() for column in data.columns]
+                return data
+            except (TypeError, ValueError, OverflowError) as e:
+                logging.warning("Couldn't parse '{0}' with its dtypes, casting it column by column: {1}".format(
+                    file_path, e))
+    data = pd.read_csv(file_path, encoding=CONTENT_ENCODING, **kwargs)
+    if isinstance(data, pd.DataFrame):
+        data.columns = [column.upper() for column in data.columns]
+        if schema is not None:
+            data = cbs_schema.cast(data, schema)
+    return data
+
+
+def _write(path, data):
+    if not os.path.exists(CACHE_DIR):
+        try:
+            os.makedirs(CACHE_DIR)
+        except OSError:  # created by a parallel import
+            pass
+    # written aside and renamed, so that a parallel import never reads a partial file
+    descriptor, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    os.close(descriptor)
+    try:
+        table = pyarrow.Table.from_pandas(data, preserve_index=False)
+        pyarrow.parquet.write_table(table, temp_path, row_group_size=ROW_GROUP_SIZE)
+        os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def read_csv(file_path, file_hash=None, schema=None):
+    """
+    reads a CBS CSV file from its cached copy, parsing and caching it if there's none
+    :param file_hash: the sha256 of the file, if it's known already
+    :param schema: reads only the columns of a cbs_schema, with its dtypes
+    :return: the DataFrame of the file, with upper case column names
+    """
+    if not is_enabled():
+        return parse_csv(file_path, schema)
+    path = cache_path(file_hash or cbs_manifest.hash_file(file_path), schema)
+    if os.path.exists(path):
+        return pyarrow.parquet.read_table(path).to_pandas()
+    data = parse_csv(file_path, schema)
+    try:
+        _write(path, data)
+    except Exception as e:
+        logging.warning("Couldn't cache '{0}': {1}".format(file_path, e))
+    return data
+
+
+def iter_csv_chunks(file_path, chunksize, file_hash=None, schema=None):
+    """
+    reads a CBS CSV file chunksize rows at a time at most, from its cached copy if there's one.
+    the copy is written by the whole-file reads only, so that streaming never holds the whole file in memory.
+    :param schema: reads only the columns of a cbs_schema, with its dtypes
+    """
+    if is_enabled():
+        path = cache_path(file_hash or cbs_manifest.hash_file(file_path), schema)
+        if os.path.exists(path):
+            parquet_file = pyarrow.parquet.ParquetFile(path)
+            for row_group in range(parquet_file.num_row_groups):
+                data = parquet_file.read_row_group(row_group).to_pandas()
+                for start in range(0, len(data), chunksize):
+                    yield data.iloc[start:start + chunksize].reset_index(drop=True)
+            return
+    for chunk in parse_csv(file_path, schema, chunksize=chunksize):
+        chunk.columns = [column.upper() for column in chunk.columns]
+        yield chunk if schema is None else cbs_schema.cast(chunk, schema)
@@ -0,0 +1,148 @@
+"""
+the catalog of a CBS data directory: (directory, provider_code, year, file paths) of every provider/year directory,
+found by listing the directories and reading at most the header and first row of their AccData file.
+it's cached in the data directory and an entry is rescanned only when its directory or one of its files changed,
+so planning a reload doesn't read the data files.
+"""
+import glob
+import json
+import logging
+import os
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+from anyway.core import field_names
+from anyway.parsers.cbs_dictionaries import CONTENT_ENCODING
+
+CATALOG_FILE = '.cbs_catalog.json'
+CATALOG_VERSION = 1
+
+ACCIDENT_TYPE_REGEX = re.compile(r"accidents_type_(?P<type>\d)")
+
+CatalogEntry = namedtuple('CatalogEntry', ['directory', 'provider_code', 'year', 'files'])
+
+
+def probe_file(file_path, fields):
+    """
+    reads the header and the first row of a CBS CSV file
+    :return: {field: first row value} of the given fields, None for fields the file doesn't have
+    """
+    first_row = pd.read_csv(file_path, encoding=CONTENT_ENCODING, nrows=1)
+    first_row.columns = [column.upper() for column in first_row.columns]
+    if first_row.empty:
+        return dict.fromkeys(fields)
+    return {field: first_row[field].iloc[0] if field in first_row else None for field in fields}
+
+
+def get_file_type_and_year(file_path):
+    """
+    :return: the provider code and year of a CBS data file, from its first row
+    """
+    values = probe_file(file_path, (field_names.file_type, field_names.accident_year))
+    return int(values[field_names.file_type]), int(values[field_names.accident_year])
+
+
+def find_files(directory, file_names):
+    """
+    :param file_names: {name: file name}, a file matches when its name contains the file name, case insensitively
+    :return: {name: path} of the files that match exactly one file of the directory
+    """
+    paths = os.listdir(directory)
+    files = {}
+    for name, file_name in file_names.items():
+        matches = [path for path in paths if file_name.lower() in path.lower()]
+        if len(matches) == 1:
+            files[name] = os.path.join(directory, matches[0])
+    return files
+
+
+def _directory_year(directory):
+    directory_name = os.path.basename(os.path.normpath(directory))
+    year = directory_name[1:5] if directory_name[0] == 'H' else directory_name[0:4]
+    return int(year) if year.isdigit() else None
+
+
+def _directory_provider_code(directory):
+    parent_directory = os.path.basename(os.path.dirname(os.path.normpath(directory)))
+    match = ACCIDENT_TYPE_REGEX.match(parent_directory)
+    return int(match.groupdict()['type']) if match else None
+
+
+def scan_directory(directory, file_names, accidents_name):
+    """
+    :param accidents_name: the name of the AccData file in file_names, probed when the provider code or the year
+    can't be told by the directory names
+    :return: the CatalogEntry of the directory, its provider_code or year are None when they are unknown
+    """
+    files = find_files(directory, file_names)
+    provider_code = _directory_provider_code(directory)
+    year = _directory_year(directory)
+    if (provider_code is None or year is None) and accidents_name in files:
+        probed_provider_code, probed_year = get_file_type_and_year(files[accidents_name])
+        provider_code = probed_provider_code if provider_code is None else provider_code
+        year = probed_year if year is None else year
+    return CatalogEntry(directory, provider_code, year, files)
+
+
+def _stamp(directory, files):
+    """
+    changes when a file is added to, removed from or renamed in the directory, or when one of its files changes
+    :return: the stamp, or None if one of the files is gone
+    """
+    try:
+        stamp = [os.stat(directory).st_mtime]
+        for path in sorted(files.values()):
+            path_stat = os.stat(path)
+            stamp.extend([path, path_stat.st_size, path_stat.st_mtime])
+    except OSError:
+        return None
+    return stamp
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    return cache.get('entries', {}) if cache.get('version') == CATALOG_VERSION else {}
+
+
+def _write_cache(cache_path, entries):
+    try:
+        with open(cache_path, 'w') as f:
+            json.dump({'version': CATALOG_VERSION, 'entries': entries}, f, indent=2, sort_keys=True)
+    except (IOError, OSError) as e:
+        logging.warning("Couldn't write the CBS catalog cache '{0}': {1}".format(cache_path, e))
+
+
+def scan(dir_name, file_names, accidents_name, use_cache=True):
+    """
+    lists the provider/year directories of a CBS data directory - <dir_name>/<provider directory>/<year directory>
+    :param use_cache: reuses the cached entries of the directories that didn't change, and updates the cache
+    :return: the CatalogEntry of every directory, sorted by path
+    """
+    cache_path = os.path.join(dir_name, CATALOG_FILE)
+    cached = _read_cache(cache_path) if use_cache else {}
+    entries = []
+    scanned = {}
+    for directory in sorted(glob.glob("{0}/*/*".format(dir_name))):
+        if not os.path.isdir(directory):
+            continue
+        cached_entry = cached.get(directory)
+        stamp = _stamp(directory, cached_entry['files']) if cached_entry is not None else None
+        if stamp is not None and stamp == cached_entry['stamp']:
+            entry = CatalogEntry(directory, cached_entry['provider_code'], cached_entry['year'], cached_entry['files'])
+        else:
+            entry = scan_directory(directory, file_names, accidents_name)
+            stamp = _stamp(directory, entry.files)
+        scanned[directory] = {'provider_code': entry.provider_code,
+                              'year': entry.year,
+                              'files': entry.files,
+                              'stamp': stamp}
+        entries.append(entry)
+    if use_cache and scanned != cached:
+        _write_cache(cache_path, scanned)
+    return entries
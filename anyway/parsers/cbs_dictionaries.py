@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from anyway.core import field_names
+
+CONTENT_ENCODING = 'cp1255'
+
+# the nearest junction has to be closer than that, in the units of the CBS km field
+MAX_JUNCTION_DISTANCE = 100000
+
+
+class StreetsDictionary(object):
+    """
+    (yishuv_symbol, street_sign) -> street name index of a CBS DicStreets file.
+    built once per directory and shared by every lookup of the importer.
+    """
+
+    def __init__(self, streets):
+        """
+        :param streets: the DicStreets DataFrame, with upper case column names
+        """
+        streets = streets[[field_names.settlement, field_names.street_sign, field_names.street_name]] \
+            .dropna(subset=[field_names.settlement, field_names.street_sign])
+        keys = [field_names.settlement, field_names.street_sign]
+        # a street sign that appears more than once in a settlement is ambiguous and has no name
+        streets = streets[~streets.duplicated(subset=keys, keep=False)].dropna(subset=[field_names.street_name])
+        self._streets = pd.DataFrame({field_names.settlement: streets[field_names.settlement].astype(float).values,
+                                      field_names.street_sign: streets[field_names.street_sign].astype(float).values,
+                                      field_names.street_name: streets[field_names.street_name].astype(object).values})
+        self._names = dict(zip(zip(self._streets[field_names.settlement].tolist(),
+                                   self._streets[field_names.street_sign].tolist()),
+                               self._streets[field_names.street_name].tolist()))
+
+    @classmethod
+    def from_csv(cls, file_path, encoding=CONTENT_ENCODING):
+        streets = pd.read_csv(file_path, encoding=encoding)
+        streets.columns = [column.upper() for column in streets.columns]
+        return cls(streets)
+
+    def __len__(self):
+        return len(self._names)
+
+    def get(self, yishuv_symbol, street_sign):
+        """
+        :return: the street name, or an empty string if it wasn't found
+        """
+        return self._names.get((yishuv_symbol, street_sign), u"")
+
+    def get_many(self, yishuv_symbols, street_signs):
+        """
+        vectorized get over whole columns
+        :return: a list of street names, with an empty string where the street wasn't found
+        """
+        keys = pd.DataFrame({field_names.settlement: pd.Series(yishuv_symbols).astype(float).values,
+                             field_names.street_sign: pd.Series(street_signs).astype(float).values})
+        names = keys.merge(self._streets, how='left', on=[field_names.settlement, field_names.street_sign])
+        return names[field_names.street_name].fillna(u"").tolist()
+
+
+def describe_junction(road, km, junction_km, junction):
+    """
+    :return: the junction name, with the distance and direction from it when the accident isn't at the junction
+    """
+    if not junction:
+        return u""
+    if km - junction_km > 0:
+        direction = u"צפונית" if road % 2 == 0 else u"מזרחית"
+    else:
+        direction = u"דרומית" if road % 2 == 0 else u"מערבית"
+    distance = abs(float(km - junction_km) / 10)
+    if distance >= 1:
+        return str(distance) + u" ק״מ " + direction + u" ל" + junction
+    elif 0 < distance < 1:
+        return str(int(distance * 1000)) + u" מטרים " + direction + u" ל" + junction
+    return junction
+
+
+def _nearest_positions(kms, orders, targets):
+    """
+    finds for each target km the position of the closest junction km.
+    kms is sorted (stably, so equal kms keep the file order) and ties go to the junction that appears first
+    in the file, the same one the linear scan used to pick.
+    :return: an array of positions in kms, -1 where there is no junction close enough
+    """
+    count = len(kms)
+    above = np.searchsorted(kms, targets, side='left')
+    has_above = above < count
+    has_below = above > 0
+    above = np.minimum(above, count - 1)
+    # the first of the junctions sharing the km just below the target
+    below = np.searchsorted(kms, kms[np.maximum(above - 1, 0)], side='left')
+    below = np.where(has_above, below, np.searchsorted(kms, kms[count - 1], side='left'))
+    with np.errstate(invalid='ignore'):
+        above_distance = np.where(has_above, np.abs(targets - kms[above]), np.inf)
+        below_distance = np.where(has_below, np.abs(targets - kms[below]), np.inf)
+        take_below = (below_distance < above_distance) | \
+                     ((below_distance == above_distance) & (orders[below] < orders[above]))
+        positions = np.where(take_below, below, above)
+        positions[~(np.minimum(below_distance, above_distance) < MAX_JUNCTION_DISTANCE)] = -1
+    return positions
+
+
+class JunctionsIndex(object):
+    """
+    index of a CBS IntersectNonUrban file:
+    exact (road1, road2, km) -> junction name lookups, and per road sorted km arrays for
+    finding the nearest junction on the accident road with a binary search.
+    """
+
+    def __init__(self, intersections):
+        """
+        :param intersections: the IntersectNonUrban DataFrame, with upper case column names
+        """
+        keys = zip(intersections[field_names.road1].tolist(),
+                   intersections[field_names.road2].tolist(),
+                   intersections[field_names.km].tolist())
+        self._junctions = dict(zip(keys, intersections[field_names.junction_name].tolist()))
+
+        junctions = pd.DataFrame(list(self._junctions.keys()), columns=[field_names.road1,
+                                                                        field_names.road2,
+                                                                        field_names.km])
+        junctions['order'] = np.arange(len(junctions))
+        junctions[field_names.junction_name] = list(self._junctions.values())
+        junctions = junctions.dropna(subset=[field_names.road1, field_names.km])
+        self._roads = {}
+        for road, road_junctions in junctions.groupby(field_names.road1):
+            road_junctions = road_junctions.sort_values(field_names.km, kind='mergesort')
+            self._roads[road] = (road_junctions[field_names.km].values.astype(float),
+                                 road_junctions['order'].values,
+                                 road_junctions[field_names.junction_name].tolist())
+
+    def __len__(self):
+        return len(self._junctions)
+
+    def get(self, key, default=None):
+        """
+        :param key: a (road1, road2, km) tuple
+        """
+        return self._junctions.get(key, default)
+
+    def nearest(self, road, km):
+        """
+        :return: (junction km, junction name) of the closest junction on the road, or None
+        """
+        if road not in self._roads or km is None:
+            return None
+        kms, orders, names = self._roads[road]
+        position = _nearest_positions(kms, orders, np.array([km], dtype=float))[0]
+        if position < 0:
+            return None
+        return kms[position].item(), names[position]
+
+    def get_junction(self, accident):
+        """
+        extracts the junction text of a single accident
+        """
+        km = accident.get(field_names.km)
+        if km is not None and accident.get(field_names.non_urban_intersection) is None:
+            road = accident.get(field_names.road1)
+            junction = self.nearest(road, km)
+            if junction is None:
+                return u""
+            return describe_junction(road, km, *junction)
+        elif accident.get(field_names.non_urban_intersection) is not None:
+            key = accident.get(field_names.road1), accident.get(field_names.road2), accident.get(field_names.km)
+            junction = self._junctions.get(key, None)
+            return junction if junction else u""
+        return u""
+
+    def get_junctions(self, accidents):
+        """
+        get_junction over a whole DataFrame of accidents
+        :return: a list of junction texts, in the accidents order
+        """
+        length = len(accidents)
+        if field_names.km in accidents and field_names.non_urban_intersection not in accidents:
+            junctions = [u""] * length
+            if field_names.road1 not in accidents:
+                return junctions
+            roads = accidents[field_names.road1].values
+            kms = accidents[field_names.km].astype(float).values
+            for road in pd.unique(roads):
+                if road not in self._roads:
+                    continue
+                road_kms, orders, names = self._roads[road]
+                rows = np.flatnonzero(roads == road)
+                positions = _nearest_positions(road_kms, orders, kms[rows])
+                for row, position in zip(rows.tolist(), positions.tolist()):
+                    if position >= 0:
+                        junctions[row] = describe_junction(road, kms[row].item(), road_kms[position].item(),
+                                                           names[position])
+            return junctions
+        elif field_names.non_urban_intersection in accidents:
+            keys = zip(*[accidents[field].tolist() if field in accidents else [None] * length
+                         for field in (field_names.road1, field_names.road2, field_names.km)])
+            return [self._junctions.get(key, None) or u"" for key in keys]
+        return [u""] * length
+
+
+class RoadSegmentsIndex(object):
+    """
+    interval index of the road segments: road -> the sorted from/to kms of its segments.
+    a km matches the segments whose [from_km, to_km] contains it, like the BETWEEN the views used to join on,
+    and where segments overlap the one with the lowest segment_id is taken.
+    """
+
+    # the markers km is in the CBS units of 100 meters, the segments kms are in kilometers
+    KM_UNITS = 10
+
+    def __init__(self, segments):
+        """
+        :param segments: (segment_id, road, from_km, to_km) tuples, the rows of cbs.road_segments
+        """
+        by_road = {}
+        for segment_id, road, from_km, to_km in segments:
+            if segment_id is None or road is None or from_km is None or to_km is None or from_km > to_km:
+                continue
+            by_road.setdefault(road, []).append((segment_id, float(from_km), float(to_km)))
+        self._roads = {road: self._build(road_segments) for road, road_segments in by_road.items()}
+        self._count = sum(len(road_segments) for road_segments in by_road.values())
+
+    @staticmethod
+    def _build(segments):
+        """
+        splits the road at the segments from/to kms
+        :return: (the sorted boundary kms,
+                  the segment_id at every boundary km,
+                  the segment_id before the first boundary, between every boundary and the next one,
+                  and after the last one), -1 where there is no segment
+        """
+        ids = np.array([segment[0] for segment in segments])
+        from_kms = np.array([segment[1] for segment in segments])
+        to_kms = np.array([segment[2] for segment in segments])
+        boundaries = np.unique(np.concatenate([from_kms, to_kms]))
+
+        def lowest_id(covering):
+            return np.where(covering.any(axis=1), np.where(covering, ids, np.iinfo(np.int64).max).min(axis=1), -1)
+
+        at_boundaries = lowest_id((from_kms <= boundaries[:, None]) & (boundaries[:, None] <= to_kms))
+        starts, ends = boundaries[:-1, None], boundaries[1:, None]
+        between_boundaries = np.concatenate([[-1], lowest_id((from_kms <= starts) & (ends <= to_kms)), [-1]])
+        return boundaries, at_boundaries, between_boundaries
+
+    def __len__(self):
+        return self._count
+
+    def _lookup(self, road_index, kms):
+        boundaries, at_boundaries, between_boundaries = road_index
+        positions = np.searchsorted(boundaries, kms, side='left')
+        clipped = np.minimum(positions, len(boundaries) - 1)
+        at_boundary = (positions < len(boundaries)) & (boundaries[clipped] == kms)
+        return np.where(at_boundary, at_boundaries[clipped], between_boundaries[positions])
+
+    def get(self, road, km):
+        """
+        :param km: the marker's km
+        :return: the segment_id of the road's segment at km, or None
+        """
+        if road is None or km is None or road not in self._roads:
+            return None
+        segment_id = self._lookup(self._roads[road], np.array([float(km) / self.KM_UNITS]))[0]
+        return None if segment_id < 0 else segment_id.item()
+
+    def get_many(self, roads, kms):
+        """
+        vectorized get over whole columns
+        :return: a list of segment ids, with None where there's no segment
+        """
+        roads = np.array(roads, dtype=object)
+        kms = np.array([np.nan if km is None else km for km in kms], dtype=float) / self.KM_UNITS
+        segment_ids = [None] * len(roads)
+        for road in pd.unique(roads):
+            if road is None or road not in self._roads:
+                continue
+            rows = np.flatnonzero(roads == road)
+            for row, segment_id in zip(rows.tolist(), self._lookup(self._roads[road], kms[rows]).tolist()):
+                if segment_id >= 0:
+                    segment_ids[row] = segment_id
+        return segment_ids
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+from anyway.common.models.cbs_models import ImportManifest
+from anyway.parsers import cbs_partitions
+
+from anyway import db
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def hash_file(file_path):
+    """
+    :return: the sha256 hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_directory(directory):
+    """
+    :return: {file name: sha256} of every file in the directory
+    """
+    return {name: hash_file(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+            if os.path.isfile(os.path.join(directory, name))}
+
+
+def content_hash(file_hashes):
+    """
+    a single hash of the whole directory content, changes when any file is added, removed, renamed or changed
+    """
+    digest = hashlib.sha256()
+    for name in sorted(file_hashes):
+        digest.update(u"{0}\0{1}\n".format(name, file_hashes[name]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_manifest():
+    """
+    :return: {(provider_code, year): ImportManifest} of the imported directories
+    """
+    return {(entry.provider_code, entry.year): entry for entry in db.session.query(ImportManifest).all()}
+
+
+def get_changed_directories(directories):
+    """
+    :param directories: (directory, provider_code, year) tuples
+    :return: the directories whose content changed since they were imported, or that were never imported
+    """
+    manifest = get_manifest()
+    changed = []
+    for directory, provider_code, year in directories:
+        entry = manifest.get((provider_code, year))
+        if entry is not None and entry.content_hash == content_hash(hash_directory(directory)):
+            logging.info("Skipping unchanged directory '{0}', imported at {1}".format(directory,
+                                                                                     entry.imported_at))
+            continue
+        changed.append((directory, provider_code, year))
+    return changed
+
+
+def record_import(directory, provider_code, year, file_hashes, markers_count, involved_count, vehicles_count):
+    """
+    saves the manifest entry of a directory once all its rows were imported, in the directory's transaction -
+    committing is left to the caller, so the entry is there exactly when the rows are
+    """
+    db.session.merge(ImportManifest(provider_code=provider_code,
+                                    year=year,
+                                    directory=directory,
+                                    content_hash=content_hash(file_hashes),
+                                    file_hashes=json.dumps(file_hashes, sort_keys=True),
+                                    markers_count=markers_count,
+                                    involved_count=involved_count,
+                                    vehicles_count=vehicles_count,
+                                    imported_at=datetime.now()))
+
+
+def get_unfinished_directories(directories):
+    """
+    :param directories: (directory, provider_code, year) tuples
+    :return: the directories that have no manifest entry, the ones an interrupted import didn't finish
+    """
+    manifest = get_manifest()
+    unfinished = []
+    for directory, provider_code, year in directories:
+        entry = manifest.get((provider_code, year))
+        if entry is not None:
+            logging.info("Skipping directory '{0}', imported at {1}".format(directory, entry.imported_at))
+            continue
+        unfinished.append((directory, provider_code, year))
+    return unfinished
+
+
+def forget_import(provider_code, year):
+    """
+    removes the manifest entry of a provider/year directory, so that it's reloaded on the next incremental run
+    """
+    db.session.query(ImportManifest).filter(ImportManifest.provider_code == provider_code,
+                                            ImportManifest.year == year).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def delete_directory_entries(provider_code, year):
+    """
+    deletes the manifest entry and every marker, involved and vehicle of a provider/year directory,
+    so it can be reloaded. the manifest entry goes first, an interrupted reload is then redone on the next run.
+    """
+    logging.info("Deleting provider_code {0} year {1}".format(provider_code, year))
+    forget_import(provider_code, year)
+    cbs_partitions.delete_provider_year(provider_code, year)
+
+
+def clear_manifest():
+    db.session.query(ImportManifest).delete()
+    db.session.commit()
@@ -0,0 +1,227 @@
+import logging
+import re
+
+from anyway.common.models.cbs_models import AccidentMarker, Involved, Vehicle
+from anyway.core import instrumentation
+
+from anyway import db
+
+# in attach order, a year's markers have to be attached before the involved and vehicles referencing them
+PARTITIONED_TABLES = (AccidentMarker, Involved, Vehicle)
+
+# the schema a year is loaded into before its tables are attached as partitions, one per year so that
+# years can be loaded in parallel
+LOAD_SCHEMA_FORMAT = 'cbs_staging_{0}'
+
+# a year whose new markers count is below that ratio of its current count fails the sanity checks
+MIN_MARKERS_RATIO = 0.5
+
+
+def partition_name(model, year):
+    return '{0}_{1}'.format(model.__tablename__, year)
+
+
+def load_schema(year):
+    return LOAD_SCHEMA_FORMAT.format(int(year))
+
+
+def _qualified(model, name=None):
+    return '{0}.{1}'.format(model.__table__.schema, name or model.__tablename__)
+
+
+def _exists(qualified_name):
+    return db.session.execute('SELECT to_regclass(:name)', {'name': qualified_name}).scalar() is not None
+
+
+def get_partition_years():
+    """
+    :return: the sorted years that have partitions of cbs.markers
+    """
+    rows = db.session.execute("SELECT child.relname FROM pg_inherits "
+                              "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                              "WHERE pg_inherits.inhparent = to_regclass(:name)",
+                              {'name': _qualified(AccidentMarker)})
+    pattern = re.compile(r'^{0}_(\d{{4}})$'.format(AccidentMarker.__tablename__))
+    return sorted(int(match.group(1)) for match in (pattern.match(row[0]) for row in rows) if match)
+
+
+def get_load_years():
+    """
+    :return: the sorted years that have a load schema - years that were loaded, or partly loaded, but not attached
+    """
+    rows = db.session.execute("SELECT nspname FROM pg_namespace WHERE nspname LIKE :pattern",
+                              {'pattern': LOAD_SCHEMA_FORMAT.format('%')})
+    pattern = re.compile('^{0}$'.format(LOAD_SCHEMA_FORMAT.format(r'(\d{4})')))
+    return sorted(int(match.group(1)) for match in (pattern.match(row[0]) for row in rows) if match)
+
+
+def create_year_partitions(year):
+    """
+    creates the year's empty partitions, if they don't exist yet, for loading the year straight into the tables
+    """
+    for model in PARTITIONED_TABLES:
+        db.session.execute('CREATE TABLE IF NOT EXISTS {0} PARTITION OF {1} FOR VALUES IN ({2})'.format(
+            _qualified(model, partition_name(model, year)), _qualified(model), int(year)))
+    db.session.commit()
+
+
+def _drop_year_partitions(year):
+    for model in reversed(PARTITIONED_TABLES):
+        partition = _qualified(model, partition_name(model, year))
+        if _exists(partition):
+            db.session.execute('ALTER TABLE {0} DETACH PARTITION {1}'.format(_qualified(model), partition))
+            db.session.execute('DROP TABLE {0}'.format(partition))
+
+
+@instrumentation.timed_stage('drop_year_partitions')
+def drop_year_partitions(year):
+    """
+    deletes all the markers, involved and vehicles of a year by detaching and dropping its partitions
+    """
+    logging.info('Dropping the partitions of year {0}'.format(year))
+    _drop_year_partitions(year)
+    db.session.commit()
+
+
+def drop_all_year_partitions():
+    for year in get_partition_years():
+        drop_year_partitions(year)
+
+
+def create_load_tables(year):
+    """
+    creates empty stand-alone copies of the partitioned tables in the year's load schema, to load the year into.
+    they get their indexes after they are loaded, and their foreign keys when they are attached.
+    the CHECK constraint on accident_year spares the attach from scanning the tables.
+    """
+    schema = load_schema(year)
+    db.session.execute('DROP SCHEMA IF EXISTS {0} CASCADE'.format(schema))
+    db.session.execute('CREATE SCHEMA {0}'.format(schema))
+    for model in PARTITIONED_TABLES:
+        table = '{0}.{1}'.format(schema, model.__tablename__)
+        db.session.execute('CREATE TABLE {0} (LIKE {1} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(
+            table, _qualified(model)))
+        db.session.execute('ALTER TABLE {0} ADD CONSTRAINT {1}_year_check CHECK (accident_year = {2})'.format(
+            table, partition_name(model, year), int(year)))
+    db.session.commit()
+
+
+def create_load_indexes(year):
+    """
+    builds the indexes of the partitioned tables on the year's loaded tables, so that attaching them
+    adopts these indexes instead of building them while the tables are locked
+    """
+    schema = load_schema(year)
+    for model in PARTITIONED_TABLES:
+        table = '{0}.{1}'.format(schema, model.__tablename__)
+        name = partition_name(model, year)
+        if _exists('{0}.{1}_pkey'.format(schema, name)):
+            # built by an interrupted run, with the rest of the indexes in the same transaction
+            continue
+        primary_key = db.session.execute("SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+                                         "WHERE conrelid = to_regclass(:name) AND contype = 'p'",
+                                         {'name': _qualified(model)}).scalar()
+        db.session.execute('ALTER TABLE {0} ADD CONSTRAINT {1}_pkey {2}'.format(table, name, primary_key))
+        indexes = db.session.execute("SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid) "
+                                     "FROM pg_index JOIN pg_class index_class "
+                                     "ON index_class.oid = pg_index.indexrelid "
+                                     "WHERE pg_index.indrelid = to_regclass(:name) AND NOT pg_index.indisprimary",
+                                     {'name': _qualified(model)}).fetchall()
+        for index_name, definition in indexes:
+            # CREATE INDEX <name> ON ONLY cbs.<table> USING ... -> the same index on the loaded table
+            definition = re.sub(r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ',
+                                r'CREATE \g<1>INDEX {0}_{1} ON {2} '.format(index_name, int(year), table),
+                                definition)
+            db.session.execute(definition)
+    db.session.commit()
+
+
+def _count(table, where=''):
+    return db.session.execute('SELECT count(*) FROM {0} {1}'.format(table, where)).scalar()
+
+
+def check_load_tables(year):
+    """
+    sanity checks of the year's loaded tables, before they are swapped in
+    :raises ValueError: when a check fails
+    """
+    schema = load_schema(year)
+    markers = '{0}.{1}'.format(schema, AccidentMarker.__tablename__)
+    markers_count = _count(markers)
+    if markers_count == 0:
+        raise ValueError('Sanity check failed: no markers were loaded for year {0}'.format(year))
+    current_partition = _qualified(AccidentMarker, partition_name(AccidentMarker, year))
+    if _exists(current_partition):
+        current_count = _count(current_partition)
+        if markers_count < current_count * MIN_MARKERS_RATIO:
+            raise ValueError('Sanity check failed: {0} markers were loaded for year {1}, '
+                             'which has {2} markers now'.format(markers_count, year, current_count))
+    missing_geom = _count(markers, 'WHERE geom IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL')
+    if missing_geom:
+        raise ValueError('Sanity check failed: {0} markers of year {1} have coordinates '
+                         'but no geometry'.format(missing_geom, year))
+    for model in (Involved, Vehicle):
+        orphans = _count('{0}.{1} child'.format(schema, model.__tablename__),
+                         'WHERE NOT EXISTS (SELECT 1 FROM {0} marker WHERE marker.id = child.accident_id '
+                         'AND marker.provider_code = child.provider_code '
+                         'AND marker.accident_year = child.accident_year)'.format(markers))
+        if orphans:
+            raise ValueError('Sanity check failed: {0} {1} of year {2} have no marker'.format(
+                orphans, model.__tablename__, year))
+    logging.info('Year {0} passed the sanity checks with {1} markers'.format(year, markers_count))
+
+
+@instrumentation.timed_stage('stage_year')
+def stage_year(year):
+    """
+    prepares the year's loaded tables for the swap: indexes and sanity checks
+    """
+    create_load_indexes(year)
+    check_load_tables(year)
+
+
+def _attach_load_tables(year):
+    schema = load_schema(year)
+    _drop_year_partitions(year)
+    for model in PARTITIONED_TABLES:
+        name = partition_name(model, year)
+        db.session.execute('ALTER TABLE {0}.{1} RENAME TO {2}'.format(schema, model.__tablename__, name))
+        db.session.execute('ALTER TABLE {0}.{1} SET SCHEMA {2}'.format(schema, name, model.__table__.schema))
+        db.session.execute('ALTER TABLE {0} ATTACH PARTITION {1} FOR VALUES IN ({2})'.format(
+            _qualified(model), _qualified(model, name), int(year)))
+    db.session.execute('DROP SCHEMA {0}'.format(schema))
+
+
+@instrumentation.timed_stage('attach_load_tables')
+def attach_load_tables(years, drop_years=()):
+    """
+    swaps the years' loaded tables in for their current partitions, in a single transaction:
+    the old partitions are detached and dropped and the load schema tables are moved and attached.
+    readers see either the old or the new rows of all the years.
+    :param drop_years: years whose partitions are dropped in the same transaction
+    """
+    for year in drop_years:
+        logging.info('Dropping the partitions of year {0}'.format(year))
+        _drop_year_partitions(year)
+    for year in years:
+        logging.info('Attaching the loaded partitions of year {0}'.format(year))
+        _attach_load_tables(year)
+    db.session.commit()
+
+
+@instrumentation.timed_stage('delete_provider_year', rows=True)
+def delete_provider_year(provider_code, year):
+    """
+    deletes the markers, involved and vehicles of one provider in a year. the filter on accident_year
+    prunes each delete to the year's partition.
+    :return: the number of deleted rows
+    """
+    total = 0
+    for model in reversed(PARTITIONED_TABLES):
+        deleted = db.session.query(model).filter(model.accident_year == year,
+                                                 model.provider_code == provider_code) \
+            .delete(synchronize_session=False)
+        logging.info("\t{0} rows deleted from {1}".format(deleted, model.__tablename__))
+        total += deleted
+    db.session.commit()
+    return total
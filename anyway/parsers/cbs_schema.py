@@ -0,0 +1,172 @@
+"""
+the columns the importer reads from the CBS files and their compact dtypes - nullable small ints for the codes,
+categoricals for the text. the files are read with only these columns, and the frames are held with these dtypes
+until they are transformed.
+"""
+import logging
+from collections import OrderedDict
+
+import pandas as pd
+
+from anyway.core import field_names
+
+# file type, year and month, in every data file
+_ACCIDENT_KEYS = [
+    (field_names.id, 'Int64'),
+    (field_names.file_type, 'Int8'),
+    (field_names.file_type_police, 'Int8'),
+    (field_names.accident_year, 'Int16'),
+    (field_names.accident_month, 'Int8'),
+]
+
+ACCIDENTS_SCHEMA = OrderedDict(_ACCIDENT_KEYS + [
+    (field_names.accident_day, 'Int8'),
+    (field_names.accident_hour, 'Int8'),
+    (field_names.x, 'float64'),
+    (field_names.y, 'float64'),
+    (field_names.km, 'float64'),
+    (field_names.yishuv_symbol, 'Int16'),
+    (field_names.street1, 'Int32'),
+    (field_names.street2, 'Int32'),
+    (field_names.house_number, 'Int16'),
+    (field_names.urban_intersection, 'Int32'),
+    (field_names.non_urban_intersection, 'Int32'),
+    (field_names.road1, 'Int16'),
+    (field_names.road2, 'Int16'),
+    (field_names.accident_type, 'Int8'),
+    (field_names.accident_severity, 'Int8'),
+    (field_names.location_accuracy, 'Int8'),
+    (field_names.road_type, 'Int8'),
+    (field_names.road_shape, 'Int8'),
+    (field_names.day_type, 'Int8'),
+    (field_names.police_unit, 'Int16'),
+    (field_names.one_lane, 'Int8'),
+    (field_names.multi_lane, 'Int8'),
+    (field_names.speed_limit, 'Int8'),
+    (field_names.road_intactness, 'Int8'),
+    (field_names.road_width, 'Int8'),
+    (field_names.road_sign, 'Int8'),
+    (field_names.road_light, 'Int8'),
+    (field_names.road_control, 'Int8'),
+    (field_names.weather, 'Int8'),
+    (field_names.road_surface, 'Int8'),
+    (field_names.road_object, 'Int8'),
+    (field_names.object_distance, 'Int8'),
+    (field_names.didnt_cross, 'Int8'),
+    (field_names.cross_mode, 'Int8'),
+    (field_names.cross_location, 'Int8'),
+    (field_names.cross_direction, 'Int8'),
+    (field_names.geo_area, 'Int8'),
+    (field_names.day_night, 'Int8'),
+    (field_names.day_in_week, 'Int8'),
+    (field_names.traffic_light, 'Int8'),
+    (field_names.region, 'Int16'),
+    (field_names.district, 'Int16'),
+    (field_names.natural_area, 'Int16'),
+    (field_names.municipal_status, 'Int16'),
+    (field_names.yishuv_shape, 'Int16'),
+])
+
+INVOLVED_SCHEMA = OrderedDict(_ACCIDENT_KEYS + [
+    (field_names.involved_type, 'Int8'),
+    (field_names.license_acquiring_date, 'Int16'),
+    (field_names.age_group, 'Int8'),
+    (field_names.sex, 'Int8'),
+    (field_names.vehicle_type_involved, 'Int8'),
+    (field_names.safety_measures, 'Int8'),
+    (field_names.involve_yishuv_symbol, 'Int16'),
+    (field_names.injury_severity, 'Int8'),
+    (field_names.injured_type, 'Int8'),
+    (field_names.injured_position, 'Int8'),
+    (field_names.population_type, 'Int8'),
+    (field_names.home_region, 'Int16'),
+    (field_names.home_district, 'Int16'),
+    (field_names.home_natural_area, 'Int16'),
+    (field_names.home_municipal_status, 'Int16'),
+    (field_names.home_yishuv_shape, 'Int16'),
+    (field_names.hospital_time, 'Int8'),
+    (field_names.medical_type, 'Int8'),
+    (field_names.release_dest, 'Int8'),
+    (field_names.safety_measures_use, 'Int8'),
+    (field_names.late_deceased, 'Int8'),
+    (field_names.car_id, 'Int32'),
+    (field_names.involve_id, 'Int32'),
+])
+
+VEHICLES_SCHEMA = OrderedDict(_ACCIDENT_KEYS + [
+    (field_names.engine_volume, 'Int8'),
+    (field_names.manufacturing_year, 'Int16'),
+    (field_names.driving_directions, 'Int8'),
+    (field_names.vehicle_status, 'Int8'),
+    (field_names.vehicle_attribution, 'Int8'),
+    (field_names.vehicle_type_vehicles, 'Int8'),
+    (field_names.seats, 'Int8'),
+    (field_names.total_weight, 'Int8'),
+    (field_names.car_id, 'Int32'),
+    (field_names.vehicle_damage, 'Int8'),
+])
+
+# the codes are left to the default inference, they are the keys of the lookups
+STREETS_SCHEMA = OrderedDict([
+    (field_names.settlement, None),
+    (field_names.street_sign, None),
+    (field_names.street_name, 'category'),
+])
+
+NON_URBAN_INTERSECTION_SCHEMA = OrderedDict([
+    (field_names.junction, None),
+    (field_names.junction_name, 'category'),
+    (field_names.road1, None),
+    (field_names.road2, None),
+    (field_names.km, None),
+])
+
+# the code tables, their descriptions are text
+DICTIONARY_SCHEMA = OrderedDict([
+    ('MS_TAVLA', None),
+    ('KOD', None),
+    ('TEUR', 'category'),
+])
+
+
+def read_options(header, schema):
+    """
+    :param header: the column names of the file, as they are in the file
+    :return: the usecols and dtype read_csv options of the schema's columns of the file
+    """
+    usecols = [column for column in header if column.upper() in schema]
+    dtype = {column: schema[column.upper()] for column in usecols if schema[column.upper()] is not None}
+    return usecols, dtype
+
+
+def cast(frame, schema):
+    """
+    casts the columns of a frame that was read without dtypes to the schema's dtypes.
+    a column whose values don't fit its dtype is left as it was read.
+    """
+    for column in frame.columns:
+        dtype = schema.get(column.upper())
+        if dtype is None or frame[column].dtype == dtype:
+            continue
+        try:
+            frame[column] = frame[column].astype(dtype)
+        except (TypeError, ValueError, OverflowError):
+            logging.warning("The values of column {0} don't fit {1}, it's kept as {2}".format(
+                column, dtype, frame[column].dtype))
+    return frame
+
+
+def widen(frame):
+    """
+    :return: the frame with the dtypes read_csv infers by default, which the transformations are written for -
+    int64, float64 for integers with missing values, and object for text
+    """
+    columns = OrderedDict()
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_extension_array_dtype(values) and pd.api.types.is_integer_dtype(values):
+            values = values.astype('float64') if values.hasnans else values.astype('int64')
+        elif pd.api.types.is_categorical_dtype(values):
+            values = values.astype(object)
+        columns[column] = values
+    return pd.DataFrame(columns, index=frame.index)
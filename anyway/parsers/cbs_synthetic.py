@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic CBS data, for developing and benchmarking the importer without the real CBS files.
+writes directories laid out and encoded like the CBS ones - <output>/accidents_type_<provider code>/H<year>_synthetic/
+with AccData, InvData, VehData, DicStreets, IntersectNonUrban and Dictionary CSVs.
+the same seed always writes the same files.
+"""
+import logging
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from anyway.core import field_names
+from anyway.parsers.cbs_dictionaries import CONTENT_ENCODING
+
+ACCIDENTS_FILE = "AccData.csv"
+INVOLVED_FILE = "InvData.csv"
+VEHICLES_FILE = "VehData.csv"
+STREETS_FILE = "DicStreets.csv"
+NON_URBAN_INTERSECTION_FILE = "IntersectNonUrban.csv"
+DICTIONARY_FILE = "Dictionary.csv"
+DICTIONARY_DESCRIPTION = "TEUR"
+
+DIRECTORY_FORMAT = os.path.join("accidents_type_{provider_code}", "H{year}_synthetic")
+
+CITIES_FILE = "data/cities.csv"
+# used when data/cities.csv isn't there
+DEFAULT_SETTLEMENTS = (3000, 5000, 4000, 70, 7900, 6100, 8300, 7400, 2800, 6400)
+
+# ITM bounding box of Israel
+X_RANGE = (130000, 280000)
+Y_RANGE = (380000, 800000)
+
+# road_type codes
+URBAN_JUNCTION, URBAN_NOT_JUNCTION, NON_URBAN_JUNCTION, NON_URBAN_NOT_JUNCTION = 1, 2, 3, 4
+
+# police_unit codes, the ones the localization knows
+POLICE_UNITS = (11, 12, 14, 20, 33, 34, 36, 37, 38, 41, 43, 51, 52, 61)
+
+# coded field -> (dictionary table number, number of codes), codes are 1..number of codes
+ACCIDENT_CODES = OrderedDict([
+    (field_names.file_type_police, (None, 3)),
+    (field_names.geo_area, (68, 4)),
+    (field_names.location_accuracy, (205, 3)),
+    (field_names.day_type, (37, 4)),
+    (field_names.day_night, (38, 2)),
+    (field_names.accident_type, (5, 20)),
+    (field_names.accident_severity, (4, 3)),
+    (field_names.road_shape, (9, 14)),
+    (field_names.one_lane, (10, 4)),
+    (field_names.multi_lane, (11, 5)),
+    (field_names.speed_limit, (12, 9)),
+    (field_names.road_intactness, (13, 5)),
+    (field_names.road_width, (14, 5)),
+    (field_names.road_sign, (15, 6)),
+    (field_names.road_light, (16, 11)),
+    (field_names.road_control, (17, 6)),
+    (field_names.weather, (18, 6)),
+    (field_names.road_surface, (19, 6)),
+    (field_names.road_object, (21, 10)),
+    (field_names.object_distance, (22, 4)),
+    (field_names.didnt_cross, (23, 6)),
+    (field_names.cross_mode, (24, 4)),
+    (field_names.cross_location, (25, 4)),
+    (field_names.cross_direction, (26, 4)),
+    (field_names.traffic_light, (40, 4)),
+    (field_names.region, (77, 7)),
+    (field_names.district, (79, 15)),
+    (field_names.natural_area, (80, 50)),
+    (field_names.municipal_status, (78, 99)),
+    (field_names.yishuv_shape, (81, 30)),
+])
+
+INVOLVED_CODES = OrderedDict([
+    (field_names.file_type_police, (None, 3)),
+    (field_names.involved_type, (31, 3)),
+    (field_names.age_group, (92, 18)),
+    (field_names.sex, (67, 2)),
+    (field_names.vehicle_type_involved, (45, 25)),
+    (field_names.safety_measures, (34, 10)),
+    (field_names.injury_severity, (35, 5)),
+    (field_names.injured_type, (50, 9)),
+    (field_names.injured_position, (52, 9)),
+    (field_names.population_type, (66, 5)),
+    (field_names.home_region, (77, 7)),
+    (field_names.home_district, (79, 15)),
+    (field_names.home_natural_area, (80, 50)),
+    (field_names.home_municipal_status, (78, 99)),
+    (field_names.home_yishuv_shape, (81, 30)),
+    (field_names.hospital_time, (200, 4)),
+    (field_names.medical_type, (201, 5)),
+    (field_names.release_dest, (202, 6)),
+    (field_names.safety_measures_use, (203, 5)),
+    (field_names.late_deceased, (204, 3)),
+    (field_names.injury_severity_mais, (None, 6)),
+])
+
+VEHICLE_CODES = OrderedDict([
+    (field_names.file_type_police, (None, 3)),
+    (field_names.engine_volume, (111, 8)),
+    (field_names.driving_directions, (28, 4)),
+    (field_names.vehicle_status, (30, 4)),
+    (field_names.vehicle_attribution, (43, 3)),
+    (field_names.vehicle_type_vehicles, (45, 25)),
+    (field_names.seats, (None, 9)),
+    (field_names.total_weight, (112, 6)),
+    (field_names.vehicle_damage, (229, 4)),
+])
+
+# the other dictionary tables, table number -> codes
+OTHER_TABLES = OrderedDict([
+    (1, POLICE_UNITS),
+    (2, (URBAN_JUNCTION, URBAN_NOT_JUNCTION, NON_URBAN_JUNCTION, NON_URBAN_NOT_JUNCTION)),
+    (39, range(1, 8)),
+    (60, range(1, 13)),
+    (93, range(1, 97)),
+    (245, range(1, 26)),
+])
+
+
+class SyntheticCbsGenerator(object):
+    """
+    generates a provider/year directory of CBS files at a given scale
+    """
+
+    def __init__(self, seed=0, settlements=None, streets_per_settlement=40, roads=150,
+                 junctions_per_road=30):
+        """
+        :param settlements: the settlement symbols of the urban accidents, those of data/cities.csv by default
+        """
+        self.random = np.random.RandomState(seed)
+        self.settlements = np.array(settlements if settlements is not None else self._read_settlements())
+        self.streets_per_settlement = streets_per_settlement
+        self.roads = np.sort(self.random.choice(np.arange(1, 1000), roads, replace=False))
+        self.junctions_per_road = junctions_per_road
+        self.streets = self._generate_streets()
+        self.junctions = self._generate_junctions()
+
+    @staticmethod
+    def _read_settlements():
+        if not os.path.exists(CITIES_FILE):
+            return DEFAULT_SETTLEMENTS
+        cities = pd.read_csv(CITIES_FILE, encoding="utf-8").dropna(subset=[field_names.sign])
+        return cities[field_names.sign].astype(int).unique()
+
+    def _codes(self, count, number_of_codes, missing_ratio=0.0):
+        codes = pd.Series(self.random.randint(1, number_of_codes + 1, count), dtype='Int64')
+        if missing_ratio:
+            codes[self.random.random_sample(count) < missing_ratio] = None
+        return codes
+
+    def _generate_streets(self):
+        count = len(self.settlements) * self.streets_per_settlement
+        return pd.DataFrame(OrderedDict([
+            (field_names.settlement, np.repeat(self.settlements, self.streets_per_settlement)),
+            (field_names.street_sign, np.tile(np.arange(1, self.streets_per_settlement + 1),
+                                              len(self.settlements))),
+            (field_names.street_name, [u"רחוב {0}".format(number) for number in range(1, count + 1)]),
+        ]))
+
+    def _generate_junctions(self):
+        count = len(self.roads) * self.junctions_per_road
+        road1 = np.repeat(self.roads, self.junctions_per_road)
+        kms = np.round(self.random.uniform(0, 3000, count), 1)
+        return pd.DataFrame(OrderedDict([
+            (field_names.junction, np.arange(1, count + 1)),
+            (field_names.junction_name, [u"צומת {0}".format(number) for number in range(1, count + 1)]),
+            (field_names.road1, road1),
+            (field_names.road2, self.random.choice(self.roads, count)),
+            (field_names.km, kms),
+        ]))
+
+    def generate_accidents(self, provider_code, year, count):
+        random = self.random
+        road_types = pd.Series(random.choice([URBAN_JUNCTION, URBAN_NOT_JUNCTION,
+                                              NON_URBAN_JUNCTION, NON_URBAN_NOT_JUNCTION],
+                                             count, p=[0.3, 0.4, 0.15, 0.15]))
+        urban = road_types.isin([URBAN_JUNCTION, URBAN_NOT_JUNCTION]).values
+        urban_junction = (road_types == URBAN_JUNCTION).values
+        non_urban_junction = (road_types == NON_URBAN_JUNCTION).values
+        non_urban = ~urban
+
+        days = pd.Timestamp(year=year, month=1, day=1) + pd.to_timedelta(random.randint(0, 365, count), unit='D')
+        accidents = OrderedDict()
+        accidents[field_names.id.lower()] = year * 1000000 + np.arange(1, count + 1)
+        accidents[field_names.file_type.lower()] = np.full(count, provider_code)
+        accidents[field_names.road_type] = road_types.values
+
+        settlements = pd.Series(random.choice(self.settlements, count), dtype='Int64')
+        settlements[non_urban & (random.random_sample(count) < 0.9)] = None
+        accidents[field_names.yishuv_symbol] = settlements
+        street1 = self._codes(count, self.streets_per_settlement)
+        street1[non_urban] = None
+        accidents[field_names.street1] = street1
+        house_numbers = self._codes(count, 150)
+        house_numbers[urban_junction] = None
+        house_numbers[random.random_sample(count) < 0.1] = 9999
+        house_numbers[non_urban] = None
+        accidents[field_names.house_number] = house_numbers
+        street2 = self._codes(count, self.streets_per_settlement)
+        street2[~urban_junction] = None
+        accidents[field_names.street2] = street2
+        urban_intersections = self._codes(count, 5000)
+        urban_intersections[~urban_junction] = None
+        accidents[field_names.urban_intersection] = urban_intersections
+
+        # non-urban junction accidents are at one of the junctions, the rest are somewhere along a road
+        junctions = self.junctions.iloc[random.randint(0, len(self.junctions), count)].reset_index(drop=True)
+        road1 = pd.Series(random.choice(self.roads, count), dtype='Int64')
+        road1[non_urban_junction] = junctions[field_names.road1][non_urban_junction].values
+        road1[urban] = None
+        accidents[field_names.road1] = road1
+        road2 = pd.Series(junctions[field_names.road2].values, dtype='Int64')
+        road2[~non_urban_junction] = None
+        accidents[field_names.road2] = road2
+        kms = pd.Series(np.round(random.uniform(0, 3000, count), 1))
+        kms[non_urban_junction] = junctions[field_names.km][non_urban_junction].values
+        # a negative km is an inaccurate one
+        inaccurate = random.random_sample(count) < 0.1
+        kms[inaccurate] = -kms[inaccurate]
+        kms[urban] = np.nan
+        accidents[field_names.km] = kms
+        non_urban_intersections = pd.Series(junctions[field_names.junction].values, dtype='Int64')
+        non_urban_intersections[~non_urban_junction] = None
+        accidents[field_names.non_urban_intersection] = non_urban_intersections
+
+        x = pd.Series(random.randint(X_RANGE[0], X_RANGE[1], count), dtype='Int64')
+        y = pd.Series(random.randint(Y_RANGE[0], Y_RANGE[1], count), dtype='Int64')
+        # some accidents aren't geocoded
+        not_geocoded = random.random_sample(count) < 0.05
+        x[not_geocoded] = None
+        y[not_geocoded] = None
+        accidents[field_names.x] = x
+        accidents[field_names.y] = y
+
+        accidents[field_names.accident_year] = np.full(count, year)
+        accidents[field_names.accident_month] = days.month
+        accidents[field_names.accident_day] = days.day
+        accidents[field_names.accident_hour] = random.randint(1, 97, count)
+        accidents[field_names.day_in_week] = days.dayofweek + 1
+        accidents[field_names.police_unit] = random.choice(POLICE_UNITS, count)
+        for field, (_, number_of_codes) in ACCIDENT_CODES.items():
+            accidents[field] = self._codes(count, number_of_codes, missing_ratio=0.05)
+        accidents[field_names.accident_severity] = pd.Series(random.choice([1, 2, 3], count, p=[0.01, 0.1, 0.89]))
+        return pd.DataFrame(accidents)
+
+    def _generate_accident_rows(self, accidents, min_per_accident, max_per_accident):
+        """
+        :return: the accidents repeated per their rows, and every row number within its accident
+        """
+        per_accident = self.random.randint(min_per_accident, max_per_accident + 1, len(accidents))
+        positions = np.repeat(np.arange(len(accidents)), per_accident)
+        numbers = np.arange(len(positions)) - np.repeat(np.cumsum(per_accident) - per_accident, per_accident) + 1
+        rows = OrderedDict()
+        for field in (field_names.id.lower(), field_names.file_type.lower()):
+            rows[field] = accidents[field].values[positions]
+        rows[field_names.accident_year] = accidents[field_names.accident_year].values[positions]
+        rows[field_names.accident_month] = accidents[field_names.accident_month].values[positions]
+        return rows, numbers
+
+    def generate_involved(self, accidents):
+        rows, numbers = self._generate_accident_rows(accidents, 1, 4)
+        count = len(numbers)
+        rows[field_names.involve_id] = numbers
+        rows[field_names.car_id] = np.minimum(numbers, 3)
+        rows[field_names.license_acquiring_date] = self.random.choice(
+            np.append(np.arange(1960, int(accidents[field_names.accident_year].max()) + 1), [0, 9999]), count)
+        settlements = pd.Series(self.random.choice(self.settlements, count), dtype='Int64')
+        settlements[self.random.random_sample(count) < 0.1] = None
+        rows[field_names.involve_yishuv_symbol] = settlements
+        for field, (_, number_of_codes) in INVOLVED_CODES.items():
+            # involved_type and age_group are always set
+            missing_ratio = 0 if field in (field_names.involved_type, field_names.age_group) else 0.05
+            rows[field] = self._codes(count, number_of_codes, missing_ratio)
+        return pd.DataFrame(rows)
+
+    def generate_vehicles(self, accidents):
+        rows, numbers = self._generate_accident_rows(accidents, 1, 3)
+        count = len(numbers)
+        rows[field_names.car_id] = numbers
+        rows[field_names.manufacturing_year] = self._codes(count, 40, missing_ratio=0.05) + \
+            (int(accidents[field_names.accident_year].max()) - 40)
+        for field, (_, number_of_codes) in VEHICLE_CODES.items():
+            # engine_volume is always set
+            missing_ratio = 0 if field == field_names.engine_volume else 0.05
+            rows[field] = self._codes(count, number_of_codes, missing_ratio)
+        return pd.DataFrame(rows)
+
+    def generate_dictionary(self, accidents, involved, vehicles):
+        tables = OrderedDict()
+        for codes in (ACCIDENT_CODES, INVOLVED_CODES, VEHICLE_CODES):
+            for table, number_of_codes in codes.values():
+                if table is not None:
+                    tables[table] = range(1, number_of_codes + 1)
+        tables.update(OTHER_TABLES)
+        columns = list(accidents.columns) + list(involved.columns) + list(vehicles.columns)
+        tables[0] = range(1, len(columns) + 1)
+        rows = [(table, code, u"ערך {0} של טבלה {1}".format(code, table))
+                for table in sorted(tables) for code in tables[table]]
+        return pd.DataFrame(rows, columns=[field_names.table_number, field_names.code, DICTIONARY_DESCRIPTION])
+
+    def generate_directory(self, output_dir, provider_code, year, accidents_count):
+        """
+        writes a provider/year directory of accidents_count accidents, with their involved and vehicles
+        :return: the directory path
+        """
+        directory = os.path.join(output_dir, DIRECTORY_FORMAT.format(provider_code=provider_code, year=year))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        accidents = self.generate_accidents(provider_code, year, accidents_count)
+        involved = self.generate_involved(accidents)
+        vehicles = self.generate_vehicles(accidents)
+        files = OrderedDict([(ACCIDENTS_FILE, accidents),
+                             (INVOLVED_FILE, involved),
+                             (VEHICLES_FILE, vehicles),
+                             (STREETS_FILE, self.streets),
+                             (NON_URBAN_INTERSECTION_FILE, self.junctions),
+                             (DICTIONARY_FILE, self.generate_dictionary(accidents, involved, vehicles))])
+        for file_name, data in files.items():
+            data.to_csv(os.path.join(directory, file_name), index=False, encoding=CONTENT_ENCODING)
+        logging.info("Wrote {0} accidents, {1} involved and {2} vehicles to '{3}'".format(
+            len(accidents), len(involved), len(vehicles), directory))
+        return directory
+
+
+def generate(output_dir, years, provider_codes=(1, 3), accidents_per_directory=10000, seed=0):
+    """
+    writes a synthetic CBS directory for every provider code and year
+    :return: the directories paths
+    """
+    generator = SyntheticCbsGenerator(seed=seed)
+    return [generator.generate_directory(output_dir, provider_code, year, accidents_per_directory)
+            for provider_code in provider_codes for year in years]
@@ -0,0 +1,250 @@
+"""
+the Hebrew views of cbs_views materialized as tables partitioned by accident_year, with their own indexes.
+a view can be built on other views - they form a DAG, and are created and refreshed in dependency order, so every
+view is built from the fresh rows of the views it reads. a refresh rebuilds the given years only: a year is built
+aside and swapped in for its partition, so readers see its previous rows until then.
+they are created with `python main.py views create` and the years a CBS import touched are refreshed after it.
+"""
+import logging
+import re
+from collections import OrderedDict, namedtuple
+
+from anyway.common.views.cbs_views import Views
+from anyway.core import instrumentation
+from anyway.parsers import cbs_partitions
+
+from anyway import db
+
+SCHEMA = 'cbs'
+
+# indexes are format strings of the view's table and of the suffix of the index name, which tells apart the
+# indexes of the partitions
+MaterializedView = namedtuple('MaterializedView', ['name', 'query', 'dependencies', 'indexes'])
+
+
+def _query(view):
+    return view.strip().rstrip(';')
+
+
+def markers_hebrew_query():
+    """
+    Views.MARKERS_HEBREW_VIEW with a single row per marker - segment_id isn't unique in cbs.road_segments,
+    a marker whose segment has more than one row is joined with each of them by the view
+    """
+    return ('SELECT DISTINCT ON (id, provider_code, accident_year) * FROM ({0}) AS markers_hebrew '
+            'ORDER BY id, provider_code, accident_year'.format(_query(Views.MARKERS_HEBREW_VIEW)))
+
+
+MATERIALIZED_VIEWS = OrderedDict((view.name, view) for view in [
+    MaterializedView('markers_hebrew', markers_hebrew_query(), (), (
+        'CREATE UNIQUE INDEX IF NOT EXISTS markers_hebrew_key{1} ON {0} (id, provider_code, accident_year)',
+        'CREATE INDEX IF NOT EXISTS markers_hebrew_geom{1} ON {0} USING gist (geom)',
+        'CREATE INDEX IF NOT EXISTS markers_hebrew_year_provider_code{1} ON {0} (accident_year, provider_code)',
+        'CREATE INDEX IF NOT EXISTS markers_hebrew_yishuv_symbol{1} ON {0} (yishuv_symbol)',
+    )),
+    MaterializedView('involved_hebrew', _query(Views.INVOLVED_HEBREW_VIEW), (), (
+        'CREATE INDEX IF NOT EXISTS involved_hebrew_accident{1} ON {0} (accident_id, provider_code, accident_year)',
+    )),
+    MaterializedView('vehicles_hebrew', _query(Views.VEHICLES_HEBREW_VIEW), (), (
+        'CREATE INDEX IF NOT EXISTS vehicles_hebrew_accident{1} ON {0} (accident_id, provider_code, accident_year)',
+    )),
+    MaterializedView('involved_markers_vehicles_hebrew', _query(Views.INVOLVED_MARKERS_VEHICLES_HEBREW_VIEW),
+                     ('involved_hebrew', 'markers_hebrew', 'vehicles_hebrew'), (
+        'CREATE INDEX IF NOT EXISTS involved_markers_vehicles_hebrew_accident{1} '
+        'ON {0} (accident_id, provider_code, accident_year)',
+        'CREATE INDEX IF NOT EXISTS involved_markers_vehicles_hebrew_geom{1} ON {0} USING gist (geom)',
+    )),
+    MaterializedView('vehicles_markers_hebrew', _query(Views.VEHICLES_MARKERS_HEBREW_VIEW),
+                     ('vehicles_hebrew', 'markers_hebrew'), (
+        'CREATE INDEX IF NOT EXISTS vehicles_markers_hebrew_accident{1} '
+        'ON {0} (accident_id, provider_code, accident_year)',
+        'CREATE INDEX IF NOT EXISTS vehicles_markers_hebrew_geom{1} ON {0} USING gist (geom)',
+    )),
+])
+
+
+def _qualified(name):
+    return '{0}.{1}'.format(SCHEMA, name)
+
+
+def partition_name(name, year):
+    return '{0}_{1}'.format(name, int(year))
+
+
+def _exists(qualified_name):
+    return db.session.execute('SELECT to_regclass(:name)', {'name': qualified_name}).scalar() is not None
+
+
+def _is_materialized_view(name):
+    return db.session.execute('SELECT count(*) FROM pg_matviews WHERE schemaname = :schema AND matviewname = :name',
+                              {'schema': SCHEMA, 'name': name}).scalar() > 0
+
+
+def dependency_order(names=None):
+    """
+    :param names: views whose rows changed, all of them if None
+    :return: the names of these views and of every view built on them, each one after the views it reads
+    """
+    affected = set(MATERIALIZED_VIEWS if names is None else names)
+    unknown = affected - set(MATERIALIZED_VIEWS)
+    if unknown:
+        raise ValueError('Unknown views: {0}'.format(', '.join(sorted(unknown))))
+    ordered = []
+    visiting = set()
+
+    def visit(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError('The views {0} depend on each other'.format(', '.join(sorted(visiting))))
+        visiting.add(name)
+        for dependency in MATERIALIZED_VIEWS[name].dependencies:
+            visit(dependency)
+        visiting.remove(name)
+        ordered.append(name)
+
+    for name in MATERIALIZED_VIEWS:
+        visit(name)
+    # a view is affected by the views it's built on
+    for name in ordered:
+        if affected.intersection(MATERIALIZED_VIEWS[name].dependencies):
+            affected.add(name)
+    return [name for name in ordered if name in affected]
+
+
+def with_dependencies(names):
+    """
+    :return: the set of the names and of the views they are built on, directly or not
+    """
+    names = set(names)
+    for name in reversed(dependency_order()):
+        if name in names:
+            names.update(MATERIALIZED_VIEWS[name].dependencies)
+    return names
+
+
+def creation_order(names=None):
+    """
+    :param names: all the views if None
+    :return: the names, the views they are built on and the views built on them - with the views those are built
+    on, that have to exist to build them - each one after the views it reads
+    """
+    if names is None:
+        return dependency_order()
+    names = with_dependencies(names)
+    ordered = dependency_order(names)
+    while set(ordered) != names:
+        names = with_dependencies(ordered)
+        ordered = dependency_order(names)
+    return ordered
+
+
+def _create(view):
+    table = _qualified(view.name)
+    if _is_materialized_view(view.name):
+        # a materialized view of an earlier version
+        db.session.execute('DROP MATERIALIZED VIEW {0}'.format(table))
+    logging.info('Creating {0}'.format(table))
+    # the columns of the view's query, without running it
+    db.session.execute('CREATE TEMPORARY TABLE {0}_columns ON COMMIT DROP AS SELECT * FROM ({1}) AS {0} '
+                       'WITH NO DATA'.format(view.name, view.query))
+    db.session.execute('CREATE TABLE {0} (LIKE {1}_columns) PARTITION BY LIST (accident_year)'.format(
+        table, view.name))
+    for definition in view.indexes:
+        db.session.execute(definition.format(table, ''))
+
+
+@instrumentation.timed_stage('create_materialized_views')
+def create(names=None, replace=False):
+    """
+    creates the views that don't exist and fills them with all the years
+    :param names: creates these views, the views they are built on and the views built on them, all of them if None
+    :param replace: drops and recreates them, after their queries changed
+    """
+    ordered = creation_order(names)
+    if replace:
+        for name in reversed(ordered):
+            db.session.execute('DROP TABLE IF EXISTS {0}'.format(_qualified(name)))
+    created = []
+    for name in ordered:
+        if _exists(_qualified(name)) and not _is_materialized_view(name):
+            logging.info('{0} exists already'.format(_qualified(name)))
+            continue
+        _create(MATERIALIZED_VIEWS[name])
+        created.append(name)
+    db.session.commit()
+    if created:
+        refresh(names=created)
+
+
+def _index_name(definition, suffix):
+    return re.match(r'^CREATE (UNIQUE )?INDEX IF NOT EXISTS (\S+) ', definition.format('', suffix)).group(2)
+
+
+def refresh_year(view, year):
+    """
+    rebuilds the year's partition of the view aside, with its indexes, and swaps it in, in a single transaction.
+    the attach adopts the indexes instead of building them while the view is locked.
+    a year without rows has no partition.
+    :return: the number of rows of the year
+    """
+    table = _qualified(view.name)
+    partition = partition_name(view.name, year)
+    loaded = partition + '_new'
+    with instrumentation.measure('refresh_' + view.name) as record:
+        record['year'] = int(year)
+        db.session.execute('DROP TABLE IF EXISTS {0}'.format(_qualified(loaded)))
+        db.session.execute('CREATE TABLE {0} (LIKE {1} INCLUDING DEFAULTS)'.format(_qualified(loaded), table))
+        db.session.execute('ALTER TABLE {0} ADD CONSTRAINT {1}_year_check CHECK (accident_year = {2})'.format(
+            _qualified(loaded), loaded, int(year)))
+        rows = db.session.execute('INSERT INTO {0} SELECT * FROM ({1}) AS {2} WHERE accident_year = :year'.format(
+            _qualified(loaded), view.query, view.name), {'year': int(year)}).rowcount
+        record['rows'] = rows
+        if rows:
+            for definition in view.indexes:
+                db.session.execute(definition.format(_qualified(loaded), '_{0}_new'.format(int(year))))
+        # the previous rows stay readable until here
+        if _exists(_qualified(partition)):
+            db.session.execute('ALTER TABLE {0} DETACH PARTITION {1}'.format(table, _qualified(partition)))
+            db.session.execute('DROP TABLE {0}'.format(_qualified(partition)))
+        if rows:
+            db.session.execute('ALTER TABLE {0} RENAME TO {1}'.format(_qualified(loaded), partition))
+            for definition in view.indexes:
+                db.session.execute('ALTER INDEX {0}.{1} RENAME TO {2}'.format(
+                    SCHEMA, _index_name(definition, '_{0}_new'.format(int(year))),
+                    _index_name(definition, '_{0}'.format(int(year)))))
+            db.session.execute('ALTER TABLE {0} ATTACH PARTITION {1} FOR VALUES IN ({2})'.format(
+                table, _qualified(partition), int(year)))
+        else:
+            db.session.execute('DROP TABLE {0}'.format(_qualified(loaded)))
+        db.session.commit()
+    logging.info('Refreshed year {0} of {1}: {2} rows in {3} seconds'.format(year, table, rows, record['seconds']))
+    return rows
+
+
+def get_years(name):
+    """
+    :return: the sorted years that have partitions of the view
+    """
+    rows = db.session.execute("SELECT child.relname FROM pg_inherits "
+                              "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                              "WHERE pg_inherits.inhparent = to_regclass(:name)",
+                              {'name': _qualified(name)})
+    pattern = re.compile(r'^{0}_(\d{{4}})$'.format(name))
+    return sorted(int(match.group(1)) for match in (pattern.match(row[0]) for row in rows) if match)
+
+
+def refresh(years=None, names=None):
+    """
+    refreshes the years of the views that were created, in dependency order
+    :param years: the years whose rows changed, e.g. the years an import loaded or dropped. if None, all the years
+    that have markers or partitions of the view
+    :param names: refreshes these views and the views built on them, all of them if None
+    """
+    for name in dependency_order(names):
+        if not _exists(_qualified(name)) or _is_materialized_view(name):
+            logging.info("{0} wasn't created, not refreshing it".format(_qualified(name)))
+            continue
+        view_years = set(cbs_partitions.get_partition_years()) | set(get_years(name)) if years is None else set(years)
+        for year in sorted(view_years):
+            refresh_year(MATERIALIZED_VIEWS[name], year)
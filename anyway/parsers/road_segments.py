@@ -1,9 +1,11 @@
  # -*- coding: utf-8 -*-
+import logging
+
 from flask_sqlalchemy import SQLAlchemy
 from openpyxl import load_workbook
 
 from anyway.core.utils import Utils
-from anyway.common.models.cbs_models import RoadSegments
+from anyway.common.models.cbs_models import AccidentMarker, RoadSegments
 
 
 def _iter_rows(filename):
@@ -43,3 +45,48 @@ def parse(filename):
     for batch in Utils.batch_iterator(_iter_rows(filename), batch_size=50):
         db.session.bulk_insert_mappings(RoadSegments, batch)
         db.session.commit()
+
+
+def _update_road_segment_ids(db, year, updates):
+    """
+    :param updates: (id, provider_code, road_segment_id) tuples of the year's markers
+    """
+    values = ', '.join('(:id{0}, :provider_code{0}, :road_segment_id{0})'.format(i) for i in range(len(updates)))
+    params = {'year': year}
+    for i, (marker_id, provider_code, road_segment_id) in enumerate(updates):
+        params.update({'id{0}'.format(i): marker_id,
+                       'provider_code{0}'.format(i): provider_code,
+                       'road_segment_id{0}'.format(i): road_segment_id})
+    db.session.execute('UPDATE cbs.markers SET road_segment_id = updates.road_segment_id '
+                       'FROM (VALUES {0}) AS updates (id, provider_code, road_segment_id) '
+                       'WHERE cbs.markers.accident_year = :year AND cbs.markers.id = updates.id '
+                       'AND cbs.markers.provider_code = updates.provider_code'.format(values), params)
+
+
+def backfill_road_segment_ids(batch_size=5000):
+    """
+    sets the road_segment_id of the existing markers from the current cbs.road_segments, the way the import sets it,
+    a year at a time in its own transaction. run it after the road segments are reloaded.
+    """
+    from anyway import db
+    from anyway.parsers.cbs import load_road_segments_index
+    from anyway.parsers.cbs_partitions import get_partition_years
+
+    road_segments = load_road_segments_index()
+    for year in get_partition_years():
+        markers = db.session.query(AccidentMarker.id, AccidentMarker.provider_code, AccidentMarker.road1,
+                                   AccidentMarker.km) \
+            .filter(AccidentMarker.accident_year == year,
+                    AccidentMarker.road1.isnot(None),
+                    AccidentMarker.km.isnot(None)).all()
+        road_segment_ids = road_segments.get_many([marker.road1 for marker in markers],
+                                                  [marker.km for marker in markers])
+        db.session.execute('UPDATE cbs.markers SET road_segment_id = NULL '
+                           'WHERE accident_year = :year AND road_segment_id IS NOT NULL', {'year': year})
+        updates = [(marker.id, marker.provider_code, road_segment_id)
+                   for marker, road_segment_id in zip(markers, road_segment_ids) if road_segment_id is not None]
+        for batch in Utils.batch_iterator(updates, batch_size=batch_size):
+            if batch:
+                _update_road_segment_ids(db, year, batch)
+        db.session.commit()
+        logging.info('Set the road segment of {0} markers of year {1}'.format(len(updates), year))
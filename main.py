@@ -29,9 +29,25 @@ def process():
 
 
 @process.command()
-def cbs():
+@click.option('--loader', type=click.Choice(['orm', 'copy']), default='orm',
+              help='orm - SQLAlchemy bulk inserts, copy - PostgreSQL COPY FROM STDIN')
+@click.option('--chunk-size', type=int, default=None, help='rows per insert/COPY chunk')
+@click.option('--stream-chunk-size', type=int, default=None,
+              help='streaming mode - read and import the data files this many rows at a time')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              help='number of processes importing directories in parallel')
+@click.option('--incremental', is_flag=True, default=False,
+              help='reload only the directories that changed since the last import')
+@click.option('--staging', is_flag=True, default=False,
+              help='load and check all the years aside and swap them in together, in a single transaction')
+@click.option('--resume', is_flag=True, default=False,
+              help='continue an interrupted import, run with the same options, from the directories it didn\'t finish')
+@click.option('--report', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='write a JSON report of the import stages timings, rows, round trips and memory')
+def cbs(loader, chunk_size, stream_chunk_size, workers, incremental, staging, resume, report):
     from anyway.parsers.cbs import main
-    return main()
+    return main(loader=loader, chunk_size=chunk_size, stream_chunk_size=stream_chunk_size, workers=workers,
+                incremental=incremental, staging=staging, resume=resume, report_path=report)
 
 
 @process.command()
@@ -41,6 +57,13 @@ def road_segments(filename):
     return parse(filename)
 
 
+@process.command()
+@click.option('--batch-size', type=click.IntRange(min=1), default=5000, help='markers updated per statement')
+def road_segment_ids(batch_size):
+    from anyway.parsers.road_segments import backfill_road_segment_ids
+    return backfill_road_segment_ids(batch_size=batch_size)
+
+
 @process.command()
 @click.argument("filename", type=str, default="data/news_flash/news_flash.csv")
 def news_flash(filename):
@@ -48,5 +71,98 @@ def news_flash(filename):
     return parse(filename)
 
 
+@cli.group()
+def views():
+    pass
+
+
+@views.command()
+@click.option('--view', 'names', multiple=True,
+              help='create this view (with the views it reads and the views that read it), can be repeated')
+@click.option('--replace', is_flag=True, default=False,
+              help='drop and recreate the materialized views, after their queries changed')
+def create(names, replace):
+    from anyway.parsers.materialized_views import create
+    return create(names=names or None, replace=replace)
+
+
+@views.command()
+@click.option('--view', 'names', multiple=True,
+              help='refresh this view (and the views that read it), can be repeated')
+@click.option('--year', 'years', type=int, multiple=True, help='refresh this year, can be repeated - all by default')
+def refresh(names, years):
+    from anyway.parsers.materialized_views import refresh
+    return refresh(years or None, names=names or None)
+
+
+@cli.group()
+def benchmark():
+    pass
+
+
+@benchmark.command()
+@click.option('--output', type=click.Path(file_okay=False), default='data/cbs_synthetic',
+              help='the directory the synthetic CBS directories are written to')
+@click.option('--years', type=int, multiple=True, default=[2099],
+              help='a year to generate, can be repeated')
+@click.option('--provider-codes', type=int, multiple=True, default=[1, 3],
+              help='a provider code to generate, can be repeated')
+@click.option('--accidents', type=click.IntRange(min=1), default=10000,
+              help='the number of accidents per provider/year directory')
+@click.option('--seed', type=int, default=0)
+def generate(output, years, provider_codes, accidents, seed):
+    from anyway.parsers.cbs_synthetic import generate
+    return generate(output, years, provider_codes, accidents, seed)
+
+
+@benchmark.command('cbs')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--sample', type=click.IntRange(min=1), default=None,
+              help='run the per-row benchmarks on this many accidents')
+@click.option('--import/--no-import', 'import_data', default=True,
+              help='benchmark the whole import of the directory against the database')
+@click.option('--loader', type=click.Choice(['orm', 'copy']), default='orm')
+@click.option('--chunk-size', type=int, default=None, help='rows per insert/COPY chunk')
+@click.option('--stream-chunk-size', type=int, default=None,
+              help='streaming mode - read and import the data files this many rows at a time')
+@click.option('--report', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='write a JSON report of the benchmarks')
+def benchmark_cbs(directory, sample, import_data, loader, chunk_size, stream_chunk_size, report):
+    from anyway.parsers.cbs_benchmark import main
+    return main(directory, sample=sample, import_data=import_data, loader=loader, chunk_size=chunk_size,
+                stream_chunk_size=stream_chunk_size, report_path=report)
+
+
+@benchmark.command('views')
+@click.option('--year', type=int, default=None, help='the year read from the views, the latest one by default')
+@click.option('--repeat', type=click.IntRange(min=1), default=3, help='the number of times every view is read')
+@click.option('--report', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='write a JSON report of the benchmarks')
+def benchmark_views(year, repeat, report):
+    from anyway.parsers.cbs_benchmark import views_main
+    return views_main(year=year, repeat=repeat, report_path=report)
+
+
+@benchmark.command('markers')
+@click.option('--year', type=int, default=None, help='the year of the markers, the latest one by default')
+@click.option('--viewports', type=click.IntRange(min=1), default=200,
+              help='the number of city-sized viewports whose markers are read')
+@click.option('--zoom', type=int, default=None, help='the map zoom of the requests, the markers details zoom by default')
+@click.option('--url', type=str, default=None,
+              help='request the markers from this running /markers API, e.g. http://localhost:5000/markers/ - '
+                   'the query runs against the database by default')
+@click.option('--concurrency', type=click.IntRange(min=1), default=1, help='concurrent requests to the --url API')
+@click.option('--p95-budget', type=click.IntRange(min=1), default=100,
+              help='fail when the 95th percentile latency is this many milliseconds or more')
+@click.option('--seed', type=click.FloatRange(-1, 1), default=0.5, help='the seed of the random viewports')
+@click.option('--report', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='write a JSON report of the benchmarks')
+def benchmark_markers(year, viewports, zoom, url, concurrency, p95_budget, seed, report):
+    from anyway.parsers.cbs_benchmark import markers_main
+    if not markers_main(year=year, viewports=viewports, zoom=zoom, url=url, concurrency=concurrency,
+                        p95_budget_ms=p95_budget, seed=seed, report_path=report):
+        sys.exit(1)
+
+
 if __name__ == '__main__':
     cli(sys.argv[1:])  # pylint: disable=too-many-function-args
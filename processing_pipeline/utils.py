@@ -1,3 +1,6 @@
+import hashlib
+import logging
+import os
 import pandas as pd
 from pathlib import Path
 import yaml
@@ -10,6 +13,8 @@ PROCESSED_DATA_CSV_FILES_PATH = Path(PROCESSING_PIPELINE_DAGS_FOLDER_PATH, "csv_
 PROCESSED_DATA_CSV_FILES_PATH.mkdir(exist_ok=True, parents=True)
 FINAL_PROCESSED_DATA_CSV_FILES_PATH = Path(PROCESSING_PIPELINE_DAGS_FOLDER_PATH, "csv_files", "final_processed_csv_files")
 FINAL_PROCESSED_DATA_CSV_FILES_PATH.mkdir(exist_ok=True, parents=True)
+RAW_DATA_PARQUET_CACHE_PATH = Path(PROCESSING_PIPELINE_DAGS_FOLDER_PATH, "csv_files", "raw_parquet_cache")
+RAW_DATA_PARQUET_CACHE_PATH.mkdir(exist_ok=True, parents=True)
 
 with Path(PROCESSING_PIPELINE_DAGS_FOLDER_PATH, "pipeline_configuration.yaml").open() as pipeline_configuration_file:
     pipeline_configuration = yaml.load(pipeline_configuration_file, Loader=yaml.BaseLoader)
@@ -29,7 +34,37 @@ def load_data(file_name: str, raw_data=False, processed_data=False) -> pd.DataFr
         csv_files_path = PROCESSED_DATA_CSV_FILES_PATH
 
     file_path = Path(csv_files_path, f"H{DATA_DATE_STRING}", file_name)
+    if raw_data:
+        return read_csv_cached(file_path)
+    df = pd.read_csv(file_path)
+    return df
+
+
+def read_csv_cached(file_path: Path) -> pd.DataFrame:
+    """
+    reads a raw data csv file from its Parquet copy, keyed by the sha256 of the file, so that every task doesn't
+    parse the same csv text again. the copy is written by the first read.
+    """
+    digest = hashlib.sha256()
+    with file_path.open("rb") as csv_file:
+        for block in iter(lambda: csv_file.read(1 << 20), b""):
+            digest.update(block)
+    cached_file_path = Path(RAW_DATA_PARQUET_CACHE_PATH, f"{digest.hexdigest()}.parquet")
+    if cached_file_path.exists():
+        return pd.read_parquet(cached_file_path)
+
     df = pd.read_csv(file_path)
+    # written aside and renamed, the tasks run in parallel
+    temp_file_path = cached_file_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        df.to_parquet(temp_file_path, index=False)
+    # ArrowInvalid and ArrowTypeError - e.g. an object column of both strings and ints
+    except (ValueError, TypeError, ImportError) as e:
+        logging.warning(f"Couldn't cache '{file_path}': {e}")
+        if temp_file_path.exists():
+            temp_file_path.unlink()
+        return df
+    temp_file_path.replace(cached_file_path)
     return df
 
 
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from anyway.core import field_names
+from anyway.parsers.cbs_dictionaries import MAX_JUNCTION_DISTANCE, JunctionsIndex, RoadSegmentsIndex, \
+    StreetsDictionary, describe_junction
+
+# (settlement, street sign, name): a sign with two names, a sign listed twice with the same name, a sign without
+# a name, and the same sign in another settlement
+STREETS = [(3000, 1, u'יפו'),
+           (3000, 2, u'הרצל'),
+           (3000, 2, u'ביאליק'),
+           (3000, 3, u'אלנבי'),
+           (3000, 3, u'אלנבי'),
+           (3000, 4, np.nan),
+           (5000, 1, u'הנביאים'),
+           (5000, np.nan, u'ללא סמל')]
+
+
+def _street_filter(settlement, street_sign):
+    """
+    the per settlement lists filter StreetsDictionary replaced - a name only when the sign appears once
+    """
+    names = [name for street_settlement, sign, name in STREETS
+             if street_settlement == settlement and sign == street_sign]
+    return names[0] if len(names) == 1 else u''
+
+
+@pytest.fixture
+def streets():
+    return StreetsDictionary(pd.DataFrame(STREETS, columns=[field_names.settlement, field_names.street_sign,
+                                                            field_names.street_name]))
+
+
+STREET_KEYS = [(3000, 1), (3000, 2), (3000, 3), (3000, 4), (3000, 9), (5000, 1), (7000, 1)]
+
+
+def test_streets_match_the_filter(streets):
+    for settlement, street_sign in STREET_KEYS:
+        expected = _street_filter(settlement, street_sign)
+        # a street without a name is an empty string now, it was NaN
+        expected = u'' if pd.isnull(expected) else expected
+        assert streets.get(float(settlement), float(street_sign)) == expected
+
+
+def test_ambiguous_and_nameless_streets_are_empty(streets):
+    assert streets.get(3000.0, 1.0) == u'יפו'
+    assert streets.get(3000.0, 2.0) == u''
+    assert streets.get(3000.0, 3.0) == u''
+    assert streets.get(3000.0, 4.0) == u''
+    assert streets.get(5000.0, 1.0) == u'הנביאים'
+
+
+def test_get_many_matches_get(streets):
+    settlements = [settlement for settlement, _ in STREET_KEYS] + [np.nan]
+    street_signs = [street_sign for _, street_sign in STREET_KEYS] + [1]
+    assert streets.get_many(settlements, street_signs) == \
+        [streets.get(float(settlement), float(street_sign)) for settlement, street_sign in STREET_KEYS] + [u'']
+
+
+# (road1, road2, km, name), in file order: two junctions at km 50 of road 1 and one at km 30 of road 4
+INTERSECTIONS = [(1, 2, 10.0, u'א'),
+                 (1, 3, 50.0, u'ב'),
+                 (1, 4, 30.0, u'ג'),
+                 (1, 5, 50.0, u'ד'),
+                 (4, 1, 30.0, u'ה'),
+                 (6, 1, 200000.0, u'ו')]
+
+
+@pytest.fixture
+def junctions():
+    return JunctionsIndex(pd.DataFrame(INTERSECTIONS, columns=[field_names.road1, field_names.road2,
+                                                               field_names.km, field_names.junction_name]))
+
+
+def _nearest_scan(road, km):
+    """
+    the linear scan the index replaced - the first junction of the road, in file order, at the smallest distance
+    """
+    nearest, distance = None, MAX_JUNCTION_DISTANCE
+    for junction_road, _, junction_km, name in INTERSECTIONS:
+        if junction_road == road and abs(km - junction_km) < distance:
+            nearest, distance = (junction_km, name), abs(km - junction_km)
+    return nearest
+
+
+@pytest.mark.parametrize('road,km', [
+    (1, 10.0),  # at a junction
+    (1, 20.0),  # a tie between km 10 and km 30 - the first in the file
+    (1, 40.0),  # a tie between km 30 and the two junctions at km 50
+    (1, 50.0),  # two junctions at the same km
+    (1, 49.0),
+    (1, -5.0),  # before the first junction
+    (1, 900.0),  # after the last junction
+    (4, 0.0),  # a road with a single junction
+    (4, 100.0),
+    (2, 10.0),  # a road without junctions
+    (6, 0.0),  # a junction too far away
+])
+def test_nearest_matches_the_linear_scan(junctions, road, km):
+    assert junctions.nearest(road, km) == _nearest_scan(road, km)
+
+
+def test_nearest_junction_before_and_after_the_road_junctions(junctions):
+    assert junctions.nearest(1, -5.0) == (10.0, u'א')
+    assert junctions.nearest(1, 900.0) == (50.0, u'ב')
+    assert junctions.nearest(2, 10.0) is None
+    assert junctions.nearest(1, None) is None
+
+
+def test_get_junctions_matches_get_junction(junctions):
+    roads = [1, 1, 1, 1, 1, 4, 2, 6, 1]
+    kms = [10.0, 20.0, 40.0, 51.0, 900.0, 35.0, 10.0, 0.0, np.nan]
+    accidents = pd.DataFrame({field_names.road1: roads, field_names.km: kms})
+    expected = []
+    for road, km in zip(roads, kms):
+        nearest = _nearest_scan(road, km)
+        expected.append(describe_junction(road, km, *nearest) if nearest else u'')
+    assert junctions.get_junctions(accidents) == expected
+    assert [junctions.get_junction({field_names.road1: road, field_names.km: km})
+            for road, km in zip(roads[:-1], kms[:-1])] == expected[:-1]
+
+
+def test_exact_junction_of_non_urban_intersections(junctions):
+    accidents = pd.DataFrame({field_names.road1: [1, 1], field_names.road2: [5, 9], field_names.km: [50.0, 50.0],
+                              field_names.non_urban_intersection: [7, 7]})
+    assert junctions.get_junctions(accidents) == [u'ד', u'']
+
+
+# (segment_id, road, from_km, to_km) in kilometers: segments 7 and 3 overlap on 8-10, and 4 is inside 2.
+# road 5 has a gap between 10 and 12, and the segments without a km or with from_km > to_km are skipped
+ROAD_SEGMENTS = [(7, 1, 0.0, 10.0),
+                 (3, 1, 8.0, 20.0),
+                 (2, 5, 0.0, 10.0),
+                 (4, 5, 2.0, 3.0),
+                 (9, 5, 12.0, 15.0),
+                 (8, 6, None, 4.0),
+                 (6, 6, 5.0, 1.0)]
+
+
+def _segment_scan(road, km):
+    """
+    the join the index replaced - the lowest segment_id of the road whose from_km <= km / 10 <= to_km
+    """
+    ids = [segment_id for segment_id, segment_road, from_km, to_km in ROAD_SEGMENTS
+           if segment_road == road and from_km is not None and to_km is not None and from_km <= to_km
+           and from_km <= km / 10.0 <= to_km]
+    return min(ids) if ids else None
+
+
+@pytest.fixture
+def road_segments():
+    return RoadSegmentsIndex(ROAD_SEGMENTS)
+
+
+def test_road_segments_are_looked_up_in_cbs_km_units(road_segments):
+    assert RoadSegmentsIndex.KM_UNITS == 10
+    # km 50 of the CBS files is 5 kilometers
+    assert road_segments.get(1, 50) == 7
+    assert road_segments.get(1, 150) == 3
+    assert road_segments.get(1, 201) is None
+
+
+def test_the_lowest_overlapping_segment_wins(road_segments):
+    assert road_segments.get(1, 90) == 3
+    assert road_segments.get(5, 25) == 2
+    assert road_segments.get(5, 5) == 2
+
+
+def test_segment_boundaries_are_inclusive(road_segments):
+    assert road_segments.get(1, 0) == 7
+    assert road_segments.get(1, 80) == 3
+    assert road_segments.get(1, 100) == 3
+    assert road_segments.get(1, 200) == 3
+    assert road_segments.get(5, 100) == 2
+    assert road_segments.get(5, 110) is None
+    assert road_segments.get(5, 120) == 9
+
+
+def test_unknown_and_invalid_segments(road_segments):
+    assert len(road_segments) == 5
+    assert road_segments.get(6, 20) is None
+    assert road_segments.get(2, 50) is None
+    assert road_segments.get(None, 50) is None
+    assert road_segments.get(1, None) is None
+
+
+def test_road_segments_match_the_scan(road_segments):
+    roads = [1, 5, 6, 2]
+    kms = np.arange(-10, 170, 0.5)
+    for road in roads:
+        for km in kms.tolist():
+            assert road_segments.get(road, km) == _segment_scan(road, km), (road, km)
+    many_roads = [road for road in roads for _ in kms] + [None, 1]
+    many_kms = [km for _ in roads for km in kms.tolist()] + [50.0, None]
+    assert road_segments.get_many(many_roads, many_kms) == \
+        [road_segments.get(road, km) for road, km in zip(many_roads, many_kms)]
@@ -0,0 +1,84 @@
+import os
+from unittest import mock
+
+import pytest
+
+from anyway.parsers import cbs_manifest
+from anyway.parsers.cbs_manifest import content_hash, get_changed_directories, get_unfinished_directories, \
+    hash_directory
+
+FILES = {'AccData.csv': b'pk_teuna_fikt,sug_tik\n1,1\n', 'InvData.csv': b'pk_teuna_fikt\n1\n'}
+
+
+def _write(directory, files):
+    os.makedirs(directory, exist_ok=True)
+    for name, content in files.items():
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(content)
+    return directory
+
+
+@pytest.fixture
+def directories(tmp_path):
+    """
+    :return: two imported (directory, provider_code, year) tuples, and the manifest of their import
+    """
+    first = _write(str(tmp_path / 'H20191'), FILES)
+    second = _write(str(tmp_path / 'H20181'), FILES)
+    directories = [(first, 1, 2019), (second, 1, 2018)]
+    db = mock.MagicMock()
+    with mock.patch.object(cbs_manifest, 'db', db):
+        for directory, provider_code, year in directories:
+            cbs_manifest.record_import(directory, provider_code, year, hash_directory(directory), 1, 1, 0)
+    manifest = {(entry.provider_code, entry.year): entry
+                for entry in (call[0][0] for call in db.session.merge.call_args_list)}
+    with mock.patch.object(cbs_manifest, 'get_manifest', return_value=manifest):
+        yield directories
+
+
+def test_content_hash():
+    file_hashes = {'AccData.csv': 'a' * 64, 'InvData.csv': 'b' * 64}
+    assert content_hash(file_hashes) == content_hash(dict(reversed(list(file_hashes.items()))))
+    assert content_hash(file_hashes) != content_hash(dict(file_hashes, **{'InvData.csv': 'c' * 64}))
+    assert content_hash(file_hashes) != content_hash({'AccData.csv': 'a' * 64, 'VehData.csv': 'b' * 64})
+    assert content_hash(file_hashes) != content_hash(dict(file_hashes, **{'VehData.csv': 'c' * 64}))
+    assert content_hash(file_hashes) != content_hash({'AccData.csv': 'a' * 64})
+
+
+def test_hash_directory_skips_subdirectories(tmp_path):
+    directory = _write(str(tmp_path / 'H20191'), FILES)
+    os.makedirs(os.path.join(directory, 'raw'))
+    assert sorted(hash_directory(directory)) == sorted(FILES)
+
+
+def test_unchanged_directories(directories):
+    assert get_changed_directories(directories) == []
+
+
+def test_a_modified_file(directories):
+    _write(directories[0][0], {'InvData.csv': b'pk_teuna_fikt\n2\n'})
+    assert get_changed_directories(directories) == [directories[0]]
+
+
+def test_an_added_file(directories):
+    _write(directories[1][0], {'VehData.csv': b'pk_teuna_fikt\n1\n'})
+    assert get_changed_directories(directories) == [directories[1]]
+
+
+def test_a_renamed_file(directories):
+    directory = directories[0][0]
+    os.rename(os.path.join(directory, 'InvData.csv'), os.path.join(directory, 'InvData2.csv'))
+    assert get_changed_directories(directories) == [directories[0]]
+
+
+def test_a_directory_that_was_never_imported(directories, tmp_path):
+    new = (_write(str(tmp_path / 'H20192'), FILES), 2, 2019)
+    assert get_changed_directories(directories + [new]) == [new]
+
+
+def test_unfinished_directories(directories, tmp_path):
+    new = (_write(str(tmp_path / 'H20192'), FILES), 2, 2019)
+    # a finished directory is skipped on resume even when its files changed since
+    _write(directories[0][0], {'InvData.csv': b'pk_teuna_fikt\n2\n'})
+    assert get_unfinished_directories(directories + [new]) == [new]
+    assert get_unfinished_directories(directories) == []
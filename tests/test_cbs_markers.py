@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pytest
+
+from anyway.core import field_names
+from anyway.parsers import cbs, cbs_cache, cbs_schema, cbs_synthetic
+from anyway.parsers.cbs_dictionaries import RoadSegmentsIndex
+
+
+@pytest.fixture(scope='module')
+def files(tmp_path_factory):
+    directory = cbs_synthetic.generate(str(tmp_path_factory.mktemp('cbs')), [2019], provider_codes=[1],
+                                       accidents_per_directory=500, seed=1)[0]
+    cache_dir = cbs_cache.CACHE_DIR
+    cbs_cache.CACHE_DIR = str(tmp_path_factory.mktemp('cbs_cache'))
+    try:
+        yield cbs.get_files(directory)
+    finally:
+        cbs_cache.CACHE_DIR = cache_dir
+
+
+def _road_segments(accidents):
+    """
+    overlapping segments on the accidents roads, so that some markers are in a segment and some aren't
+    """
+    roads = sorted(set(accidents[field_names.road1].dropna().astype(int)))
+    segments = []
+    for road in roads[::2]:
+        segments += [(len(segments) + 1, road, 0, 20), (len(segments) + 2, road, 15, 40)]
+    return RoadSegmentsIndex(segments)
+
+
+def _same(expected, actual):
+    """
+    equal and of the same type - an int where create_marker has a float would be written differently.
+    numpy scalars are compared as the python values they are written as.
+    """
+    expected, actual = [value.item() if isinstance(value, np.generic) else value for value in (expected, actual)]
+    if isinstance(expected, float) and isinstance(actual, float) and math.isnan(expected) and math.isnan(actual):
+        return True
+    return type(expected) is type(actual) and expected == actual
+
+
+def test_create_markers_matches_create_marker(files):
+    accidents = cbs_schema.widen(files[cbs.ACCIDENTS])
+    dictionaries = (files[cbs.STREETS], files[cbs.ROADS], files[cbs.NON_URBAN_INTERSECTION])
+    road_segments = _road_segments(accidents)
+    expected = [cbs.create_marker(accident, *dictionaries, road_segments=road_segments)
+                for _, accident in accidents.iterrows()]
+    actual = [marker for batch in cbs.create_markers(accidents, *dictionaries, batch_size=120,
+                                                     road_segments=road_segments)
+              for marker in batch]
+    assert len(actual) == len(expected)
+    for expected_marker, actual_marker in zip(expected, actual):
+        assert list(actual_marker) == list(expected_marker)
+        for field, value in expected_marker.items():
+            assert _same(value, actual_marker[field]), \
+                'marker {0}, {1}: {2!r} ({3}) != {4!r} ({5})'.format(
+                    expected_marker['id'], field, value, type(value).__name__,
+                    actual_marker[field], type(actual_marker[field]).__name__)
+
+
+def test_markers_fields_are_set(files):
+    accidents = cbs_schema.widen(files[cbs.ACCIDENTS])
+    markers = [marker for batch in cbs.create_markers(accidents, files[cbs.STREETS], files[cbs.ROADS],
+                                                      files[cbs.NON_URBAN_INTERSECTION],
+                                                      road_segments=_road_segments(accidents))
+               for marker in batch]
+    # the synthetic files exercise the localized description, geometry, junction, street and road segment paths
+    assert any(marker['description'] != '{}' for marker in markers)
+    assert any(marker['geom'] for marker in markers)
+    assert any(marker['junction'] for marker in markers)
+    assert any(marker['address'] for marker in markers)
+    assert any(marker['road_segment_id'] is not None for marker in markers)
+    assert any(marker['road_segment_id'] is None for marker in markers)
+    assert all(marker['accident_year'] == 2019 for marker in markers)
+    assert len(set(marker['id'] for marker in markers)) == len(markers)
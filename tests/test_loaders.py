@@ -0,0 +1,35 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from anyway.common.models.cbs_models import AccidentMarker
+from anyway.core.loaders import COPY_NULL, CopyLoader
+
+
+def _fake_db(copies):
+    """
+    :param copies: the (statement, data) of every COPY are appended to it
+    """
+    db = mock.MagicMock()
+    db.engine.dialect = postgresql.dialect()
+    cursor = db.session.connection.return_value.connection.cursor.return_value
+    cursor.copy_expert.side_effect = lambda statement, buffer: copies.append((statement, buffer.read()))
+    return db
+
+
+def test_copy_frame_writes_integers_with_missing_values_as_integers():
+    copies = []
+    frame = pd.DataFrame({'id': [1, 2, 3],
+                          'provider_code': [1, 1, 3],
+                          'accident_year': [2019, 2019, 2019],
+                          'road1': [90.0, np.nan, 4.0],
+                          'km': [12.5, np.nan, 3.0]})
+    assert CopyLoader(_fake_db(copies), chunk_size=2).load(AccidentMarker, frame) == 3
+    assert len(copies) == 2
+    assert copies[0][0].startswith('COPY cbs.markers (id, provider_code, accident_year, road1, km) FROM STDIN')
+    rows = ''.join(data for _, data in copies).splitlines()
+    assert rows == ['1,1,2019,90,12.5',
+                    '2,1,2019,{0},{0}'.format(COPY_NULL),
+                    '3,3,2019,4,3.0']
@@ -0,0 +1,91 @@
+import datetime
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from anyway import app
+from anyway.apis.markers import query
+from anyway.core.constants import CONST
+
+VIEWPORT = {'ne_lat': 32.09, 'ne_lng': 34.80, 'sw_lat': 32.05, 'sw_lng': 34.75}
+
+MARKER = {'id': 1, 'provider_code': 1, 'accident_year': 2019, 'latitude': 32.07, 'longitude': 34.78,
+          'accident_severity': 2, 'accident_timestamp': datetime.datetime(2019, 5, 1, 12, 30)}
+
+
+@pytest.fixture
+def client():
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    db = mock.MagicMock()
+    db.session.execute.return_value = [MARKER]
+    with mock.patch.object(query, 'db', db):
+        yield db
+
+
+def _limit(statement):
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    return int(sql.rsplit('LIMIT', 1)[1])
+
+
+def test_markers_of_a_viewport(client, db):
+    response = client.get('/markers/', query_string=dict(VIEWPORT, zoom=CONST.MINIMAL_ZOOM - 1,
+                                                             start_date='2019-01-01', end_date='2019-12-31'))
+    assert response.status_code == 200
+    assert response.get_json() == [{'id': 1, 'provider_code': 1, 'accident_year': 2019, 'latitude': 32.07,
+                                    'longitude': 34.78, 'accident_severity': 2,
+                                    'accident_timestamp': '2019-05-01T12:30:00'}]
+    statement = db.session.execute.call_args[0][0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert 'cbs.markers.geom && ST_MakeEnvelope' in sql
+    assert 'cbs.markers.title' not in sql
+
+
+def test_the_details_from_the_minimal_zoom(client, db):
+    response = client.get('/markers/', query_string=dict(VIEWPORT, zoom=CONST.MINIMAL_ZOOM))
+    assert response.status_code == 200
+    sql = str(db.session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert 'cbs.markers.title' in sql
+
+
+@pytest.mark.parametrize('viewport', [
+    dict(VIEWPORT, ne_lat=32.05, sw_lat=32.09),
+    dict(VIEWPORT, ne_lng=34.75, sw_lng=34.80),
+    dict(VIEWPORT, ne_lat=91),
+])
+def test_an_invalid_viewport(client, db, viewport):
+    response = client.get('/markers/', query_string=viewport)
+    assert response.status_code == 400
+    assert 'is not a valid bounding box' in response.get_json()['message']
+    db.session.execute.assert_not_called()
+
+
+@pytest.mark.parametrize('corner', sorted(VIEWPORT))
+def test_a_missing_corner(client, db, corner):
+    response = client.get('/markers/', query_string={name: value for name, value in VIEWPORT.items()
+                                                     if name != corner})
+    assert response.status_code == 400
+    assert corner in response.get_json()['errors']
+    db.session.execute.assert_not_called()
+
+
+def test_an_inverted_date_range(client, db):
+    response = client.get('/markers/', query_string=dict(VIEWPORT, start_date='2019-12-31', end_date='2019-01-01'))
+    assert response.status_code == 400
+    db.session.execute.assert_not_called()
+
+
+def test_at_most_entries_per_page_markers(client, db):
+    with mock.patch.object(query.config, 'ENTRIES_PER_PAGE', '50'):
+        response = client.get('/markers/', query_string=VIEWPORT)
+        assert response.status_code == 200
+        assert _limit(db.session.execute.call_args[0][0]) == 50
+        markers_filter = query.make_filter(**VIEWPORT)
+        assert _limit(query.markers_query(markers_filter, limit=10)) == 10
+        assert _limit(query.markers_query(markers_filter, limit=100)) == 50
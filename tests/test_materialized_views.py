@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from unittest import mock
+
+import pytest
+
+from anyway.parsers import materialized_views
+from anyway.parsers.materialized_views import MATERIALIZED_VIEWS, MaterializedView, creation_order, \
+    dependency_order, with_dependencies
+
+
+def _before_its_dependencies(ordered):
+    return [name for position, name in enumerate(ordered)
+            if any(dependency in ordered[position:] for dependency in MATERIALIZED_VIEWS[name].dependencies)]
+
+
+def test_all_the_views_in_dependency_order():
+    ordered = dependency_order()
+    assert sorted(ordered) == sorted(MATERIALIZED_VIEWS)
+    assert _before_its_dependencies(ordered) == []
+
+
+def test_the_views_built_on_a_view_are_refreshed_after_it():
+    assert dependency_order(['markers_hebrew']) == ['markers_hebrew', 'involved_markers_vehicles_hebrew',
+                                                    'vehicles_markers_hebrew']
+    assert dependency_order(['involved_hebrew']) == ['involved_hebrew', 'involved_markers_vehicles_hebrew']
+    assert dependency_order(['vehicles_markers_hebrew']) == ['vehicles_markers_hebrew']
+
+
+def test_unknown_views():
+    with pytest.raises(ValueError, match='Unknown views: markers'):
+        dependency_order(['markers_hebrew', 'markers'])
+    with pytest.raises(ValueError):
+        creation_order(['markers'])
+
+
+def test_views_that_depend_on_each_other():
+    views = OrderedDict([('a', MaterializedView('a', '', ('b',), ())),
+                         ('b', MaterializedView('b', '', ('a',), ()))])
+    with mock.patch.object(materialized_views, 'MATERIALIZED_VIEWS', views):
+        with pytest.raises(ValueError, match='depend on each other'):
+            dependency_order()
+
+
+def test_with_dependencies():
+    assert with_dependencies(['vehicles_markers_hebrew']) == {'vehicles_markers_hebrew', 'vehicles_hebrew',
+                                                              'markers_hebrew'}
+    assert with_dependencies(['markers_hebrew']) == {'markers_hebrew'}
+
+
+def test_creation_order_includes_what_the_created_views_read():
+    ordered = creation_order(['vehicles_markers_hebrew'])
+    assert sorted(ordered) == sorted(MATERIALIZED_VIEWS)
+    assert _before_its_dependencies(ordered) == []
+    # involved_markers_vehicles_hebrew, built on markers_hebrew, reads involved_hebrew too
+    assert 'involved_hebrew' in creation_order(['markers_hebrew'])
+    assert creation_order() == dependency_order()
+
+
+def test_create_creates_the_views_after_the_views_they_read():
+    with mock.patch.object(materialized_views, 'db'), \
+            mock.patch.object(materialized_views, '_exists', side_effect=lambda name: name == 'cbs.involved_hebrew'), \
+            mock.patch.object(materialized_views, '_is_materialized_view', return_value=False), \
+            mock.patch.object(materialized_views, '_create') as create, \
+            mock.patch.object(materialized_views, 'refresh') as refresh:
+        materialized_views.create(names=['vehicles_markers_hebrew'])
+    created = [call[0][0].name for call in create.call_args_list]
+    assert 'involved_hebrew' not in created
+    assert sorted(created) == sorted(set(MATERIALIZED_VIEWS) - {'involved_hebrew'})
+    assert _before_its_dependencies(created) == []
+    refresh.assert_called_once_with(names=created)
@@ -0,0 +1,37 @@
+from collections import namedtuple
+from unittest import mock
+
+import anyway
+from anyway.parsers import road_segments
+from anyway.parsers.cbs_dictionaries import RoadSegmentsIndex
+
+Marker = namedtuple('Marker', ['id', 'provider_code', 'road1', 'km'])
+
+MARKERS = {2018: [Marker(1, 1, 1, 50.0), Marker(2, 3, 1, 500.0), Marker(3, 1, 4, 10.0)],
+           2019: [Marker(1, 1, 4, 20.0)]}
+
+
+def test_backfill_road_segment_ids_updates_every_year_in_batches():
+    db = mock.MagicMock()
+    db.session.query.return_value.filter.return_value.all.side_effect = [MARKERS[2018], MARKERS[2019]]
+    index = RoadSegmentsIndex([(11, 1, 0.0, 10.0), (12, 4, 0.0, 2.0), (10, 4, 1.5, 3.0)])
+    with mock.patch.object(anyway, 'db', db), \
+            mock.patch('anyway.parsers.cbs.load_road_segments_index', return_value=index), \
+            mock.patch('anyway.parsers.cbs_partitions.get_partition_years', return_value=[2018, 2019]), \
+            mock.patch.object(road_segments, '_update_road_segment_ids') as update:
+        road_segments.backfill_road_segment_ids(batch_size=1)
+    # marker 2 of 2018 is beyond its road's segments, and keeps no segment
+    assert update.call_args_list == [mock.call(db, 2018, [(1, 1, 11)]),
+                                     mock.call(db, 2018, [(3, 1, 12)]),
+                                     mock.call(db, 2019, [(1, 1, 10)])]
+    assert db.session.commit.call_count == 2
+
+
+def test_update_road_segment_ids_binds_every_marker():
+    db = mock.MagicMock()
+    road_segments._update_road_segment_ids(db, 2019, [(1, 1, 11), (2, 3, 12)])
+    statement, params = db.session.execute.call_args[0]
+    assert 'FROM (VALUES (:id0, :provider_code0, :road_segment_id0), (:id1, :provider_code1, :road_segment_id1))' \
+        in statement
+    assert params == {'year': 2019, 'id0': 1, 'provider_code0': 1, 'road_segment_id0': 11,
+                      'id1': 2, 'provider_code1': 3, 'road_segment_id1': 12}